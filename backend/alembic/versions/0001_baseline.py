@@ -0,0 +1,101 @@
+"""baseline: users, resources, lunar objects, modules, user maps
+
+The schema create_all produced before migrations were introduced.
+Databases created that way are stamped at this revision by app.db.migrate.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from geoalchemy2 import Geometry
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    postgresql = op.get_bind().dialect.name == "postgresql"
+    if postgresql:
+        op.execute("CREATE EXTENSION IF NOT EXISTS postgis")
+
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("username", sa.String(), nullable=False),
+        sa.Column("hashed_password", sa.String(), nullable=False),
+        sa.Column("full_name", sa.String()),
+        sa.Column("email", sa.String()),
+        sa.Column("is_active", sa.Boolean()),
+        sa.Column("is_superuser", sa.Boolean()),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_username", "users", ["username"], unique=True)
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    op.create_table(
+        "resources",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("current_level", sa.Float(), nullable=False),
+        sa.Column("capacity", sa.Float(), nullable=False),
+        sa.Column("unit", sa.String(), nullable=False),
+        sa.Column("last_updated", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("status", sa.String()),
+    )
+    op.create_index("ix_resources_id", "resources", ["id"])
+    op.create_index("ix_resources_name", "resources", ["name"], unique=True)
+
+    op.create_table(
+        "lunar_objects",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("type", sa.String(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("lat", sa.Float(), nullable=False),
+        sa.Column("lng", sa.Float(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("restriction_radius", sa.Float()),
+    )
+    op.create_index("ix_lunar_objects_id", "lunar_objects", ["id"])
+
+    op.create_table(
+        "modules",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("module_type", sa.String(), nullable=False),
+        sa.Column("area", sa.Float(), nullable=False),
+        # Индекс создается ниже явно, как его создавал geoalchemy при create_all.
+        # Без PostGIS (локальный SQLite) — просто BLOB: DDL geoalchemy для SQLite
+        # требует SpatiaLite, а пространственные запросы к модулям и так только для PostGIS
+        sa.Column("location", Geometry("POINT", srid=4326, spatial_index=False) if postgresql else sa.LargeBinary()),
+        sa.Column("status", sa.String()),
+        sa.Column("properties", sa.JSON()),
+    )
+    op.create_index("ix_modules_id", "modules", ["id"])
+    op.create_index("ix_modules_name", "modules", ["name"])
+    if postgresql:
+        op.execute("CREATE INDEX idx_modules_location ON modules USING gist (location)")
+
+    op.create_table(
+        "user_maps",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("description", sa.String()),
+        sa.Column("file_path", sa.String(), nullable=False),
+        sa.Column("file_type", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("created_by", sa.Integer(), sa.ForeignKey("users.id")),
+        sa.Column("is_public", sa.Boolean()),
+    )
+    op.create_index("ix_user_maps_id", "user_maps", ["id"])
+
+
+def downgrade():
+    op.drop_table("user_maps")
+    op.drop_table("modules")
+    op.drop_table("lunar_objects")
+    op.drop_table("resources")
+    op.drop_table("users")
@@ -0,0 +1,170 @@
+"""content-addressed maps, publish jobs, upload sessions, telemetry rollups, list indexes
+
+Everything added to the models since the baseline. Databases that were
+kept up to date by create_all may already have some of it, so each step
+checks first.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def _inspector():
+    return sa.inspect(op.get_bind())
+
+
+def _has_table(name: str) -> bool:
+    return _inspector().has_table(name)
+
+
+def _has_column(table: str, column: str) -> bool:
+    return column in {c["name"] for c in _inspector().get_columns(table)}
+
+
+def _create_index(name: str, table: str, columns, **kwargs):
+    if name not in {i["name"] for i in _inspector().get_indexes(table)}:
+        op.create_index(name, table, columns, **kwargs)
+
+
+def _add_column(table: str, column: sa.Column):
+    if not _has_column(table, column.name):
+        op.add_column(table, column)
+
+
+def upgrade():
+    postgresql = op.get_bind().dialect.name == "postgresql"
+
+    if not _has_table("map_contents"):
+        op.create_table(
+            "map_contents",
+            sa.Column("sha256", sa.String(), primary_key=True),
+            sa.Column("file_type", sa.String(), nullable=False),
+            sa.Column("status", sa.String(), nullable=False),
+            sa.Column("layer_name", sa.String()),
+            sa.Column("size", sa.BigInteger()),
+            sa.Column("raster_layout", sa.JSON()),
+            sa.Column("raster_stats", sa.JSON()),
+            sa.Column("ref_count", sa.Integer(), nullable=False),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+
+    _add_column("user_maps", sa.Column("raster_layout", sa.JSON()))
+    _add_column("user_maps", sa.Column("raster_stats", sa.JSON()))
+    if not _has_column("user_maps", "content_hash"):
+        # batch: на SQLite внешний ключ добавляется только пересозданием таблицы
+        with op.batch_alter_table("user_maps") as batch:
+            batch.add_column(sa.Column("content_hash", sa.String()))
+            batch.create_foreign_key("user_maps_content_hash_fkey", "map_contents", ["content_hash"], ["sha256"])
+    _create_index("ix_user_maps_content_hash", "user_maps", ["content_hash"])
+    _create_index("ix_user_maps_created_at_id", "user_maps", ["created_at", "id"])
+
+    if not _has_table("publish_jobs"):
+        op.create_table(
+            "publish_jobs",
+            sa.Column("id", sa.String(), primary_key=True),
+            sa.Column("status", sa.String(), nullable=False),
+            sa.Column("progress", sa.Float(), nullable=False),
+            sa.Column("error", sa.String()),
+            sa.Column("file_path", sa.String(), nullable=False),
+            sa.Column("file_type", sa.String(), nullable=False),
+            sa.Column("content_hash", sa.String()),
+            sa.Column("name", sa.String(), nullable=False),
+            sa.Column("description", sa.String()),
+            sa.Column("is_public", sa.Boolean()),
+            sa.Column("map_id", sa.Integer(), sa.ForeignKey("user_maps.id")),
+            sa.Column("source_map_id", sa.Integer(), sa.ForeignKey("user_maps.id", ondelete="SET NULL")),
+            sa.Column("derivative", sa.String()),
+            sa.Column("derivative_params", sa.JSON()),
+            sa.Column("created_by", sa.Integer(), sa.ForeignKey("users.id")),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+    else:
+        # Таблица из create_all до появления производных слоев
+        _add_column("publish_jobs", sa.Column("content_hash", sa.String()))
+        if not _has_column("publish_jobs", "source_map_id"):
+            with op.batch_alter_table("publish_jobs") as batch:
+                batch.add_column(sa.Column("source_map_id", sa.Integer()))
+                batch.create_foreign_key(
+                    "publish_jobs_source_map_id_fkey", "user_maps", ["source_map_id"], ["id"], ondelete="SET NULL"
+                )
+        _add_column("publish_jobs", sa.Column("derivative", sa.String()))
+        _add_column("publish_jobs", sa.Column("derivative_params", sa.JSON()))
+    _create_index("ix_publish_jobs_id", "publish_jobs", ["id"])
+    _create_index("ix_publish_jobs_status", "publish_jobs", ["status"])
+
+    if not _has_table("upload_sessions"):
+        op.create_table(
+            "upload_sessions",
+            sa.Column("id", sa.String(), primary_key=True),
+            sa.Column("name", sa.String(), nullable=False),
+            sa.Column("description", sa.String()),
+            sa.Column("file_type", sa.String(), nullable=False),
+            sa.Column("is_public", sa.Boolean()),
+            sa.Column("total_size", sa.BigInteger(), nullable=False),
+            sa.Column("chunk_size", sa.BigInteger(), nullable=False),
+            sa.Column("status", sa.String()),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.Column("created_by", sa.Integer(), sa.ForeignKey("users.id")),
+            sa.Column("job_id", sa.String(), sa.ForeignKey("publish_jobs.id")),
+        )
+    _create_index("ix_upload_sessions_id", "upload_sessions", ["id"])
+
+    if not _has_table("resource_rollups"):
+        op.create_table(
+            "resource_rollups",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("resource", sa.String(), nullable=False),
+            sa.Column("resolution", sa.Integer(), nullable=False),
+            sa.Column("bucket_start", sa.DateTime(), nullable=False),
+            sa.Column("min", sa.Float(), nullable=False),
+            sa.Column("max", sa.Float(), nullable=False),
+            sa.Column("sum", sa.Float(), nullable=False),
+            sa.Column("count", sa.Integer(), nullable=False),
+            sa.UniqueConstraint("resource", "resolution", "bucket_start", name="uq_resource_rollups_bucket"),
+        )
+    _create_index("ix_resource_rollups_id", "resource_rollups", ["id"])
+
+    _add_column("modules", sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()))
+    _add_column("modules", sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()))
+    _create_index("ix_modules_created_at_id", "modules", ["created_at", "id"])
+
+    _create_index("ix_lunar_objects_lat_lng", "lunar_objects", ["lat", "lng"])
+    _create_index("ix_lunar_objects_created_at_id", "lunar_objects", ["created_at", "id"])
+
+    if postgresql:
+        op.execute(
+            "CREATE INDEX IF NOT EXISTS ix_lunar_objects_location ON lunar_objects "
+            "USING gist (ST_SetSRID(ST_MakePoint(lng, lat), 4326))"
+        )
+        op.execute("CREATE INDEX IF NOT EXISTS idx_modules_location ON modules USING gist (location)")
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS ix_lunar_objects_location")
+    op.drop_index("ix_lunar_objects_created_at_id", table_name="lunar_objects")
+    op.drop_index("ix_lunar_objects_lat_lng", table_name="lunar_objects")
+    op.drop_index("ix_modules_created_at_id", table_name="modules")
+    with op.batch_alter_table("modules") as batch:
+        batch.drop_column("updated_at")
+        batch.drop_column("created_at")
+    op.drop_table("resource_rollups")
+    op.drop_table("upload_sessions")
+    op.drop_table("publish_jobs")
+    op.drop_index("ix_user_maps_created_at_id", table_name="user_maps")
+    op.drop_index("ix_user_maps_content_hash", table_name="user_maps")
+    with op.batch_alter_table("user_maps") as batch:
+        batch.drop_constraint("user_maps_content_hash_fkey", type_="foreignkey")
+        batch.drop_column("content_hash")
+        batch.drop_column("raster_stats")
+        batch.drop_column("raster_layout")
+    op.drop_table("map_contents")
@@ -0,0 +1,28 @@
+"""publish job owner and heartbeat
+
+Workers claim queued jobs atomically and refresh heartbeat_at while they
+run them, so a restarting worker fails only the jobs of workers that
+stopped, not every active job.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("publish_jobs", sa.Column("owner", sa.String()))
+    op.add_column("publish_jobs", sa.Column("heartbeat_at", sa.DateTime(timezone=True)))
+
+
+def downgrade():
+    with op.batch_alter_table("publish_jobs") as batch:
+        batch.drop_column("heartbeat_at")
+        batch.drop_column("owner")
@@ -1,13 +1,14 @@
-from fastapi import Depends, HTTPException, status
+from typing import Optional
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
+from jose import JWTError
 from sqlalchemy.orm import Session
 
-from app.core.config import settings
 from app.core.security import oauth2_scheme
 from app.crud.user import get_user_by_username
 from app.db.session import get_db
 from app.schemas.token import TokenData
+from app.services.principals import principal_cache
 
 async def get_current_user(
     db: Session = Depends(get_db),
@@ -19,15 +20,34 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-        token_data = TokenData(username=username)
+        token_data = TokenData(username=principal_cache.subject(token))
     except JWTError:
         raise credentials_exception
-    
-    user = get_user_by_username(db, username=token_data.username)
+
+    # Сессия открывает соединение только при первом запросе, так что попадание в кэш обходится без БД
+    user = principal_cache.get(token_data.username)
     if user is None:
+        db_user = get_user_by_username(db, username=token_data.username)
+        if db_user is None:
+            raise credentials_exception
+        user = principal_cache.put(token_data.username, db_user)
+    if user.is_active is False:
         raise credentials_exception
-    return user
\ No newline at end of file
+    return user
+
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login", auto_error=False)
+
+async def get_optional_user(
+    db: Session = Depends(get_db),
+    token: Optional[str] = Depends(optional_oauth2_scheme),
+    access_token: Optional[str] = Query(None)
+):
+    """Like get_current_user, but anonymous requests get None.
+
+    The token may also come as ``?access_token=`` for clients such as map
+    tile layers that cannot set headers.
+    """
+    token = token or access_token
+    if not token:
+        return None
+    return await get_current_user(db=db, token=token)
@@ -5,7 +5,10 @@ from app.api.v1.endpoints import (
     users, 
     resources, 
     maps,
-    objects
+    objects,
+    uploads,
+    events,
+    health
 )
 
 api_router = APIRouter()
@@ -14,4 +17,7 @@ api_router.include_router(login.router, prefix="/auth", tags=["auth"])
 api_router.include_router(users.router, prefix="/users", tags=["users"])
 api_router.include_router(resources.router, tags=["resources"])
 api_router.include_router(maps.router, prefix="", tags=["maps"])
-api_router.include_router(objects.router, prefix="/objects", tags=["objects"])
\ No newline at end of file
+api_router.include_router(uploads.router, prefix="", tags=["maps"])
+api_router.include_router(objects.router, prefix="/objects", tags=["objects"])
+api_router.include_router(events.router, prefix="/events", tags=["events"])
+api_router.include_router(health.router, prefix="/health", tags=["health"])
\ No newline at end of file
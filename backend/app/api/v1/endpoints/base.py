@@ -1,48 +1,109 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
-from app.db.session import get_db
-from app.crud.base import CRUDBase
+from app.db.session import get_db, get_async_db, run_db, engine, async_engine, pool_status, SessionLocal
+from app.core.config import settings
+from app.crud.module import CRUDModule, get_nearest_modules
 from app.models.module import Module
-from app.schemas.module import ModuleCreate, ModuleUpdate, Module as ModuleSchema
+from app.schemas.page import Page
+from app.schemas.module import ModuleCreate, ModuleUpdate, Module as ModuleSchema, ModuleWithDistance, NearestModulesRequest
+from app.services.list_cache import list_cache
+from app.services.serialization import page_body, stream_rows
+from app.services.telemetry import current_levels
 
 router = APIRouter()
+modules_crud = CRUDModule(Module)
 
-@router.get("/modules/", response_model=List[ModuleSchema])
-def read_modules(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    modules = CRUDBase(Module).get_multi(db, skip=skip, limit=limit)
-    return modules
+@router.get("/modules/", response_model=Page[ModuleSchema])
+async def read_modules(
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    format: str = Query("page", regex="^(page|ndjson|array)$", description="page, or stream every row after the cursor as ndjson or a JSON array"),
+    db=Depends(get_async_db)
+):
+    if format != "page":
+        try:
+            return stream_rows(SessionLocal, lambda s: modules_crud.stream(s, cursor=cursor, schema=ModuleSchema), format)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    etag, version = list_cache.etag("modules", cursor=cursor, limit=limit)
+    cached = list_cache.lookup(request, etag)
+    if cached is not None:
+        return cached
+    try:
+        modules, next_cursor = await run_db(db, modules_crud.get_page, cursor=cursor, limit=limit, schema=ModuleSchema)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return list_cache.store("modules", etag, version, page_body(modules, next_cursor))
+
+def _with_distance(matches) -> List[ModuleWithDistance]:
+    return [
+        ModuleWithDistance(**ModuleSchema.from_orm(module).dict(), distance=distance)
+        for distance, module in matches
+    ]
+
+@router.get("/modules/nearest", response_model=List[ModuleWithDistance])
+async def read_nearest_modules(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    k: int = Query(1, gt=0, le=100),
+    module_type: Optional[str] = None,
+    status: Optional[str] = None,
+    db=Depends(get_async_db)
+):
+    """The ``k`` modules nearest to a point, nearest first"""
+    matches = await run_db(db, get_nearest_modules, [(lat, lng)], k, module_type, status)
+    return _with_distance(matches[0])
+
+@router.post("/modules/nearest", response_model=List[List[ModuleWithDistance]])
+async def read_nearest_modules_batch(body: NearestModulesRequest, db=Depends(get_async_db)):
+    """The ``k`` nearest modules for each of ``points``, in the same order"""
+    if len(body.points) > settings.MODULE_NEAREST_MAX_POINTS:
+        raise HTTPException(status_code=400, detail=f"At most {settings.MODULE_NEAREST_MAX_POINTS} points per request")
+    if not body.points:
+        return []
+    points = [(p.lat, p.lng) for p in body.points]
+    matches = await run_db(db, get_nearest_modules, points, body.k, body.module_type, body.status)
+    return [_with_distance(found) for found in matches]
 
 @router.post("/modules/", response_model=ModuleSchema)
-def create_module(module: ModuleCreate, db: Session = Depends(get_db)):
-    return CRUDBase(Module).create(db, obj_in=module)
+async def create_module(module: ModuleCreate, db=Depends(get_async_db)):
+    return await run_db(db, modules_crud.create, obj_in=module)
 
 @router.put("/modules/{module_id}", response_model=ModuleSchema)
-def update_module(
+async def update_module(
     module_id: int, 
     module: ModuleUpdate, 
-    db: Session = Depends(get_db)
+    db=Depends(get_async_db)
 ):
-    db_module = CRUDBase(Module).get(db, id=module_id)
+    db_module = await run_db(db, modules_crud.get, module_id)
     if not db_module:
         raise HTTPException(status_code=404, detail="Module not found")
-    return CRUDBase(Module).update(db, db_obj=db_module, obj_in=module)
+    return await run_db(db, modules_crud.update, db_obj=db_module, obj_in=module)
 
 @router.delete("/modules/{module_id}")
-def delete_module(module_id: int, db: Session = Depends(get_db)):
-    db_module = CRUDBase(Module).get(db, id=module_id)
+async def delete_module(module_id: int, db=Depends(get_async_db)):
+    db_module = await run_db(db, modules_crud.get, module_id)
     if not db_module:
         raise HTTPException(status_code=404, detail="Module not found")
-    CRUDBase(Module).remove(db, id=module_id)
+    await run_db(db, modules_crud.remove, id=module_id)
     return {"ok": True}
 
+@router.get("/db/pool")
+def get_db_pool():
+    """Connection pool usage, to tell pool exhaustion apart from slow queries"""
+    return {
+        "sync": pool_status(engine),
+        "async": pool_status(async_engine.sync_engine) if async_engine is not None else None,
+    }
+
+@router.get("/list-cache/stats")
+def get_list_cache_stats():
+    return list_cache.snapshot()
+
 
 @router.get("/resources", response_model=dict)
 def get_resources(db: Session = Depends(get_db)):
-    return {
-        "energy": {"current_level": 1200, "capacity": 2000},
-        "water": {"current_level": 500, "capacity": 1000},
-        "oxygen": {"current_level": 300, "capacity": 500},
-        "food": {"current_level": 30, "capacity": 60}
-    }
\ No newline at end of file
+    return current_levels(db)
\ No newline at end of file
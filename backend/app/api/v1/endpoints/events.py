@@ -0,0 +1,112 @@
+# backend/app/api/v1/endpoints/events.py
+import asyncio
+from typing import Optional, Set
+
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, status
+from fastapi.responses import StreamingResponse
+
+from app.api.deps import get_current_user, get_optional_user
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.services.events import TOPICS, event_broker
+
+router = APIRouter()
+
+def _parse_topics(value: str, user) -> Set[str]:
+    topics = {t.strip() for t in value.split(",") if t.strip()}
+    unknown = topics - set(TOPICS)
+    if unknown or not topics:
+        raise ValueError(f"Unknown topics: {', '.join(sorted(unknown)) or '(none)'}; available: {', '.join(TOPICS)}")
+    if "jobs" in topics and user is None:
+        raise PermissionError("The jobs topic requires authentication")
+    return topics
+
+async def _user_from_token(token: Optional[str]):
+    if not token:
+        return None
+    db = SessionLocal()
+    try:
+        return await get_current_user(db=db, token=token)
+    except HTTPException:
+        return None
+    finally:
+        db.close()
+
+@router.websocket("/ws")
+async def events_websocket(
+    websocket: WebSocket,
+    topics: str = Query("resources,objects"),
+    access_token: Optional[str] = Query(None)
+):
+    user = await _user_from_token(access_token)
+    try:
+        topic_set = _parse_topics(topics, user)
+    except (ValueError, PermissionError):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    subscriber = event_broker.subscribe(topic_set, user.id if user else None)
+
+    async def send_events():
+        while True:
+            try:
+                batch = await asyncio.wait_for(subscriber.next_batch(), settings.EVENTS_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                batch = ['{"type":"ping"}']
+            for payload in batch:
+                await websocket.send_text(payload)
+
+    async def wait_disconnect():
+        # Входящие сообщения не используются, ждём только закрытия
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+
+    sender = asyncio.create_task(send_events())
+    receiver = asyncio.create_task(wait_disconnect())
+    try:
+        await asyncio.wait({sender, receiver}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in (sender, receiver):
+            task.cancel()
+        event_broker.unsubscribe(subscriber)
+
+@router.get("/stream")
+async def events_stream(
+    topics: str = Query("resources,objects"),
+    user=Depends(get_optional_user)
+):
+    """Server-Sent Events variant of /events/ws for clients without WebSocket"""
+    try:
+        topic_set = _parse_topics(topics, user)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except PermissionError as e:
+        raise HTTPException(status_code=401, detail=str(e))
+    user_id = user.id if user else None
+
+    async def stream():
+        # Подписка внутри генератора: если клиент ушел до первой итерации,
+        # finally не выполнится, и подписчик остался бы в брокере навсегда
+        subscriber = event_broker.subscribe(topic_set, user_id)
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    batch = await asyncio.wait_for(subscriber.next_batch(), settings.EVENTS_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                yield "".join(f"data: {payload}\n\n" for payload in batch)
+        finally:
+            event_broker.unsubscribe(subscriber)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/stats")
+def get_event_stats():
+    return event_broker.snapshot()
@@ -0,0 +1,47 @@
+from fastapi import APIRouter
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from sqlalchemy import text
+
+from app.core.lifecycle import lifecycle
+from app.db.session import engine
+
+router = APIRouter()
+
+# Схема не откатывается под работающим процессом: достаточно убедиться один раз
+_schema_current = False
+
+
+def _check_database() -> dict:
+    global _schema_current
+    # Alembic нужен только здесь, не при импорте приложения
+    from app.db.migrate import current_revision, head_revision
+
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+        if _schema_current:
+            return {"database": "ok", "schema": "ok"}
+        current, head = current_revision(connection), head_revision()
+    _schema_current = current == head
+    return {"database": "ok", "schema": "ok" if _schema_current else f"at {current}, expected {head}"}
+
+
+@router.get("/live")
+def liveness():
+    """The worker is up and serving; no dependencies are checked"""
+    return {"status": "ok", **lifecycle.snapshot()}
+
+
+@router.get("/ready")
+async def readiness():
+    """Startup finished, the database answers and is migrated to head"""
+    checks = {"startup": "ok" if lifecycle.ready else "pending"}
+    try:
+        checks.update(await run_in_threadpool(_check_database))
+    except Exception as e:
+        checks["database"] = f"error: {e.__class__.__name__}"
+    ready = all(value == "ok" for value in checks.values())
+    return JSONResponse(
+        {"status": "ok" if ready else "unavailable", "checks": checks, **lifecycle.snapshot()},
+        status_code=200 if ready else 503,
+    )
@@ -1,23 +1,43 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
 from datetime import timedelta
 
-from app.core.security import create_access_token, verify_password
-from app.crud.user import get_user_by_username
-from app.db.session import get_db
+from app.core.security import create_access_token
+from app.crud.user import get_user_by_username, update_password_hash
+from app.db.session import get_async_db, run_db
 from app.schemas.token import Token
 from app.core.config import settings
+from app.api.deps import get_current_user
+from app.services.hashing import password_hasher, HasherOverloaded, HasherUnavailable
+from app.services.principals import principal_cache
 
 router = APIRouter()
 
 @router.post("/login", response_model=Token)
-def login(
+async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db=Depends(get_async_db)
 ):
-    user = get_user_by_username(db, username=form_data.username)
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    user = await run_db(db, get_user_by_username, username=form_data.username)
+    valid = False
+    if user:
+        try:
+            valid, new_hash = await password_hasher.verify_and_update(form_data.password, user.hashed_password)
+        except HasherOverloaded:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many login attempts in progress, retry shortly",
+                headers={"Retry-After": "1"},
+            )
+        except HasherUnavailable as e:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=str(e),
+                headers={"Retry-After": "5"},
+            )
+        if valid and new_hash:
+            await run_db(db, update_password_hash, user, new_hash)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -30,4 +50,12 @@ def login(
         expires_delta=access_token_expires
     )
     
-    return {"access_token": access_token, "token_type": "bearer"}
\ No newline at end of file
+    return {"access_token": access_token, "token_type": "bearer"}
+
+@router.get("/principal-cache/stats")
+def get_principal_cache_stats(current_user: dict = Depends(get_current_user)):
+    return principal_cache.snapshot()
+
+@router.get("/hasher/stats")
+def get_hasher_stats(current_user: dict = Depends(get_current_user)):
+    return password_hasher.snapshot()
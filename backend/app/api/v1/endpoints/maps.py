@@ -1,142 +1,69 @@
 # backend/app/api/v1/endpoints/maps.py
+import hashlib
+import json
 import os
-import uuid
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query, Request, Response
+from fastapi.responses import JSONResponse
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from typing import Optional
-import zipfile
-import requests
-from requests.auth import HTTPBasicAuth
+from typing import List, Optional, Tuple
+from app.db.session import get_db, SessionLocal
 from app.core.config import settings
-from app.db.session import get_db
-from app.api.deps import get_current_user
-from app.crud.map import create_user_map, get_user_maps
-from app.schemas.map import MapCreate, Map
+from app.core.etag import if_none_match
+from app.api.deps import get_current_user, get_optional_user
+from app.crud.job import get_publish_job
+from app.crud.content import get_content_stats
+from app.crud.map import get_user_maps, get_user_map, stream_user_maps
+from app.schemas.job import PublishJob
+from app.schemas.map import MapCreate, Map, RasterStats, ElevationSample, ProfileRequest, ElevationProfile, TerrainLayerCreate
+from app.schemas.page import Page
+from app.services.elevation import densify, elevation_reader
+from app.services.list_cache import list_cache
+from app.services.jobs import publish_queue, submit_publish_job
+from app.services.geoserver import geoserver, GeoServerError
+from app.services.publishing import ensure_raster_stats, map_file_path, release_map_content, remove_map_files
+from app.services.terrain import DERIVATIVES, TerrainParams, render_png, terrain
+from app.services.serialization import page_body, stream_rows
+from app.services.shapefile import COPY_CHUNK_SIZE, ShapefileError, ShapefileSet, sidecar_extension, unpack_archive
+from app.services.tile_cache import tile_cache
 
 router = APIRouter(prefix="/maps", tags=["maps"])
 
-GEOSERVER_AUTH = HTTPBasicAuth(settings.GEOSERVER_USER, settings.GEOSERVER_PASSWORD)
 
-
-async def publish_to_geoserver(file_path: str, file_type: str, workspace: str = "lunar"):
-    """Publish file to GeoServer with proper workspace handling"""
-    layer_name = os.path.splitext(os.path.basename(file_path))[0]
-    layer_name = layer_name.replace(" ", "_").lower()
-    
-    # 1. Check/create workspace and namespace (остается без изменений)
-    
-    if file_type == "geotiff":
-        # Create coverage store
-        cs_url = f"{settings.GEOSERVER_URL}/rest/workspaces/{workspace}/coveragestores/{layer_name}/file.geotiff?configure=first&coverageName={layer_name}"
-        
+async def _save_shapefile(files: List[UploadFile], file_path: str) -> Tuple[str, str]:
+    """Save a zipped shapefile or its separate sidecars as ``{id}{ext}``,
+    validating and hashing every member while it is being copied.
+    Returns the .shp path and the content hash."""
+    if len(files) == 1 and files[0].filename.lower().endswith(".zip"):
+        # zipfile требует seekable(), которого у SpooledTemporaryFile в 3.9 нет,
+        # поэтому архив сначала пишем в обычный файл, как при чанковой загрузке
+        archive_path = os.path.splitext(file_path)[0] + ".zip"
         try:
-            with open(file_path, "rb") as f:
-                response = requests.put(
-                    cs_url,
-                    data=f,
-                    headers={"Content-type": "image/geotiff"},
-                    auth=GEOSERVER_AUTH
-                )
-                
-            if not response.ok:
-                raise HTTPException(
-                    status_code=500,
-                    detail=f"Failed to create coverage store: {response.text}"
-                )
-            
-            # Enable layer and set SRS
-            layer_url = f"{settings.GEOSERVER_URL}/rest/layers/{workspace}:{layer_name}"
-            layer_config = {
-                "layer": {
-                    "defaultStyle": {
-                        "name": "raster"
-                    },
-                    "enabled": True
-                }
-            }
-            
-            response = requests.put(
-                layer_url,
-                json=layer_config,
-                auth=GEOSERVER_AUTH,
-                headers={"Content-type": "application/json"}
-            )
-            
-            # Set SRS for the coverage
-            coverage_url = f"{settings.GEOSERVER_URL}/rest/workspaces/{workspace}/coveragestores/{layer_name}/coverages/{layer_name}"
-            coverage_config = {
-                "coverage": {
-                    "srs": "EPSG:4326",
-                    "projectionPolicy": "FORCE_DECLARED",
-                    "enabled": True
-                }
-            }
-            
-            response = requests.put(
-                coverage_url,
-                json=coverage_config,
-                auth=GEOSERVER_AUTH,
-                headers={"Content-type": "application/json"}
-            )
-            
-            return layer_name
-            
-        except Exception as e:
-            raise HTTPException(
-                status_code=500,
-                detail=f"GeoServer GeoTIFF upload failed: {str(e)}"
-            )
-
-    elif file_type == "shapefile":
-        # For shapefile, we need to upload a zip containing all required files
-        try:
-            # Create temporary zip file
-            zip_path = f"{file_path}.zip"
-            base_name = os.path.splitext(file_path)[0]
-            
-            with zipfile.ZipFile(zip_path, 'w') as zipf:
-                for ext in ['.shp', '.shx', '.dbf', '.prj']:
-                    if os.path.exists(f"{base_name}{ext}"):
-                        zipf.write(f"{base_name}{ext}", arcname=f"{layer_name}{ext}")
-
-            # Upload to GeoServer
-            ds_url = f"{settings.GEOSERVER_URL}/rest/workspaces/{workspace}/datastores/{layer_name}/file.shp?configure=first"
-            
-            with open(zip_path, "rb") as f:
-                response = requests.put(
-                    ds_url,
-                    data=f,
-                    headers={"Content-type": "application/zip"},
-                    auth=GEOSERVER_AUTH
-                )
-            
-            # Clean up temp file
-            os.remove(zip_path)
-            
-            if not response.ok:
-                raise HTTPException(
-                    status_code=500,
-                    detail=f"GeoServer Shapefile upload failed: {response.text}"
-                )
-                
-            return layer_name
-            
-        except Exception as e:
-            if os.path.exists(zip_path):
-                os.remove(zip_path)
-            raise HTTPException(
-                status_code=500,
-                detail=f"Shapefile processing failed: {str(e)}"
-            )
-    else:
-        raise HTTPException(
-            status_code=400,
-            detail="Unsupported file type"
-        )
+            with open(archive_path, "wb") as out:
+                while content := await files[0].read(COPY_CHUNK_SIZE):
+                    out.write(content)
+        except Exception:
+            if os.path.exists(archive_path):
+                os.remove(archive_path)
+            raise
+        return await run_in_threadpool(unpack_archive, archive_path, file_path)
+    parts = ShapefileSet(file_path)
+    try:
+        for upload in files:
+            with parts.open(sidecar_extension(upload.filename)) as out:
+                while content := await upload.read(COPY_CHUNK_SIZE):
+                    out.write(content)
+        return parts.finish(), parts.content_hash
+    except Exception:
+        parts.discard()
+        raise
+
 
-@router.post("/upload", response_model=Map)
+@router.post("/upload", response_model=PublishJob, status_code=202)
 async def upload_map(
-    file: UploadFile = File(...),
+    file: Optional[UploadFile] = File(None),
+    files: Optional[List[UploadFile]] = File(None),
     name: str = Form(...),
     file_type: str = Form(...),
     description: Optional[str] = Form(None),
@@ -144,73 +71,347 @@ async def upload_map(
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
+    """Upload a GeoTIFF, a zipped shapefile, or the shapefile sidecars
+    (.shp, .shx, .dbf, optional .prj/.cpg) as several ``files`` parts"""
     # Validate file type
     if file_type not in ["geotiff", "shapefile"]:
         raise HTTPException(status_code=400, detail="Invalid file type")
+    uploads = ([file] if file else []) + (files or [])
+    if not uploads:
+        raise HTTPException(status_code=400, detail="No file uploaded")
+    if file_type == "geotiff" and len(uploads) != 1:
+        raise HTTPException(status_code=400, detail="GeoTIFF must be uploaded as a single file")
+    if publish_queue.full:
+        raise HTTPException(status_code=503, detail="Publish queue is full", headers={"Retry-After": "30"})
     
-    # Create uploads directory if not exists
-    upload_dir = settings.GEOSERVER_UPLOAD_PATH
-    os.makedirs(upload_dir, exist_ok=True)
-    
-    # Generate unique filename
-    file_id = str(uuid.uuid4())
-    file_ext = ".tif" if file_type == "geotiff" else ".shp"
-    file_path = os.path.join(upload_dir, f"{file_id}{file_ext}")
+    file_path = map_file_path(file_type)
     
     try:
-        # Save file
-        with open(file_path, "wb") as buffer:
-            while content := await file.read(1024 * 1024):  # 1MB chunks
-                buffer.write(content)
-        
-        # Publish to GeoServer
-        try:
-            layer_name = await publish_to_geoserver(file_path, file_type)
-        except Exception as e:
-            os.remove(file_path)
-            raise HTTPException(
-                status_code=500,
-                detail=f"GeoServer publish failed: {str(e)}"
-            )
-        
-        # Create DB record
-        db_map = create_user_map(
-            db,
-            MapCreate(
-                name=name,
-                description=description,
-                file_type=file_type,
-                is_public=is_public
-            ),
-            current_user.id,
-            layer_name  # Store the layer name instead of file path
-        )
-        
-        return db_map
-        
+        if file_type == "shapefile":
+            file_path, content_hash = await _save_shapefile(uploads, file_path)
+        else:
+            # Save file, hashing it on the way for deduplication
+            digest = hashlib.sha256()
+            with open(file_path, "wb") as buffer:
+                while content := await uploads[0].read(1024 * 1024):  # 1MB chunks
+                    digest.update(content)
+                    buffer.write(content)
+            content_hash = digest.hexdigest()
+    except ShapefileError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         # Clean up if error occurs
-        if os.path.exists(file_path):
-            os.remove(file_path)
+        remove_map_files(file_path)
         raise HTTPException(
             status_code=500,
             detail=f"File upload failed: {str(e)}"
         )
     
-@router.get("", response_model=list[Map])
+    return submit_publish_job(
+        db,
+        file_path,
+        MapCreate(
+            name=name,
+            description=description,
+            file_type=file_type,
+            is_public=is_public
+        ),
+        current_user.id,
+        content_hash
+    )
+
+@router.get("/jobs/{job_id}", response_model=PublishJob)
+def get_publish_job_status(
+    job_id: str,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    job = get_publish_job(db, job_id)
+    if not job or job.created_by != current_user.id:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+    
+@router.get("", response_model=Page[Map])
 def get_maps(
-    skip: int = 0,
-    limit: int = 100,
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    format: str = Query("page", regex="^(page|ndjson|array)$", description="page, or stream every row after the cursor as ndjson or a JSON array"),
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
-    return get_user_maps(db, user_id=current_user.id, skip=skip, limit=limit)
+    if format != "page":
+        try:
+            return stream_rows(SessionLocal, lambda s: stream_user_maps(s, current_user.id, cursor), format)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    # Свои карты плюс публичные: страница зависит от пользователя
+    etag, version = list_cache.etag("maps", current_user.id, cursor=cursor, limit=limit)
+    cached = list_cache.lookup(request, etag)
+    if cached is not None:
+        return cached
+    try:
+        maps, next_cursor = get_user_maps(db, user_id=current_user.id, cursor=cursor, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return list_cache.store("maps", etag, version, page_body(maps, next_cursor))
+
+@router.get("/contents/stats")
+def get_map_content_stats(
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    return get_content_stats(db)
+
+@router.get("/tile-cache/stats")
+def get_tile_cache_stats(current_user: dict = Depends(get_current_user)):
+    return tile_cache.snapshot()
+
+@router.get("/terrain-cache/stats")
+def get_terrain_cache_stats(current_user: dict = Depends(get_current_user)):
+    return terrain.snapshot()
+
+# Половина экватора в EPSG:3857
+WEB_MERCATOR_EXTENT = 20037508.342789244
+
+def _tile_bbox(z: int, x: int, y: int):
+    size = 2 * WEB_MERCATOR_EXTENT / 2 ** z
+    minx = -WEB_MERCATOR_EXTENT + x * size
+    maxy = WEB_MERCATOR_EXTENT - y * size
+    return (minx, maxy - size, minx + size, maxy)
+
+@router.get("/{map_id}/tiles/{z}/{x}/{y}")
+async def get_map_tile(
+    map_id: int,
+    z: int,
+    x: int,
+    y: int,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: Optional[dict] = Depends(get_optional_user)
+):
+    db_map = get_user_map(db, map_id)
+    if not db_map or not (db_map.is_public or (current_user and db_map.created_by == current_user.id)):
+        raise HTTPException(status_code=404, detail="Map not found")
+    if not 0 <= z <= settings.TILE_MAX_ZOOM or not (0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        raise HTTPException(status_code=400, detail="Invalid tile coordinates")
+
+    layer_name = db_map.file_path
+    try:
+        tile = await tile_cache.get(
+            (layer_name, z, x, y),
+            lambda: geoserver.get_map(settings.GEOSERVER_WORKSPACE, layer_name, _tile_bbox(z, x, y))
+        )
+    except GeoServerError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+
+    headers = {
+        "ETag": tile.etag,
+        "Cache-Control": f"private, max-age={settings.TILE_CACHE_MAX_AGE}",
+    }
+    if if_none_match(request, tile.etag):
+        tile_cache.record_not_modified(tile)
+        return Response(status_code=304, headers=headers)
+    return Response(content=tile.data, media_type="image/png", headers=headers)
+
+def _get_raster_map(db: Session, map_id: int, current_user):
+    db_map = get_user_map(db, map_id)
+    if not db_map or not (db_map.is_public or (current_user and db_map.created_by == current_user.id)):
+        raise HTTPException(status_code=404, detail="Map not found")
+    if db_map.file_type != "geotiff":
+        raise HTTPException(status_code=404, detail="Only available for raster maps")
+    return db_map
+
+@router.get("/{map_id}/stats", response_model=RasterStats)
+async def get_map_stats(
+    map_id: int,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: Optional[dict] = Depends(get_optional_user)
+):
+    db_map = _get_raster_map(db, map_id, current_user)
+
+    # Статистика зависит только от содержимого, так что ETag не меняется
+    headers = {
+        "ETag": f'"stats-{db_map.content_hash or db_map.id}"',
+        "Cache-Control": f"private, max-age={settings.RASTER_STATS_MAX_AGE}",
+    }
+    if if_none_match(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    stats = await ensure_raster_stats(db, db_map)
+    if stats is None:
+        raise HTTPException(status_code=503, detail="Raster statistics are not available")
+    return JSONResponse(content=stats, headers=headers)
+
+def _check_derivative(derivative: str):
+    if derivative not in DERIVATIVES:
+        raise HTTPException(status_code=404, detail=f"Unknown derivative; expected one of {', '.join(DERIVATIVES)}")
+
+@router.get("/{map_id}/terrain/{derivative}/{tx}/{ty}")
+async def get_terrain_tile(
+    map_id: int,
+    derivative: str,
+    tx: int,
+    ty: int,
+    request: Request,
+    z_factor: float = Query(1.0, gt=0),
+    azimuth: float = Query(315.0, ge=0, le=360),
+    altitude: float = Query(45.0, ge=0, le=90),
+    db: Session = Depends(get_db),
+    current_user: Optional[dict] = Depends(get_optional_user)
+):
+    """PNG preview of one tile of slope, aspect or hillshade, in the source
+    raster's own ``TERRAIN_TILE_SIZE`` pixel grid"""
+    _check_derivative(derivative)
+    db_map = _get_raster_map(db, map_id, current_user)
+    file_path = map_file_path(db_map.file_type, db_map.file_path)
+    params = TerrainParams(z_factor, azimuth, altitude)
+    if not os.path.exists(file_path):
+        raise HTTPException(status_code=404, detail="Raster file not found")
+    grid = await terrain.grid(db_map.file_path, file_path)
+    if not (0 <= tx < grid.cols and 0 <= ty < grid.rows):
+        raise HTTPException(status_code=400, detail="Invalid tile coordinates")
+
+    # Исходный растр не меняется, поэтому тайл определяется слоем и параметрами
+    headers = {
+        "ETag": f'"terrain-{db_map.file_path}-{derivative}-{params.variant(derivative)}-{tx}-{ty}"',
+        "Cache-Control": f"private, max-age={settings.TERRAIN_MAX_AGE}",
+    }
+    if if_none_match(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    data = await terrain.tile(db_map.file_path, file_path, derivative, tx, ty, params)
+    png = await run_in_threadpool(render_png, derivative, data)
+    return Response(content=png, media_type="image/png", headers=headers)
+
+@router.post("/{map_id}/terrain/{derivative}", response_model=PublishJob, status_code=202)
+def publish_terrain_layer(
+    map_id: int,
+    derivative: str,
+    layer_in: TerrainLayerCreate,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """Render slope, aspect or hillshade of a DEM in the background and
+    publish it to GeoServer as a new map"""
+    _check_derivative(derivative)
+    db_map = _get_raster_map(db, map_id, current_user)
+    if publish_queue.full:
+        raise HTTPException(status_code=503, detail="Publish queue is full", headers={"Retry-After": "30"})
+
+    map_in = MapCreate(
+        name=layer_in.name or f"{db_map.name} ({derivative})",
+        description=layer_in.description,
+        file_type="geotiff",
+        is_public=layer_in.is_public
+    )
+    params = TerrainParams(layer_in.z_factor, layer_in.azimuth, layer_in.altitude)
+    return submit_publish_job(
+        db,
+        map_file_path("geotiff"),
+        map_in,
+        current_user.id,
+        source_map_id=db_map.id,
+        derivative=derivative,
+        derivative_params=params._asdict()
+    )
+
+def _points(value, name: str) -> np.ndarray:
+    try:
+        points = np.asarray(value, dtype=np.float64)
+    except (TypeError, ValueError):
+        points = None
+    if points is None or points.ndim != 2 or points.shape[1] != 2 or not np.isfinite(points).all():
+        raise HTTPException(status_code=400, detail=f"{name} must be a list of [lng, lat] pairs")
+    return points
+
+def _nullable(values: np.ndarray) -> list:
+    out = values.astype(object)
+    out[np.isnan(values)] = None
+    return out.tolist()
+
+async def _sample(db_map, lng: np.ndarray, lat: np.ndarray, band: int) -> np.ndarray:
+    try:
+        return await run_in_threadpool(
+            elevation_reader.sample, map_file_path(db_map.file_type, db_map.file_path), lng, lat, band
+        )
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Raster file not found")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/{map_id}/sample", response_model=ElevationSample)
+async def sample_map_elevations(
+    map_id: int,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: Optional[dict] = Depends(get_optional_user)
+):
+    """Bilinear elevations at ``{"points": [[lng, lat], ...], "band": 1}``,
+    null outside the raster or over nodata"""
+    db_map = _get_raster_map(db, map_id, current_user)
+    # Тело разбирается напрямую в NumPy: pydantic на 10^5 точек в разы медленнее
+    try:
+        payload = json.loads(await request.body())
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid JSON body")
+    if not isinstance(payload, dict) or not isinstance(payload.get("points"), list):
+        raise HTTPException(status_code=400, detail="Body must be {\"points\": [[lng, lat], ...]}")
+    band = payload.get("band", 1)
+    if not isinstance(band, int) or band < 1:
+        raise HTTPException(status_code=400, detail="band must be a positive integer")
+    if len(payload["points"]) > settings.ELEVATION_MAX_POINTS:
+        raise HTTPException(status_code=400, detail=f"At most {settings.ELEVATION_MAX_POINTS} points per request")
+    if not payload["points"]:
+        return JSONResponse(content={"elevations": []})
+
+    points = _points(payload["points"], "points")
+    elevations = await _sample(db_map, points[:, 0], points[:, 1], band)
+    return JSONResponse(content={"elevations": _nullable(elevations)})
+
+@router.post("/{map_id}/profile", response_model=ElevationProfile)
+async def get_map_profile(
+    map_id: int,
+    body: ProfileRequest,
+    db: Session = Depends(get_db),
+    current_user: Optional[dict] = Depends(get_optional_user)
+):
+    """Elevations every ``step`` metres along a polyline of [lng, lat] vertices,
+    following great circles between them"""
+    db_map = _get_raster_map(db, map_id, current_user)
+    if len(body.line) < 2 or body.step <= 0:
+        raise HTTPException(status_code=400, detail="A profile needs at least two vertices and a positive step")
+    line = _points(body.line, "line")
+    try:
+        lng, lat, distances = densify(line[:, 0], line[:, 1], body.step, settings.ELEVATION_MAX_POINTS)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    elevations = await _sample(db_map, lng, lat, body.band)
+    valid = elevations[~np.isnan(elevations)]
+    # Набор и потеря высоты считаются только между соседними точками с данными
+    rises = np.diff(valid)
+    return JSONResponse(content={
+        "length": float(distances[-1]),
+        "distances": distances.tolist(),
+        "points": np.column_stack((lng, lat)).tolist(),
+        "elevations": _nullable(elevations),
+        "min": float(valid.min()) if valid.size else None,
+        "max": float(valid.max()) if valid.size else None,
+        "ascent": float(rises[rises > 0].sum()),
+        "descent": float(-rises[rises < 0].sum()),
+    })
 
 @router.delete("/{map_id}")
-def delete_map(
+async def delete_map(
     map_id: int,
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
-    # Implementation to delete from GeoServer and DB
-    pass
\ No newline at end of file
+    db_map = get_user_map(db, map_id)
+    if not db_map or db_map.created_by != current_user.id:
+        raise HTTPException(status_code=404, detail="Map not found")
+
+    await release_map_content(db, db_map)
+    return {"ok": True}
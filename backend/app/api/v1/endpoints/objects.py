@@ -1,33 +1,174 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
+from starlette.concurrency import run_in_threadpool
+from typing import List, Optional
 from datetime import datetime
 import uuid
 
-from app.db.session import get_db
+from app.core.config import settings
+from app.crud.object import get_objects, get_objects_near, stream_objects
+from app.db.session import get_db, get_async_db, run_db, SessionLocal
 from app.models.object import LunarObject
-from app.schemas.object import ObjectCreate, Object
+from app.schemas.page import Page
+from app.schemas.object import ObjectCreate, Object, ObjectWithDistance, ZoneConflict, ConflictPair
+from app.services.conflicts import conflict_index
+from app.services.events import event_broker
+from app.services.list_cache import list_cache
+from app.services import object_io
+from app.services.serialization import page_body, stream_rows
+from app.services.spatial import parse_bbox, split_bbox
 
 router = APIRouter()
 
+def _check_zones(lat: float, lng: float, exclude_id: Optional[str] = None):
+    conflict_index.ensure_loaded()
+    violations = conflict_index.violations(lat, lng, exclude_id=exclude_id)
+    if violations:
+        raise HTTPException(
+            status_code=409,
+            detail={
+                "message": "Placement violates restriction zones",
+                "conflicts": [{"id": obj_id, "distance": distance} for obj_id, distance in violations],
+            }
+        )
+
 @router.post("/", response_model=Object)
-def create_object(obj: ObjectCreate, db: Session = Depends(get_db)):
+def create_object(obj: ObjectCreate, force: bool = False, db: Session = Depends(get_db)):
+    if not force:
+        _check_zones(obj.lat, obj.lng)
     db_obj = LunarObject(
         id=str(uuid.uuid4()),
         type=obj.type,
         name=obj.name,
         lat=obj.lat,
         lng=obj.lng,
+        restriction_radius=obj.restriction_radius,
         created_at=datetime.utcnow()
     )
     db.add(db_obj)
     db.commit()
     db.refresh(db_obj)
+    conflict_index.upsert(db_obj)
+    event_broker.publish("objects", db_obj.id, "created", Object.from_orm(db_obj))
     return db_obj
 
-@router.get("/", response_model=List[Object])
-def read_objects(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return db.query(LunarObject).order_by(LunarObject.created_at.desc()).offset(skip).limit(limit).all()
+@router.post("/bulk")
+async def import_objects(request: Request, db: Session = Depends(get_db)):
+    """Import a GeoJSON FeatureCollection or NDJSON body in one transaction"""
+    content_type = request.headers.get("content-type", "")
+    if "ndjson" in content_type or "jsonlines" in content_type:
+        items = object_io.iter_ndjson(request.stream())
+    else:
+        items = object_io.iter_feature_collection(request.stream())
+
+    batch_size = settings.OBJECT_IMPORT_BATCH_SIZE
+    batch, imported, errors = [], 0, []
+    # Проверка и COPY блокирующие: гоняем их в пуле потоков, не на event loop
+    try:
+        async for item in items:
+            batch.append(item)
+            if len(batch) < batch_size:
+                continue
+            rows, batch_errors = await run_in_threadpool(object_io.validate_batch, batch, imported + len(errors))
+            errors.extend(batch_errors)
+            if errors:
+                break
+            await run_db(db, object_io.write_batch, rows)
+            imported += len(rows)
+            batch = []
+        if batch and not errors:
+            rows, batch_errors = await run_in_threadpool(object_io.validate_batch, batch, imported + len(errors))
+            errors.extend(batch_errors)
+            if not errors:
+                await run_db(db, object_io.write_batch, rows)
+                imported += len(rows)
+    except (object_io.BulkImportError, ValueError) as e:
+        await run_in_threadpool(db.rollback)
+        raise HTTPException(status_code=400, detail=f"Malformed import body: {str(e)}")
+
+    if errors:
+        await run_in_threadpool(db.rollback)
+        raise HTTPException(status_code=422, detail={"message": "Invalid objects, nothing imported", "errors": errors[:100]})
+    await run_in_threadpool(db.commit)
+    conflict_index.invalidate()
+    event_broker.publish("objects", "bulk", "imported", {"count": imported})
+    return {"imported": imported}
+
+@router.get("/export")
+def export_objects(format: str = Query("geojson", regex="^(geojson|ndjson)$")):
+    rows = object_io.export_rows(SessionLocal)
+    if format == "ndjson":
+        return StreamingResponse(object_io.iter_ndjson_export(rows), media_type="application/x-ndjson")
+    return StreamingResponse(
+        object_io.iter_geojson(rows),
+        media_type="application/geo+json",
+        headers={"Content-Disposition": 'attachment; filename="lunar-objects.geojson"'}
+    )
+
+@router.get("/conflicts", response_model=List[ConflictPair])
+def read_conflicts():
+    conflict_index.ensure_loaded()
+    return [
+        ConflictPair(first_id=first, second_id=second, distance=distance)
+        for first, second, distance in conflict_index.all_conflicts()
+    ]
+
+@router.get("/conflicts/check", response_model=List[ZoneConflict])
+def check_placement(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    exclude_id: Optional[str] = None
+):
+    conflict_index.ensure_loaded()
+    return [
+        ZoneConflict(id=obj_id, distance=distance)
+        for obj_id, distance in conflict_index.violations(lat, lng, exclude_id=exclude_id)
+    ]
+
+@router.get("/conflicts/stats")
+def get_conflict_index_stats():
+    return conflict_index.snapshot()
+
+@router.get("/", response_model=Page[Object])
+async def read_objects(
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    bbox: Optional[str] = Query(None, description="min_lng,min_lat,max_lng,max_lat"),
+    format: str = Query("page", regex="^(page|ndjson|array)$", description="page, or stream every row after the cursor as ndjson or a JSON array"),
+    db=Depends(get_async_db)
+):
+    if format != "page":
+        try:
+            boxes = split_bbox(parse_bbox(bbox)) if bbox else None
+            return stream_rows(SessionLocal, lambda s: stream_objects(s, boxes, cursor), format)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    etag, version = list_cache.etag("objects", cursor=cursor, limit=limit, bbox=bbox)
+    cached = list_cache.lookup(request, etag)
+    if cached is not None:
+        return cached
+    try:
+        boxes = split_bbox(parse_bbox(bbox)) if bbox else None
+        objects, next_cursor = await run_db(db, get_objects, boxes, cursor=cursor, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return list_cache.store("objects", etag, version, page_body(objects, next_cursor))
+
+@router.get("/near", response_model=List[ObjectWithDistance])
+async def read_objects_near(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    r: float = Query(..., gt=0, description="Radius in metres"),
+    limit: int = Query(100, gt=0, le=10000),
+    db=Depends(get_async_db)
+):
+    matches = await run_db(db, get_objects_near, lat, lng, r, limit=limit)
+    return [
+        ObjectWithDistance(**Object.from_orm(obj).dict(), distance=distance)
+        for distance, obj in matches
+    ]
 
 @router.delete("/{object_id}")
 def delete_object(object_id: str, db: Session = Depends(get_db)):
@@ -36,21 +177,34 @@ def delete_object(object_id: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Object not found")
     db.delete(db_obj)
     db.commit()
+    conflict_index.remove(object_id)
+    event_broker.publish("objects", object_id, "deleted")
     return {"ok": True}
 
 @router.patch("/{object_id}", response_model=Object)
 def update_object(
     object_id: str,
     obj_update: dict,
+    force: bool = False,
     db: Session = Depends(get_db)
 ):
     db_obj = db.query(LunarObject).filter(LunarObject.id == object_id).first()
     if not db_obj:
         raise HTTPException(status_code=404, detail="Object not found")
     
+    if not force and {"lat", "lng"} & obj_update.keys():
+        _check_zones(obj_update.get("lat", db_obj.lat), obj_update.get("lng", db_obj.lng), exclude_id=object_id)
+    
+    before = Object.from_orm(db_obj).dict()
     for field, value in obj_update.items():
         setattr(db_obj, field, value)
     
     db.commit()
     db.refresh(db_obj)
+    conflict_index.upsert(db_obj)
+    # Подписчикам уходят только изменившиеся поля
+    after = Object.from_orm(db_obj).dict()
+    changes = {field: value for field, value in after.items() if before.get(field) != value}
+    if changes:
+        event_broker.publish("objects", object_id, "updated", changes)
     return db_obj
\ No newline at end of file
@@ -1,14 +1,67 @@
-from fastapi import APIRouter, Depends
+import time
+from datetime import datetime
+from typing import Optional
+
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
+from app.core.config import settings
 from app.db.session import get_db
+from app.schemas.telemetry import (
+    Forecast,
+    ResourceName,
+    TelemetryAccepted,
+    TelemetryBatch,
+    TelemetryPoint,
+    TelemetrySeries,
+)
+from app.services.forecast import forecaster
+from app.services.telemetry import current_levels, from_epoch, telemetry_store, to_epoch
 
 router = APIRouter()
 
 @router.get("/resources")
 def get_resources(db: Session = Depends(get_db)):
-    return {
-        "energy": {"current_level": 1200, "capacity": 2000, "unit": "kWh"},
-        "water": {"current_level": 500, "capacity": 1000, "unit": "liters"},
-        "oxygen": {"current_level": 300, "capacity": 500, "unit": "m³"},
-        "food": {"current_level": 30, "capacity": 60, "unit": "days"}
-    }
\ No newline at end of file
+    return current_levels(db)
+
+@router.get("/resources/forecast", response_model=Forecast)
+def get_forecast(db: Session = Depends(get_db)):
+    return forecaster.refresh(db)
+
+@router.post("/resources/telemetry", response_model=TelemetryAccepted, status_code=202)
+def ingest_telemetry(batch: TelemetryBatch):
+    now = time.time()
+    grouped = {}
+    for reading in batch.readings:
+        ts, values = grouped.setdefault(reading.resource, ([], []))
+        ts.append(to_epoch(reading.ts) if reading.ts else now)
+        values.append(reading.value)
+    for resource, (ts, values) in grouped.items():
+        telemetry_store.ingest(resource, np.array(ts, dtype=np.float64), np.array(values, dtype=np.float64))
+    return TelemetryAccepted(accepted=len(batch.readings))
+
+@router.get("/resources/telemetry/{resource}", response_model=TelemetrySeries)
+def get_telemetry(
+    resource: ResourceName,
+    start: datetime,
+    end: Optional[datetime] = None,
+    step: int = Query(60, ge=1, description="Requested resolution, seconds"),
+    db: Session = Depends(get_db)
+):
+    start_ts = to_epoch(start)
+    end_ts = to_epoch(end) if end else time.time()
+    if end_ts <= start_ts:
+        raise HTTPException(status_code=400, detail="end must be after start")
+    if (end_ts - start_ts) / step > settings.TELEMETRY_MAX_POINTS:
+        raise HTTPException(status_code=400, detail="Too many points, increase step or narrow the range")
+
+    resolution, source, buckets = telemetry_store.series(db, resource, start_ts, end_ts, step)
+    return TelemetrySeries(
+        resource=resource,
+        resolution=resolution,
+        source=source,
+        points=[
+            TelemetryPoint(ts=from_epoch(s), min=lo, max=hi, avg=total / count, count=count)
+            for s, lo, hi, total, count in zip(*buckets)
+        ]
+    )
@@ -0,0 +1,171 @@
+# backend/app/api/v1/endpoints/uploads.py
+import asyncio
+import os
+from fastapi import APIRouter, Depends, HTTPException, Request, Header
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from typing import Optional
+
+from app.core.config import settings
+from app.db.session import get_db
+from app.api.deps import get_current_user
+from app.crud.upload import (
+    create_upload_session,
+    get_upload_session,
+    claim_upload_session,
+    set_upload_status,
+)
+from app.schemas.job import PublishJob
+from app.schemas.map import MapCreate
+from app.schemas.upload import UploadSessionCreate, UploadSession, UploadSessionStatus, ChunkReceipt
+from app.services import shapefile, uploads
+from app.services.jobs import submit_publish_job
+from app.services.publishing import map_file_path
+
+router = APIRouter(prefix="/maps/uploads", tags=["maps"])
+
+
+def _get_session_or_404(db: Session, session_id: str, user_id: int):
+    db_session = get_upload_session(db, session_id, user_id)
+    if not db_session:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    return db_session
+
+
+def _session_status(db_session) -> UploadSessionStatus:
+    received = uploads.received_chunks(db_session.id)
+    received_set = set(received)
+    return UploadSessionStatus(
+        **UploadSession.from_orm(db_session).dict(),
+        received_chunks=received,
+        missing_chunks=[i for i in range(db_session.total_chunks) if i not in received_set],
+        received_ranges=uploads.received_ranges(received, db_session.chunk_size, db_session.total_size),
+    )
+
+
+@router.post("", response_model=UploadSession, status_code=201)
+def initiate_upload(
+    session_in: UploadSessionCreate,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    if session_in.file_type not in ["geotiff", "shapefile"]:
+        raise HTTPException(status_code=400, detail="Invalid file type")
+    if not 0 < session_in.total_size <= settings.MAX_UPLOAD_SIZE:
+        raise HTTPException(status_code=413, detail="File size exceeds upload limit")
+
+    chunk_size = session_in.chunk_size or settings.UPLOAD_CHUNK_SIZE
+    if not settings.UPLOAD_MIN_CHUNK_SIZE <= chunk_size <= settings.UPLOAD_MAX_CHUNK_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"chunk_size must be between {settings.UPLOAD_MIN_CHUNK_SIZE} and {settings.UPLOAD_MAX_CHUNK_SIZE}"
+        )
+    return create_upload_session(db, session_in, current_user.id, chunk_size)
+
+
+@router.put("/{session_id}/chunks/{index}", response_model=ChunkReceipt)
+async def upload_chunk(
+    session_id: str,
+    index: int,
+    request: Request,
+    x_chunk_sha256: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    db_session = _get_session_or_404(db, session_id, current_user.id)
+    if db_session.status != "active":
+        raise HTTPException(status_code=409, detail=f"Upload session is {db_session.status}")
+    if not 0 <= index < db_session.total_chunks:
+        raise HTTPException(status_code=400, detail="Chunk index out of range")
+
+    expected_size = uploads.expected_chunk_size(db_session.total_size, db_session.chunk_size, index)
+    try:
+        size, sha256 = await uploads.write_chunk(
+            session_id, index, request.stream(), expected_size, x_chunk_sha256
+        )
+    except uploads.ChunkError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return ChunkReceipt(index=index, size=size, sha256=sha256)
+
+
+@router.get("/{session_id}", response_model=UploadSessionStatus)
+def get_upload_status(
+    session_id: str,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    return _session_status(_get_session_or_404(db, session_id, current_user.id))
+
+
+@router.post("/{session_id}/finalize", response_model=PublishJob, status_code=202)
+async def finalize_upload(
+    session_id: str,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    db_session = _get_session_or_404(db, session_id, current_user.id)
+    status = _session_status(db_session)
+    if status.missing_chunks:
+        raise HTTPException(
+            status_code=409,
+            detail={"message": "Upload is incomplete", "missing_chunks": status.missing_chunks}
+        )
+    if not claim_upload_session(db, session_id):
+        raise HTTPException(status_code=409, detail="Upload session is already being finalized")
+    db.refresh(db_session)
+
+    file_path = map_file_path(db_session.file_type, session_id)
+    try:
+        if db_session.file_type == "shapefile":
+            # Чанковая загрузка shapefile — это zip со всеми сайдкарами
+            archive_path = os.path.splitext(file_path)[0] + ".zip"
+            await run_in_threadpool(uploads.assemble, session_id, db_session.total_chunks, archive_path)
+            file_path, content_hash = await run_in_threadpool(shapefile.unpack_archive, archive_path, file_path)
+        else:
+            # Хэш считаем отдельным чтением чанков, чтобы сборка осталась без копирования через userspace
+            _, content_hash = await asyncio.gather(
+                run_in_threadpool(uploads.assemble, session_id, db_session.total_chunks, file_path),
+                run_in_threadpool(uploads.chunks_sha256, session_id, db_session.total_chunks),
+            )
+    except shapefile.ShapefileError as e:
+        set_upload_status(db, db_session, "active")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        # Chunks are kept, so the client can retry finalize
+        set_upload_status(db, db_session, "active")
+        raise HTTPException(status_code=500, detail=f"Upload finalize failed: {str(e)}")
+
+    try:
+        job = submit_publish_job(
+            db,
+            file_path,
+            MapCreate(
+                name=db_session.name,
+                description=db_session.description,
+                file_type=db_session.file_type,
+                is_public=db_session.is_public
+            ),
+            current_user.id,
+            content_hash
+        )
+    except HTTPException:
+        set_upload_status(db, db_session, "active")
+        raise
+    uploads.discard(session_id)
+    set_upload_status(db, db_session, "completed", job_id=job.id)
+    return job
+
+
+@router.delete("/{session_id}")
+def abort_upload(
+    session_id: str,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    db_session = _get_session_or_404(db, session_id, current_user.id)
+    if db_session.status == "finalizing":
+        raise HTTPException(status_code=409, detail="Upload session is being finalized")
+    uploads.discard(session_id)
+    db.delete(db_session)
+    db.commit()
+    return {"ok": True}
@@ -1,20 +1,57 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from typing import Optional
 
-from app.crud.user import get_users, create_user
-from app.db.session import get_db
+from app.crud.user import get_users, get_user_by_username, create_user, stream_users
+from app.db.session import get_async_db, run_db, SessionLocal
+from app.schemas.page import Page
 from app.schemas.user import User, UserCreate
+from app.services.hashing import password_hasher, HasherOverloaded, HasherUnavailable
+from app.services.list_cache import list_cache
+from app.services.serialization import page_body, stream_rows
 
 router = APIRouter()
 
-@router.get("/", response_model=list[User])
-def read_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    users = get_users(db, skip=skip, limit=limit)
-    return users
+@router.get("/", response_model=Page[User])
+async def read_users(
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    format: str = Query("page", regex="^(page|ndjson|array)$", description="page, or stream every row after the cursor as ndjson or a JSON array"),
+    db=Depends(get_async_db)
+):
+    if format != "page":
+        try:
+            return stream_rows(SessionLocal, lambda s: stream_users(s, cursor), format)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    etag, version = list_cache.etag("users", cursor=cursor, limit=limit)
+    cached = list_cache.lookup(request, etag)
+    if cached is not None:
+        return cached
+    try:
+        users, next_cursor = await run_db(db, get_users, cursor=cursor, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return list_cache.store("users", etag, version, page_body(users, next_cursor))
 
 @router.post("/", response_model=User)
-def create_new_user(user: UserCreate, db: Session = Depends(get_db)):
-    db_user = get_user_by_username(db, username=user.username)
+async def create_new_user(user: UserCreate, db=Depends(get_async_db)):
+    db_user = await run_db(db, get_user_by_username, username=user.username)
     if db_user:
         raise HTTPException(status_code=400, detail="Username already registered")
-    return create_user(db=db, user=user)
\ No newline at end of file
+    # bcrypt на пуле хэширования с тем же контролем нагрузки, что и у логина
+    try:
+        hashed_password = await password_hasher.hash(user.password)
+    except HasherOverloaded:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many password operations in progress, retry shortly",
+            headers={"Retry-After": "1"},
+        )
+    except HasherUnavailable as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "5"},
+        )
+    return await run_db(db, create_user, user, hashed_password)
\ No newline at end of file
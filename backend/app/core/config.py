@@ -13,13 +13,107 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 1440
+    PRINCIPAL_CACHE_SIZE: int = 10000
+    PRINCIPAL_CACHE_TTL: float = 60.0
+    TOKEN_CACHE_SIZE: int = 10000
+
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_QUEUE_SIZE: int = 32
+    PASSWORD_HASH_TIMEOUT: float = 10.0
     BACKEND_CORS_ORIGINS: List[str] = ["*"]
 
+    DB_ASYNC: bool = False  # asyncpg engine for the async endpoints
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+
     GEOSERVER_USER: str = "admin"
     GEOSERVER_PASSWORD: str = "geoserver"
     GEOSERVER_DATA_DIR: str = "/opt/geoserver/data_dir"
     GEOSERVER_UPLOAD_PATH: str = "/opt/geoserver/data_dir/data/lunar"
     GEOSERVER_DATA_DIR: str = "/opt/geoserver/data_dir"
+    GEOSERVER_WORKSPACE: str = "lunar"
+    GEOSERVER_MAX_CONNECTIONS: int = 10
+    GEOSERVER_TIMEOUT: float = 60.0
+    GEOSERVER_CONNECT_TIMEOUT: float = 10.0
+    GEOSERVER_UPLOAD_TIMEOUT: float = 6 * 60 * 60
+    GEOSERVER_MAX_RETRIES: int = 3
+
+    MAX_UPLOAD_SIZE: int = 50 * 1024 * 1024 * 1024  # 50GB
+    UPLOAD_STAGING_PATH: str = "/opt/geoserver/data_dir/data/lunar/.staging"
+    UPLOAD_CHUNK_SIZE: int = 64 * 1024 * 1024
+    UPLOAD_MIN_CHUNK_SIZE: int = 1024 * 1024
+    UPLOAD_MAX_CHUNK_SIZE: int = 512 * 1024 * 1024
+
+    CONTENT_STORE: str = "minio"  # 'minio' or 'local'
+    CONTENT_STORE_PATH: str = "/app/uploads/.content"
+    CONTENT_WAIT_TIMEOUT: float = 6 * 60 * 60  # wait for a concurrent publish of the same bytes
+    CONTENT_POLL_SECONDS: float = 2.0
+    MINIO_BUCKET: str = "lunar-maps"
+    MINIO_SECURE: bool = False
+    MINIO_PART_SIZE: int = 64 * 1024 * 1024
+
+    PUBLISH_WORKERS: int = 2
+    PUBLISH_QUEUE_SIZE: int = 100
+    PUBLISH_HEARTBEAT_SECONDS: float = 15.0
+    PUBLISH_STALE_SECONDS: float = 60.0  # без heartbeat дольше — воркер считается упавшим
+
+    COG_CONVERSION_ENABLED: bool = True
+    COG_COMPRESSION: str = "DEFLATE"
+    COG_BLOCKSIZE: int = 512
+    COG_OVERVIEW_RESAMPLING: str = "AVERAGE"
+
+    RASTER_STATS_WORKERS: int = 4
+    RASTER_STATS_WINDOW: int = 2048  # pixels a side per read, rounded to whole blocks
+    RASTER_STATS_BINS: int = 256
+    RASTER_STATS_PERCENTILES: List[float] = [0.5, 2, 5, 25, 50, 75, 95, 98, 99.5]
+    RASTER_STATS_MAX_AGE: int = 24 * 60 * 60
+
+    ELEVATION_MAX_POINTS: int = 100_000  # per sample request and per profile
+    ELEVATION_BLOCK_CACHE_BYTES: int = 256 * 1024 * 1024
+
+    TILE_CACHE_PATH: str = "/app/uploads/.tile_cache"
+    TILE_CACHE_MEMORY_BYTES: int = 256 * 1024 * 1024
+    TILE_CACHE_DISK_BYTES: int = 10 * 1024 * 1024 * 1024
+    TILE_CACHE_MAX_AGE: int = 3600
+    TILE_MAX_ZOOM: int = 22
+
+    TERRAIN_CACHE_PATH: str = "/app/uploads/.terrain_cache"
+    TERRAIN_WORKERS: int = 4
+    TERRAIN_TILE_SIZE: int = 512  # source pixels a side
+    TERRAIN_CACHE_BYTES: int = 5 * 1024 * 1024 * 1024
+    TERRAIN_MAX_AGE: int = 24 * 60 * 60
+
+    MODULE_NEAREST_MAX_POINTS: int = 1000
+
+    LIST_CACHE_BYTES: int = 64 * 1024 * 1024  # serialized list pages
+    STREAM_BATCH_SIZE: int = 1000  # rows per server-side cursor fetch
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+
+    CONFLICT_GRID_CELL_DEG: float = 0.01
+    CONFLICT_INDEX_REFRESH_SECONDS: float = 60.0
+
+    OBJECT_IMPORT_BATCH_SIZE: int = 5000
+
+    TELEMETRY_BUFFER_SIZE: int = 262144  # readings per resource kept in memory
+    TELEMETRY_ROLLUP_RESOLUTIONS: List[int] = [60, 3600, 86400]
+    TELEMETRY_FLUSH_SECONDS: float = 10.0
+    TELEMETRY_MAX_POINTS: int = 10000
+
+    FORECAST_WINDOW_SECONDS: float = 6 * 60 * 60
+    FORECAST_INTERVAL: float = 30.0
+    FORECAST_WARNING_FRACTION: float = 0.25
+    FORECAST_CRITICAL_FRACTION: float = 0.1
+    FORECAST_FULL_FRACTION: float = 0.98
+    FORECAST_WARNING_HOURS: float = 24.0
+    FORECAST_CRITICAL_HOURS: float = 6.0
+
+    EVENTS_MAX_PENDING: int = 1000  # distinct unsent events per connection before a resync
+    EVENTS_RESOURCE_INTERVAL: float = 1.0
+    EVENTS_HEARTBEAT_SECONDS: float = 15.0
     
     class Config:
         env_file = ".env"
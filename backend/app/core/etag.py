@@ -0,0 +1,20 @@
+# backend/app/core/etag.py
+from starlette.requests import Request
+
+
+def _opaque(tag: str) -> str:
+    # Слабое сравнение (RFC 7232): W/"x" совпадает с "x" — сжатые ответы получают W/
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def if_none_match(request: Request, etag: str) -> bool:
+    """True if the request's If-None-Match lists ``etag`` (or is ``*``),
+    i.e. the client's copy is current and a 304 can be sent"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    current = _opaque(etag)
+    return any(_opaque(tag) == current for tag in header.split(","))
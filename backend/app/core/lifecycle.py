@@ -0,0 +1,80 @@
+# backend/app/core/lifecycle.py
+import logging
+import os
+import time
+from typing import Optional
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+
+class Lifecycle:
+    """Startup timings and state of this worker process, for the health
+    endpoints: how long importing the app took, when the startup hooks
+    finished, and how long until the first request was answered.
+
+    ``app.main`` imports this module first, so ``import_started`` is taken
+    before the routers, models and services are loaded.
+    """
+
+    def __init__(self):
+        self.pid = os.getpid()
+        self.import_started = time.perf_counter()
+        self.imported: Optional[float] = None
+        self.started: Optional[float] = None
+        self.first_request: Optional[float] = None
+        self.stopping = False
+
+    @property
+    def ready(self) -> bool:
+        return self.started is not None and not self.stopping
+
+    def _since_import(self, mark: Optional[float]) -> Optional[float]:
+        return None if mark is None else mark - self.import_started
+
+    def mark_imported(self):
+        self.imported = time.perf_counter()
+
+    def mark_started(self):
+        self.started = time.perf_counter()
+        logger.info(
+            "Worker %d: app imported in %.3fs, started in %.3fs",
+            self.pid, self._since_import(self.imported), self._since_import(self.started),
+        )
+
+    def mark_first_request(self):
+        self.first_request = time.perf_counter()
+        logger.info("Worker %d: first request answered %.3fs after import began", self.pid, self._since_import(self.first_request))
+
+    def snapshot(self) -> dict:
+        return {
+            "pid": self.pid,
+            "import_seconds": self._since_import(self.imported),
+            "startup_seconds": self._since_import(self.started),
+            "first_request_seconds": self._since_import(self.first_request),
+            "uptime_seconds": time.perf_counter() - self.import_started,
+        }
+
+
+lifecycle = Lifecycle()
+
+
+class FirstRequestMiddleware:
+    """Records when the first HTTP response of the worker is sent"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or lifecycle.first_request is not None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_first(message):
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                if lifecycle.first_request is None:
+                    lifecycle.mark_first_request()
+
+        await self.app(scope, receive, send_first)
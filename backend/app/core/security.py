@@ -1,14 +1,14 @@
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from app.core.config import settings
 from app.db.session import get_db 
+from app.services.hashing import build_context
 from sqlalchemy.orm import Session
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = build_context(settings.BCRYPT_ROUNDS)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
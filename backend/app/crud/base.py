@@ -1,5 +1,9 @@
-from typing import Any, Generic, TypeVar
-from sqlalchemy.orm import Session
+import base64
+import json
+from datetime import datetime
+from typing import Any, Generic, List, Optional, Sequence, Tuple, Type, TypeVar
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query, Session
 from pydantic import BaseModel
 from app.db.base_class import Base
 
@@ -7,6 +11,78 @@ ModelType = TypeVar("ModelType", bound=Base)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+def _cursor_value(column: Any, value: Any) -> Any:
+    # Значение приводится к типу колонки здесь: иначе ["abc"] для Integer id
+    # дошел бы до драйвера и упал DataError, то есть 500 вместо 400
+    if value is None or isinstance(value, (dict, list)):
+        raise ValueError
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    return python_type(value)
+
+
+def decode_cursor(cursor: str, columns: Sequence[Any]) -> List[Any]:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError
+        return [_cursor_value(column, v) for column, v in zip(columns, values)]
+    except (ValueError, TypeError, OverflowError):
+        raise ValueError("Invalid cursor")
+
+
+def schema_columns(model: Type[Base], schema: Type[BaseModel]) -> list:
+    """Model attributes behind the fields of a response schema, to fetch
+    plain rows instead of ORM instances"""
+    return [getattr(model, name) for name in schema.__fields__]
+
+
+def keyset(
+    query: Query,
+    columns: Sequence[Any],
+    cursor: Optional[str] = None,
+    descending: bool = False,
+) -> Query:
+    """Order by ``columns`` and start after ``cursor``.
+    Raises ValueError for a malformed cursor."""
+    if cursor:
+        values = decode_cursor(cursor, columns)
+        key = tuple_(*columns)
+        query = query.filter(key < tuple_(*values) if descending else key > tuple_(*values))
+    order = [c.desc() for c in columns] if descending else list(columns)
+    return query.order_by(*order)
+
+
+def paginate(
+    query: Query,
+    columns: Sequence[Any],
+    cursor: Optional[str] = None,
+    limit: int = 100,
+    descending: bool = False,
+) -> Tuple[list, Optional[str]]:
+    """Keyset pagination over ``columns`` (unique together, e.g. created_at + id).
+
+    Returns the page and an opaque cursor for the next one, or None on the
+    last page. Raises ValueError for a malformed cursor.
+    """
+    rows = keyset(query, columns, cursor, descending).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor([getattr(last, c.key) for c in columns])
+
+
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     def __init__(self, model: type[ModelType]):
         self.model = model
@@ -17,6 +93,32 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     def get_multi(self, db: Session, skip: int = 0, limit: int = 100):
         return db.query(self.model).offset(skip).limit(limit).all()
 
+    def _order(self) -> tuple:
+        if hasattr(self.model, "created_at"):
+            return (self.model.created_at, self.model.id)
+        return (self.model.id,)
+
+    def _select(self, db: Session, schema: Optional[Type[BaseModel]]) -> Query:
+        if schema is None:
+            return db.query(self.model)
+        return db.query(*schema_columns(self.model, schema))
+
+    def get_page(
+        self,
+        db: Session,
+        *,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        schema: Optional[Type[BaseModel]] = None,
+    ):
+        """Page ordered by (created_at, id) when the model has created_at, else by id.
+        With ``schema`` the page holds rows of just that schema's fields."""
+        return paginate(self._select(db, schema), self._order(), cursor=cursor, limit=limit)
+
+    def stream(self, db: Session, *, cursor: Optional[str] = None, schema: Optional[Type[BaseModel]] = None) -> Query:
+        """Everything after ``cursor`` in page order, for streaming responses"""
+        return keyset(self._select(db, schema), self._order(), cursor)
+
     def create(self, db: Session, *, obj_in: CreateSchemaType):
         db_obj = self.model(**obj_in.dict())
         db.add(db_obj)
@@ -37,4 +139,4 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         obj = db.query(self.model).get(id)
         db.delete(obj)
         db.commit()
-        return obj
\ No newline at end of file
+        return obj
@@ -0,0 +1,117 @@
+from typing import Optional, Tuple
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.models.content import MapContent
+from app.models.job import PublishJob
+
+def get_content(db: Session, sha256: str):
+    return db.query(MapContent).filter(MapContent.sha256 == sha256).first()
+
+def claim_content(db: Session, sha256: str, file_type: str) -> Tuple[Optional[MapContent], bool]:
+    """Register new content as 'publishing', or take over one whose publish failed.
+
+    Returns the row and whether the caller now owns publishing it.
+    """
+    db.add(MapContent(sha256=sha256, file_type=file_type, status="publishing", ref_count=0))
+    try:
+        db.commit()
+        return get_content(db, sha256), True
+    except IntegrityError:
+        db.rollback()
+    claimed = db.query(MapContent).filter(
+        MapContent.sha256 == sha256,
+        MapContent.status == "failed"
+    ).update({MapContent.status: "publishing", MapContent.file_type: file_type}, synchronize_session=False)
+    db.commit()
+    return get_content(db, sha256), claimed == 1
+
+def mark_content_published(
+    db: Session,
+    content: MapContent,
+    layer_name: str,
+    size: int,
+    raster_layout: Optional[dict] = None,
+    raster_stats: Optional[dict] = None
+):
+    """Publishing owner holds the first reference"""
+    content.status = "published"
+    content.layer_name = layer_name
+    content.size = size
+    content.raster_layout = raster_layout
+    content.raster_stats = raster_stats
+    content.ref_count = 1
+    db.commit()
+    db.refresh(content)
+    return content
+
+def mark_content_failed(db: Session, sha256: str):
+    db.query(MapContent).filter(
+        MapContent.sha256 == sha256,
+        MapContent.status == "publishing"
+    ).update({MapContent.status: "failed"}, synchronize_session=False)
+    db.commit()
+
+def fail_orphaned_contents(db: Session, active_statuses: list):
+    """Fail 'publishing' contents that no active job is publishing any more"""
+    active = db.query(PublishJob.content_hash).filter(
+        PublishJob.status.in_(active_statuses),
+        PublishJob.content_hash.isnot(None)
+    )
+    db.query(MapContent).filter(
+        MapContent.status == "publishing",
+        ~MapContent.sha256.in_(active)
+    ).update({MapContent.status: "failed"}, synchronize_session=False)
+    db.commit()
+
+def acquire_content(db: Session, sha256: str) -> Optional[MapContent]:
+    """Take a reference to published content; None if there is none to share"""
+    acquired = db.query(MapContent).filter(
+        MapContent.sha256 == sha256,
+        MapContent.status == "published"
+    ).update({MapContent.ref_count: MapContent.ref_count + 1}, synchronize_session=False)
+    db.commit()
+    return get_content(db, sha256) if acquired else None
+
+def release_content(db: Session, sha256: str) -> Optional[MapContent]:
+    """Drop a reference. Returns the content when that was the last one:
+    it is then marked 'deleting' and the caller cleans up and deletes it."""
+    db.query(MapContent).filter(
+        MapContent.sha256 == sha256,
+        MapContent.ref_count > 0
+    ).update({MapContent.ref_count: MapContent.ref_count - 1}, synchronize_session=False)
+    # Только один из параллельных release переводит содержимое в 'deleting',
+    # и не после того, как кто-то успел взять новую ссылку
+    orphaned = db.query(MapContent).filter(
+        MapContent.sha256 == sha256,
+        MapContent.ref_count == 0,
+        MapContent.status == "published"
+    ).update({MapContent.status: "deleting"}, synchronize_session=False)
+    db.commit()
+    return get_content(db, sha256) if orphaned else None
+
+def restore_content(db: Session, content: MapContent):
+    """Undo a release whose cleanup failed"""
+    db.query(MapContent).filter(MapContent.sha256 == content.sha256).update(
+        {MapContent.ref_count: MapContent.ref_count + 1, MapContent.status: "published"},
+        synchronize_session=False
+    )
+    db.commit()
+
+def delete_content(db: Session, content: MapContent):
+    db.delete(content)
+    db.commit()
+
+def get_content_stats(db: Session) -> dict:
+    contents, references, stored_bytes, referenced_bytes = db.query(
+        func.count(MapContent.sha256),
+        func.coalesce(func.sum(MapContent.ref_count), 0),
+        func.coalesce(func.sum(MapContent.size), 0),
+        func.coalesce(func.sum(MapContent.size * MapContent.ref_count), 0),
+    ).filter(MapContent.status == "published").one()
+    return {
+        "contents": contents,
+        "references": int(references),
+        "stored_bytes": int(stored_bytes),
+        "deduplicated_bytes": int(referenced_bytes) - int(stored_bytes),
+    }
@@ -0,0 +1,87 @@
+import uuid
+from datetime import datetime
+from typing import List, Optional
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.models.job import PublishJob
+from app.schemas.map import MapCreate
+
+def create_publish_job(
+    db: Session,
+    map: MapCreate,
+    user_id: int,
+    file_path: str,
+    content_hash: Optional[str] = None,
+    source_map_id: Optional[int] = None,
+    derivative: Optional[str] = None,
+    derivative_params: Optional[dict] = None
+):
+    db_job = PublishJob(
+        id=str(uuid.uuid4()),
+        status="queued",
+        progress=0.0,
+        file_path=file_path,
+        file_type=map.file_type,
+        content_hash=content_hash,
+        name=map.name,
+        description=map.description,
+        is_public=map.is_public,
+        source_map_id=source_map_id,
+        derivative=derivative,
+        derivative_params=derivative_params,
+        created_by=user_id
+    )
+    db.add(db_job)
+    db.commit()
+    db.refresh(db_job)
+    return db_job
+
+def get_publish_job(db: Session, job_id: str):
+    return db.query(PublishJob).filter(PublishJob.id == job_id).first()
+
+def get_jobs_by_status(db: Session, statuses: list):
+    return db.query(PublishJob).filter(PublishJob.status.in_(statuses)).order_by(PublishJob.created_at).all()
+
+def update_publish_job(db: Session, db_job: PublishJob, **fields):
+    for field, value in fields.items():
+        setattr(db_job, field, value)
+    db.commit()
+    db.refresh(db_job)
+    return db_job
+
+def claim_publish_job(db: Session, job_id: str, owner: str, status: str) -> bool:
+    """Move a queued job to ``status`` for ``owner``; False if another worker
+    claimed it first"""
+    claimed = db.query(PublishJob).filter(
+        PublishJob.id == job_id,
+        PublishJob.status == "queued"
+    ).update(
+        {PublishJob.status: status, PublishJob.owner: owner, PublishJob.heartbeat_at: func.now()},
+        synchronize_session=False
+    )
+    db.commit()
+    return claimed == 1
+
+def touch_publish_jobs(db: Session, owner: str, statuses: list):
+    db.query(PublishJob).filter(
+        PublishJob.owner == owner,
+        PublishJob.status.in_(statuses)
+    ).update({PublishJob.heartbeat_at: func.now()}, synchronize_session=False)
+    db.commit()
+
+def fail_stale_jobs(db: Session, statuses: list, cutoff: datetime, error: str) -> List[str]:
+    """Fail jobs in ``statuses`` whose worker has not sent a heartbeat since
+    ``cutoff``; returns their ids"""
+    # Задачи без heartbeat (до миграции) оцениваются по updated_at
+    stale = (
+        PublishJob.status.in_(statuses),
+        func.coalesce(PublishJob.heartbeat_at, PublishJob.updated_at) < cutoff,
+    )
+    ids = [job_id for job_id, in db.query(PublishJob.id).filter(*stale)]
+    if not ids:
+        return []
+    db.query(PublishJob).filter(PublishJob.id.in_(ids), *stale).update(
+        {PublishJob.status: "failed", PublishJob.error: error}, synchronize_session=False
+    )
+    db.commit()
+    return [job_id for job_id, in db.query(PublishJob.id).filter(PublishJob.id.in_(ids), PublishJob.error == error)]
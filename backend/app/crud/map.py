@@ -1,24 +1,67 @@
 from typing import Optional
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Query, Session
+from app.crud.base import keyset, paginate, schema_columns
+from app.models.content import MapContent
+from app.models.job import PublishJob
 from app.models.map import UserMap
-from app.schemas.map import MapCreate
+from app.schemas.map import Map, MapCreate
 
-def create_user_map(db: Session, map: MapCreate, user_id: int, file_path: str):
+def create_user_map(
+    db: Session,
+    map: MapCreate,
+    user_id: int,
+    file_path: str,
+    raster_layout: Optional[dict] = None,
+    content_hash: Optional[str] = None,
+    raster_stats: Optional[dict] = None
+):
     db_map = UserMap(
         name=map.name,
         description=map.description,
         file_path=file_path,
         file_type=map.file_type,
         created_by=user_id,
-        is_public=map.is_public
+        is_public=map.is_public,
+        raster_layout=raster_layout,
+        content_hash=content_hash,
+        raster_stats=raster_stats
     )
     db.add(db_map)
     db.commit()
     db.refresh(db_map)
     return db_map
 
-def get_user_maps(db: Session, user_id: Optional[int] = None, skip: int = 0, limit: int = 100):
-    query = db.query(UserMap)
+MAP_ORDER = (UserMap.created_at, UserMap.id)
+
+def _visible_maps(db: Session, user_id: Optional[int]) -> Query:
+    query = db.query(*schema_columns(UserMap, Map))
     if user_id is not None:
         query = query.filter((UserMap.created_by == user_id) | (UserMap.is_public == True))
-    return query.offset(skip).limit(limit).all()
\ No newline at end of file
+    return query
+
+def get_user_maps(db: Session, user_id: Optional[int] = None, cursor: Optional[str] = None, limit: int = 100):
+    return paginate(_visible_maps(db, user_id), MAP_ORDER, cursor=cursor, limit=limit, descending=True)
+
+def stream_user_maps(db: Session, user_id: Optional[int] = None, cursor: Optional[str] = None) -> Query:
+    return keyset(_visible_maps(db, user_id), MAP_ORDER, cursor, descending=True)
+
+def get_user_map(db: Session, map_id: int):
+    return db.query(UserMap).filter(UserMap.id == map_id).first()
+
+def set_map_raster_stats(db: Session, db_map: UserMap, raster_stats: dict):
+    """Store statistics computed after publishing, sharing them with maps of the same content"""
+    db_map.raster_stats = raster_stats
+    if db_map.content_hash:
+        db.query(MapContent).filter(MapContent.sha256 == db_map.content_hash).update(
+            {MapContent.raster_stats: raster_stats}, synchronize_session=False
+        )
+    db.commit()
+    return db_map
+
+def delete_user_map(db: Session, db_map: UserMap):
+    db.query(PublishJob).filter(PublishJob.map_id == db_map.id).update(
+        {PublishJob.map_id: None}, synchronize_session=False
+    )
+    db.delete(db_map)
+    db.commit()
+    return db_map
@@ -0,0 +1,138 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+from geoalchemy2 import WKTElement
+from sqlalchemy import Float, Integer, and_, column, func, select, true, values
+from sqlalchemy.orm import Session
+from app.crud.base import CRUDBase
+from app.models.module import Module
+from app.schemas.module import ModuleCreate, ModuleUpdate
+from app.services.spatial import great_circle_distance, radius_bbox
+
+# (lat, lng)
+Point = Tuple[float, float]
+
+
+def module_point(lat: Optional[float], lng: Optional[float]) -> Optional[WKTElement]:
+    if lat is None or lng is None:
+        return None
+    return WKTElement(f"POINT({lng} {lat})", srid=4326)
+
+
+class CRUDModule(CRUDBase[Module, ModuleCreate, ModuleUpdate]):
+    """Modules take lat/lng in the API and store them as the PostGIS point"""
+
+    def create(self, db: Session, *, obj_in: ModuleCreate):
+        data = obj_in.dict()
+        data["location"] = module_point(data.pop("lat"), data.pop("lng"))
+        db_obj = Module(**data)
+        db.add(db_obj)
+        db.commit()
+        db.refresh(db_obj)
+        return db_obj
+
+    def update(self, db: Session, *, db_obj: Module, obj_in: ModuleUpdate):
+        data = obj_in.dict(exclude_unset=True)
+        if "lat" in data or "lng" in data:
+            data["location"] = module_point(data.pop("lat", None), data.pop("lng", None))
+        for field, value in data.items():
+            setattr(db_obj, field, value)
+        db.add(db_obj)
+        db.commit()
+        db.refresh(db_obj)
+        return db_obj
+
+
+def _filters(module_type: Optional[str], status: Optional[str]) -> list:
+    conditions = [Module.location.isnot(None)]
+    if module_type:
+        conditions.append(Module.module_type == module_type)
+    if status:
+        conditions.append(Module.status == status)
+    return conditions
+
+
+# Координаты уже проверены схемой; VALUES подставляются литералами, чтобы у колонок
+# был числовой тип и на asyncpg (параметры в VALUES он типизирует как text)
+
+def _knn_candidates(db: Session, points: Sequence[Point], k: int, conditions: list) -> Dict[int, List[int]]:
+    # Один запрос на все точки: LATERAL-подзапрос с KNN-порядком по GiST-индексу
+    pts = values(
+        column("idx", Integer), column("lat", Float), column("lng", Float), name="pts", literal_binds=True
+    ).data([(i, lat, lng) for i, (lat, lng) in enumerate(points)])
+    target = func.ST_SetSRID(func.ST_MakePoint(pts.c.lng, pts.c.lat), 4326)
+    knn = (
+        select(Module.id)
+        .where(*conditions)
+        .order_by(Module.location.op("<->")(target))
+        .limit(k)
+        .lateral("knn")
+    )
+    candidates: Dict[int, List[int]] = {i: [] for i in range(len(points))}
+    for idx, module_id in db.execute(select(pts.c.idx, knn.c.id).select_from(pts.join(knn, true()))):
+        candidates[idx].append(module_id)
+    return candidates
+
+
+def _in_envelopes(db: Session, boxes: List[Tuple[int, Tuple[float, float, float, float]]], conditions: list):
+    envelopes = values(
+        column("idx", Integer),
+        column("min_lng", Float), column("min_lat", Float), column("max_lng", Float), column("max_lat", Float),
+        name="envelopes",
+        literal_binds=True,
+    ).data([(idx, *box) for idx, box in boxes])
+    envelope = func.ST_MakeEnvelope(
+        envelopes.c.min_lng, envelopes.c.min_lat, envelopes.c.max_lng, envelopes.c.max_lat, 4326
+    )
+    query = (
+        db.query(envelopes.c.idx, Module)
+        .select_from(envelopes)
+        .join(Module, and_(Module.location.op("&&")(envelope), *conditions))
+    )
+    return query.all()
+
+
+def get_nearest_modules(
+    db: Session,
+    points: Sequence[Point],
+    k: int = 1,
+    module_type: Optional[str] = None,
+    status: Optional[str] = None,
+) -> List[List[Tuple[float, Module]]]:
+    """The ``k`` modules nearest to each (lat, lng) by great-circle distance,
+    nearest first.
+
+    ``<->`` orders by planar distance in degrees, which overrates east-west
+    distances away from the equator. So the index-ordered KNN scan only
+    supplies k candidates per point; the farthest of them bounds the true
+    k-th distance, and an index-backed ``&&`` pass over the envelope of that
+    radius collects every module that can be nearer. Exact distances decide.
+    """
+    conditions = _filters(module_type, status)
+    candidates = _knn_candidates(db, points, k, conditions)
+    ids = {module_id for found in candidates.values() for module_id in found}
+    modules = {m.id: m for m in db.query(Module).filter(Module.id.in_(ids))} if ids else {}
+
+    results: Dict[int, Dict[int, Tuple[float, Module]]] = {}
+    boxes = []
+    for idx, (lat, lng) in enumerate(points):
+        found = {
+            module_id: (great_circle_distance(lat, lng, modules[module_id].lat, modules[module_id].lng),
+                        modules[module_id])
+            for module_id in candidates[idx]
+        }
+        results[idx] = found
+        # Меньше k кандидатов — это все подходящие модули, уточнять нечего
+        if len(found) == k:
+            radius = max(distance for distance, _ in found.values())
+            # Небольшой запас, чтобы округление не отрезало модуль на самой границе
+            boxes.extend((idx, box) for box in radius_bbox(lat, lng, radius * (1 + 1e-9) + 1e-6))
+
+    if boxes:
+        for idx, module in _in_envelopes(db, boxes, conditions):
+            if module.id not in results[idx]:
+                lat, lng = points[idx]
+                results[idx][module.id] = (great_circle_distance(lat, lng, module.lat, module.lng), module)
+
+    return [
+        sorted(results[idx].values(), key=lambda match: (match[0], match[1].id))[:k]
+        for idx in range(len(points))
+    ]
@@ -0,0 +1,33 @@
+from typing import List, Optional, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy.orm import Query
+from app.crud.base import keyset, paginate, schema_columns
+from app.models.object import LunarObject
+from app.schemas.object import Object
+from app.services.spatial import BBox, filter_bbox, great_circle_distance, radius_bbox
+
+OBJECT_ORDER = (LunarObject.created_at, LunarObject.id)
+
+def _object_rows(db: Session, boxes: Optional[List[BBox]]) -> Query:
+    # Только поля схемы Object, без ORM-экземпляров
+    query = db.query(*schema_columns(LunarObject, Object))
+    if boxes:
+        query = filter_bbox(query, boxes)
+    return query
+
+def get_objects(db: Session, boxes: Optional[List[BBox]] = None, cursor: Optional[str] = None, limit: int = 100):
+    return paginate(_object_rows(db, boxes), OBJECT_ORDER, cursor=cursor, limit=limit, descending=True)
+
+def stream_objects(db: Session, boxes: Optional[List[BBox]] = None, cursor: Optional[str] = None) -> Query:
+    return keyset(_object_rows(db, boxes), OBJECT_ORDER, cursor, descending=True)
+
+def get_objects_near(db: Session, lat: float, lng: float, radius: float, limit: int = 100) -> List[Tuple[float, LunarObject]]:
+    # Index-backed envelope prefilter, then exact great-circle distance
+    candidates = filter_bbox(db.query(LunarObject), radius_bbox(lat, lng, radius)).all()
+    matches = []
+    for obj in candidates:
+        distance = great_circle_distance(lat, lng, obj.lat, obj.lng)
+        if distance <= radius:
+            matches.append((distance, obj))
+    matches.sort(key=lambda m: m[0])
+    return matches[:limit]
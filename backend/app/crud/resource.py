@@ -1,3 +1,4 @@
+from typing import Dict, List
 from sqlalchemy.orm import Session
 from app.models.resource import Resource
 from app.schemas.resource import ResourceCreate, ResourceUpdate
@@ -23,4 +24,13 @@ def update_resource(db: Session, resource_id: int, resource: ResourceUpdate):
         setattr(db_resource, field, value)
     db.commit()
     db.refresh(db_resource)
-    return db_resource
\ No newline at end of file
+    return db_resource
+
+def set_resource_statuses(db: Session, statuses: Dict[str, str]) -> List[str]:
+    """Update Resource.status; returns the names that changed. The caller commits"""
+    changed = []
+    for resource in db.query(Resource).filter(Resource.name.in_(list(statuses))):
+        if resource.status != statuses[resource.name]:
+            resource.status = statuses[resource.name]
+            changed.append(resource.name)
+    return changed
\ No newline at end of file
@@ -0,0 +1,74 @@
+from datetime import datetime
+from typing import Dict, Tuple
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from app.models.resource import Resource
+from app.models.telemetry import ResourceRollup
+
+def upsert_rollups(db: Session, resource: str, resolution: int, buckets):
+    """Merge bucket aggregates into existing rows; the caller commits"""
+    rows = [
+        {
+            "resource": resource,
+            "resolution": resolution,
+            "bucket_start": datetime.utcfromtimestamp(start),
+            "min": float(lo),
+            "max": float(hi),
+            "sum": float(total),
+            "count": int(count),
+        }
+        for start, lo, hi, total, count in zip(*buckets)
+    ]
+    if not rows:
+        return
+    if db.get_bind().dialect.name == "postgresql":
+        # Несколько воркеров пишут в одни корзины — слияние атомарно в ON CONFLICT
+        stmt = pg_insert(ResourceRollup).values(rows)
+        db.execute(stmt.on_conflict_do_update(
+            constraint="uq_resource_rollups_bucket",
+            set_={
+                "min": func.least(ResourceRollup.min, stmt.excluded.min),
+                "max": func.greatest(ResourceRollup.max, stmt.excluded.max),
+                "sum": ResourceRollup.sum + stmt.excluded.sum,
+                "count": ResourceRollup.count + stmt.excluded.count,
+            },
+        ))
+        return
+    existing = {
+        r.bucket_start: r
+        for r in db.query(ResourceRollup).filter(
+            ResourceRollup.resource == resource,
+            ResourceRollup.resolution == resolution,
+            ResourceRollup.bucket_start.in_([row["bucket_start"] for row in rows]),
+        )
+    }
+    for row in rows:
+        current = existing.get(row["bucket_start"])
+        if current is None:
+            db.add(ResourceRollup(**row))
+            continue
+        current.min = min(current.min, row["min"])
+        current.max = max(current.max, row["max"])
+        current.sum += row["sum"]
+        current.count += row["count"]
+
+def get_rollups(db: Session, resource: str, resolution: int, start: datetime, end: datetime):
+    return (
+        db.query(ResourceRollup)
+        .filter(
+            ResourceRollup.resource == resource,
+            ResourceRollup.resolution == resolution,
+            ResourceRollup.bucket_start >= start,
+            ResourceRollup.bucket_start < end,
+        )
+        .order_by(ResourceRollup.bucket_start)
+        .all()
+    )
+
+def set_resource_levels(db: Session, levels: Dict[str, Tuple[datetime, float]]):
+    """Store the latest reading as Resource.current_level; the caller commits"""
+    for resource in db.query(Resource).filter(Resource.name.in_(list(levels))):
+        at, level = levels[resource.name]
+        resource.current_level = level
+        resource.last_updated = at
@@ -0,0 +1,43 @@
+import uuid
+from sqlalchemy.orm import Session
+from app.models.upload import UploadSession
+from app.schemas.upload import UploadSessionCreate
+
+def create_upload_session(db: Session, session: UploadSessionCreate, user_id: int, chunk_size: int):
+    db_session = UploadSession(
+        id=str(uuid.uuid4()),
+        name=session.name,
+        description=session.description,
+        file_type=session.file_type,
+        is_public=session.is_public,
+        total_size=session.total_size,
+        chunk_size=chunk_size,
+        created_by=user_id
+    )
+    db.add(db_session)
+    db.commit()
+    db.refresh(db_session)
+    return db_session
+
+def get_upload_session(db: Session, session_id: str, user_id: int):
+    return db.query(UploadSession).filter(
+        UploadSession.id == session_id,
+        UploadSession.created_by == user_id
+    ).first()
+
+def claim_upload_session(db: Session, session_id: str):
+    """Atomically move an active session to 'finalizing'; False if someone else did"""
+    updated = db.query(UploadSession).filter(
+        UploadSession.id == session_id,
+        UploadSession.status == "active"
+    ).update({UploadSession.status: "finalizing"}, synchronize_session=False)
+    db.commit()
+    return updated == 1
+
+def set_upload_status(db: Session, db_session: UploadSession, status: str, job_id: str = None):
+    db_session.status = status
+    if job_id is not None:
+        db_session.job_id = job_id
+    db.commit()
+    db.refresh(db_session)
+    return db_session
@@ -1,16 +1,21 @@
-from sqlalchemy.orm import Session
+from typing import Optional
+from sqlalchemy.orm import Query, Session
+from app.crud.base import keyset, paginate, schema_columns
 from app.models.user import User
-from app.schemas.user import UserCreate
-from app.core.security import get_password_hash  # This is now safe
+from app.schemas.user import User as UserSchema, UserCreate
 
 def get_user_by_username(db: Session, username: str):
     return db.query(User).filter(User.username == username).first()
 
-def get_users(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(User).offset(skip).limit(limit).all()
+def get_users(db: Session, cursor: Optional[str] = None, limit: int = 100):
+    # Строки только с публичными полями: hashed_password не выбирается вовсе
+    return paginate(db.query(*schema_columns(User, UserSchema)), (User.id,), cursor=cursor, limit=limit)
 
-def create_user(db: Session, user: UserCreate):
-    hashed_password = get_password_hash(user.password)
+def stream_users(db: Session, cursor: Optional[str] = None) -> Query:
+    return keyset(db.query(*schema_columns(User, UserSchema)), (User.id,), cursor)
+
+def create_user(db: Session, user: UserCreate, hashed_password: str):
+    """The password is hashed by the caller, on ``password_hasher``'s pool"""
     db_user = User(
         username=user.username,
         hashed_password=hashed_password,
@@ -20,4 +25,10 @@ def create_user(db: Session, user: UserCreate):
     db.add(db_user)
     db.commit()
     db.refresh(db_user)
-    return db_user
\ No newline at end of file
+    return db_user
+
+def update_password_hash(db: Session, user: User, hashed_password: str):
+    user.hashed_password = hashed_password
+    db.add(user)
+    db.commit()
+    return user
\ No newline at end of file
@@ -0,0 +1,11 @@
+# Все модели, чтобы Base.metadata была полной для Alembic (autogenerate)
+from app.db.base_class import Base  # noqa: F401
+from app.models.content import MapContent  # noqa: F401
+from app.models.job import PublishJob  # noqa: F401
+from app.models.map import UserMap  # noqa: F401
+from app.models.module import Module  # noqa: F401
+from app.models.object import LunarObject  # noqa: F401
+from app.models.resource import Resource  # noqa: F401
+from app.models.telemetry import ResourceRollup  # noqa: F401
+from app.models.upload import UploadSession  # noqa: F401
+from app.models.user import User  # noqa: F401
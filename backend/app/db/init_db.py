@@ -1,5 +1,3 @@
-from app.db.base_class import Base
-from app.db.session import engine
 from app.models.user import User
 from app.models.resource import Resource
 from app.models.object import LunarObject
@@ -7,9 +5,24 @@ from app.core.security import get_password_hash
 import uuid
 from datetime import datetime
 
+# Схемой управляют миграции Alembic (alembic/versions); эти индексы создают они же,
+# а строки здесь нужны бенчмаркам, которые сами создают таблицы
+
+# GiST over the (lng, lat) point, so bbox/radius queries on objects use the index
+# without a separate geometry column; IF NOT EXISTS also covers existing tables
+OBJECT_LOCATION_INDEX = (
+    "CREATE INDEX IF NOT EXISTS ix_lunar_objects_location ON lunar_objects "
+    "USING gist (ST_SetSRID(ST_MakePoint(lng, lat), 4326))"
+)
+
+# KNN (<->) and envelope (&&) queries on modules; geoalchemy creates this index
+# with new tables, the statement covers tables created before it did
+MODULE_LOCATION_INDEX = (
+    "CREATE INDEX IF NOT EXISTS idx_modules_location ON modules USING gist (location)"
+)
+
 def init_db(db):
-    Base.metadata.create_all(bind=engine)
-    
+    """Seed data for a migrated database (see app.initial_data)"""
     # Инициализация администратора
     if not db.query(User).filter(User.email == "admin@lunar.com").first():
         user = User(
@@ -0,0 +1,56 @@
+"""Apply schema migrations: ``python -m app.db.migrate``, once per deploy"""
+import logging
+import os
+from functools import lru_cache
+from typing import Optional
+
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import inspect, text
+
+from app.db.session import engine
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Схема, которую create_all создавал до появления миграций
+BASELINE = "0001"
+# Несколько реплик могут запустить миграции одновременно
+MIGRATION_LOCK_ID = 0x6C756E6172
+
+
+def alembic_config(connection=None) -> Config:
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "alembic"))
+    if connection is not None:
+        config.attributes["connection"] = connection
+    return config
+
+
+@lru_cache()
+def head_revision() -> str:
+    return ScriptDirectory.from_config(alembic_config()).get_current_head()
+
+
+def current_revision(connection) -> Optional[str]:
+    return MigrationContext.configure(connection).get_current_revision()
+
+
+def upgrade():
+    """Upgrade to head. A database created by create_all before migrations
+    existed (tables but no alembic_version) is stamped as the baseline first."""
+    with engine.begin() as connection:
+        if connection.dialect.name == "postgresql":
+            connection.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": MIGRATION_LOCK_ID})
+        config = alembic_config(connection)
+        if current_revision(connection) is None and inspect(connection).has_table("users"):
+            logger.info("Existing schema without migration history, stamping %s", BASELINE)
+            command.stamp(config, BASELINE)
+        command.upgrade(config, "head")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    upgrade()
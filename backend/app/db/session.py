@@ -1,13 +1,42 @@
+from typing import Any, Callable, Optional
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from starlette.concurrency import run_in_threadpool
 from app.core.config import settings
 
 SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+
+def _engine_options(url: str) -> dict:
+    # SQLite (tests, local runs) has no QueuePool to tune; sessions move
+    # between threadpool threads, so the same-thread check is off
+    if make_url(url).get_backend_name() == "sqlite":
+        return {"connect_args": {"check_same_thread": False}}
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **_engine_options(SQLALCHEMY_DATABASE_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = None
+AsyncSessionLocal = None
+if settings.DB_ASYNC:
+    ASYNC_DATABASE_URL = str(make_url(SQLALCHEMY_DATABASE_URL).set(drivername="postgresql+asyncpg"))
+    async_engine = create_async_engine(ASYNC_DATABASE_URL, **_engine_options(ASYNC_DATABASE_URL))
+    # Объекты читаются после commit вне greenlet, поэтому без expire
+    AsyncSessionLocal = sessionmaker(
+        async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+    )
+
 Base = declarative_base()
 
 def get_db():
@@ -15,4 +44,41 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+async def get_async_db():
+    """Session for ``async def`` endpoints: an AsyncSession on asyncpg when
+    DB_ASYNC is on, the regular sync Session otherwise. Use with run_db()."""
+    if AsyncSessionLocal is None:
+        db = await run_in_threadpool(SessionLocal)
+        try:
+            yield db
+        finally:
+            await run_in_threadpool(db.close)
+        return
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def run_db(db, fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run sync ORM code (crud functions, CRUDBase methods) against either
+    kind of session: on the event loop via run_sync for an AsyncSession,
+    in the threadpool for a sync Session."""
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(fn, db, *args, **kwargs)
+
+
+def pool_status(bind=None) -> Optional[dict]:
+    """Checkout counters of a QueuePool (None for pools without them)"""
+    pool = (bind or engine).pool
+    if not hasattr(pool, "checkedout"):
+        return None
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": pool.overflow(),
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+    }
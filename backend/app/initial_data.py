@@ -0,0 +1,22 @@
+"""Seed the admin user, resources and sample objects: ``python -m app.initial_data``.
+Run after migrations; rows that already exist are left alone."""
+import logging
+
+from app.db.init_db import init_db
+from app.db.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+def main():
+    db = SessionLocal()
+    try:
+        init_db(db)
+    finally:
+        db.close()
+    logger.info("Initial data created")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
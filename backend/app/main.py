@@ -1,16 +1,29 @@
+# Первым: отсчет времени импорта воркера начинается здесь
+from app.core.lifecycle import FirstRequestMiddleware, lifecycle
+
+import asyncio
+
 from fastapi import FastAPI, Depends, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from sqlalchemy.orm import Session
 
 from app.api.v1.api import api_router
+from app.core.compression import CompressionMiddleware
 from app.core.config import settings
-from app.db.session import SessionLocal
-from app.db.init_db import init_db
+from app.services.conflicts import conflict_index
+from app.services.events import event_broker
+from app.services.forecast import forecaster
+from app.services.geoserver import geoserver
+from app.services.hashing import password_hasher
+from app.services.raster_stats import raster_stats
+from app.services.terrain import terrain
+from app.services.jobs import publish_queue
+from app.services.telemetry import telemetry_store
+from app.services.tile_cache import tile_cache
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
-    max_upload_size=50 * 1024 * 1024 * 1024  # 50GB
+    max_upload_size=settings.MAX_UPLOAD_SIZE
 )   
 
 # Настройка CORS
@@ -20,19 +33,46 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
-    expose_headers=["Content-Disposition"]
+    expose_headers=["Content-Disposition", "ETag"]
 )
 
+# Сжатие JSON/NDJSON-ответов, в том числе потоковых
+app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MINIMUM_SIZE)
+
+# Учет первого ответа воркера (для /health)
+app.add_middleware(FirstRequestMiddleware)
+
 
 # Подключение API роутеров
 app.include_router(api_router, prefix="/api/v1")
 
-# Инициализация базы данных
+# Схему создают миграции (python -m app.db.migrate), данные — python -m app.initial_data;
+# воркер при старте в базу не пишет
 @app.on_event("startup")
-def on_startup():
-    db = SessionLocal()
-    init_db(db)
-    db.close()
+async def start_background_services():
+    await publish_queue.start()
+    await telemetry_store.start()
+    await event_broker.start()
+    await forecaster.start()
+    await conflict_index.start()
+    # Индекс дискового кэша тайлов строится в фоне: старт воркера его не ждет
+    asyncio.ensure_future(tile_cache.load_index())
+    lifecycle.mark_started()
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    lifecycle.stopping = True
+    await conflict_index.stop()
+    await forecaster.stop()
+    await event_broker.stop()
+    await publish_queue.stop()
+    await telemetry_store.stop()
+    await geoserver.close()
+    password_hasher.shutdown()
+    raster_stats.shutdown()
+    terrain.shutdown()
+
+lifecycle.mark_imported()
 
 if __name__ == "__main__":
     import uvicorn
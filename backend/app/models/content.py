@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, JSON
+from sqlalchemy.sql import func
+from app.db.base_class import Base
+
+class MapContent(Base):
+    """One stored and published upload, shared by every UserMap with the same bytes"""
+    __tablename__ = "map_contents"
+
+    sha256 = Column(String, primary_key=True)
+    file_type = Column(String, nullable=False)
+    status = Column(String, nullable=False, default="publishing")  # 'publishing', 'published', 'failed', 'deleting'
+    layer_name = Column(String)
+    size = Column(BigInteger)
+    raster_layout = Column(JSON)
+    raster_stats = Column(JSON)
+    ref_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
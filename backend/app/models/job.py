@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Boolean, JSON
+from sqlalchemy.sql import func
+from app.db.base_class import Base
+
+class PublishJob(Base):
+    __tablename__ = "publish_jobs"
+
+    id = Column(String, primary_key=True, index=True)
+    status = Column(String, nullable=False, default="queued", index=True)  # 'queued', 'rendering', 'storing', 'converting', 'computing_stats', 'publishing', 'configuring_srs', 'done', 'failed'
+    progress = Column(Float, nullable=False, default=0.0)
+    error = Column(String)
+    file_path = Column(String, nullable=False)
+    file_type = Column(String, nullable=False)
+    content_hash = Column(String)
+    name = Column(String, nullable=False)
+    description = Column(String)
+    is_public = Column(Boolean, default=False)
+    map_id = Column(Integer, ForeignKey("user_maps.id"))
+    # Производные слои (slope, aspect, hillshade) рендерятся из исходной карты перед публикацией
+    source_map_id = Column(Integer, ForeignKey("user_maps.id", ondelete="SET NULL"))
+    derivative = Column(String)
+    derivative_params = Column(JSON)
+    created_by = Column(Integer, ForeignKey("users.id"))
+    # Воркер, захвативший задачу, и его последний heartbeat: по ним другие
+    # процессы отличают задачи упавшего воркера от выполняющихся
+    owner = Column(String)
+    heartbeat_at = Column(DateTime(timezone=True))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -1,9 +1,14 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean 
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, JSON, Index
+from sqlalchemy.orm import deferred
 from sqlalchemy.sql import func
 from app.db.base_class import Base
 
 class UserMap(Base):
     __tablename__ = "user_maps"
+    __table_args__ = (
+        # Keyset pagination of the map list
+        Index("ix_user_maps_created_at_id", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
@@ -12,4 +17,8 @@ class UserMap(Base):
     file_type = Column(String, nullable=False)  # 'geotiff', 'shapefile', etc.
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     created_by = Column(Integer, ForeignKey("users.id"))
-    is_public = Column(Boolean, default=False)
\ No newline at end of file
+    is_public = Column(Boolean, default=False)
+    raster_layout = Column(JSON)  # tiling/overviews/compression of the published GeoTIFF
+    # Per-band statistics and histograms; large, so loaded only when asked for
+    raster_stats = deferred(Column(JSON))
+    content_hash = Column(String, ForeignKey("map_contents.sha256"), index=True)  # SHA-256 of the uploaded bytes
@@ -1,14 +1,26 @@
-from sqlalchemy import Column, Integer, String, Float, JSON
+from sqlalchemy import Column, Integer, String, Float, JSON, DateTime, Index, func
+from sqlalchemy.orm import column_property
 from geoalchemy2 import Geometry
 from app.db.base_class import Base
 
 class Module(Base):
     __tablename__ = "modules"
+    __table_args__ = (
+        # Keyset pagination of the module list
+        Index("ix_modules_created_at_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True, nullable=False)
     module_type = Column(String, nullable=False)
     area = Column(Float, nullable=False)
+    # GiST-индекс idx_modules_location создают миграции (alembic/versions)
     location = Column(Geometry('POINT', srid=4326))
     status = Column(String, default="active")
-    properties = Column(JSON, default={})
\ No newline at end of file
+    properties = Column(JSON, default={})
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    # Координаты точки для ответов API, без разбора WKB на стороне Python
+    lat = column_property(func.ST_Y(location))
+    lng = column_property(func.ST_X(location))
@@ -1,8 +1,14 @@
-from sqlalchemy import Column, String, Float, DateTime
+from sqlalchemy import Column, String, Float, DateTime, Index
 from app.db.base_class import Base
 
 class LunarObject(Base):
     __tablename__ = "lunar_objects"
+    __table_args__ = (
+        # Spatial queries on non-PostGIS databases; PostGIS gets a GiST index (see alembic/versions)
+        Index("ix_lunar_objects_lat_lng", "lat", "lng"),
+        # Keyset pagination of the object list
+        Index("ix_lunar_objects_created_at_id", "created_at", "id"),
+    )
 
     id = Column(String, primary_key=True, index=True)
     type = Column(String, nullable=False)
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, UniqueConstraint
+from app.db.base_class import Base
+
+class ResourceRollup(Base):
+    __tablename__ = "resource_rollups"
+    __table_args__ = (
+        UniqueConstraint("resource", "resolution", "bucket_start", name="uq_resource_rollups_bucket"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    resource = Column(String, nullable=False)  # 'energy', 'water', 'oxygen', 'food'
+    resolution = Column(Integer, nullable=False)  # bucket width, seconds
+    bucket_start = Column(DateTime, nullable=False)  # UTC
+    min = Column(Float, nullable=False)
+    max = Column(Float, nullable=False)
+    sum = Column(Float, nullable=False)
+    count = Column(Integer, nullable=False)
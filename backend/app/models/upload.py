@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, ForeignKey, Boolean
+from sqlalchemy.sql import func
+from app.db.base_class import Base
+
+class UploadSession(Base):
+    __tablename__ = "upload_sessions"
+
+    id = Column(String, primary_key=True, index=True)
+    name = Column(String, nullable=False)
+    description = Column(String)
+    file_type = Column(String, nullable=False)
+    is_public = Column(Boolean, default=False)
+    total_size = Column(BigInteger, nullable=False)
+    chunk_size = Column(BigInteger, nullable=False)
+    status = Column(String, default="active")  # 'active', 'finalizing', 'completed'
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_by = Column(Integer, ForeignKey("users.id"))
+    job_id = Column(String, ForeignKey("publish_jobs.id"))
+
+    @property
+    def total_chunks(self):
+        return max(1, -(-self.total_size // self.chunk_size))
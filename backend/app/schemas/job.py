@@ -0,0 +1,20 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional
+
+class PublishJob(BaseModel):
+    id: str
+    status: str
+    progress: float
+    error: Optional[str] = None
+    name: str
+    file_type: str
+    content_hash: Optional[str] = None
+    map_id: Optional[int] = None
+    source_map_id: Optional[int] = None
+    derivative: Optional[str] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
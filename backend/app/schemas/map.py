@@ -1,6 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, conlist
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Any, Dict
 
 class MapBase(BaseModel):
     name: str
@@ -19,6 +19,60 @@ class Map(MapBase):
     created_at: datetime
     created_by: int
     file_path: str
+    raster_layout: Optional[Dict[str, Any]] = None
+    content_hash: Optional[str] = None
 
     class Config:
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
+
+class Histogram(BaseModel):
+    min: float
+    max: float
+    counts: List[int]
+
+class BandStats(BaseModel):
+    band: int
+    data_type: str
+    nodata: Optional[float] = None
+    valid_count: int
+    nodata_count: int
+    min: Optional[float] = None
+    max: Optional[float] = None
+    mean: Optional[float] = None
+    std: Optional[float] = None
+    percentiles: Dict[str, float] = {}
+    histogram: Optional[Histogram] = None
+
+class RasterStats(BaseModel):
+    width: int
+    height: int
+    bands: List[BandStats]
+
+class TerrainLayerCreate(BaseModel):
+    name: Optional[str] = None
+    description: Optional[str] = None
+    is_public: bool = False
+    z_factor: float = Field(1.0, gt=0)
+    azimuth: float = Field(315.0, ge=0, le=360)
+    altitude: float = Field(45.0, ge=0, le=90)
+
+# [lng, lat]; не Tuple: его схему OpenAPI-модель FastAPI 0.68 не принимает
+LngLat = conlist(float, min_items=2, max_items=2)
+
+class ElevationSample(BaseModel):
+    elevations: List[Optional[float]]
+
+class ProfileRequest(BaseModel):
+    line: List[LngLat]
+    step: float
+    band: int = 1
+
+class ElevationProfile(BaseModel):
+    length: float
+    distances: List[float]
+    points: List[LngLat]
+    elevations: List[Optional[float]]
+    min: Optional[float] = None
+    max: Optional[float] = None
+    ascent: float
+    descent: float
@@ -1,12 +1,20 @@
 from datetime import datetime
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field, root_validator
+from typing import List, Optional
 
 class ModuleBase(BaseModel):
     name: str
     module_type: str
     area: float
     status: Optional[str] = "active"
+    lat: Optional[float] = Field(None, ge=-90, le=90)
+    lng: Optional[float] = Field(None, ge=-180, le=180)
+
+    @root_validator(skip_on_failure=True)
+    def check_location(cls, values):
+        if (values.get("lat") is None) != (values.get("lng") is None):
+            raise ValueError("lat and lng must be given together")
+        return values
 
 class ModuleCreate(ModuleBase):
     properties: Optional[dict] = {}
@@ -20,4 +28,17 @@ class Module(ModuleBase):
     updated_at: datetime
 
     class Config:
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
+
+class ModuleWithDistance(Module):
+    distance: float  # metres, great-circle on the lunar sphere
+
+class NearestPoint(BaseModel):
+    lat: float = Field(..., ge=-90, le=90)
+    lng: float = Field(..., ge=-180, le=180)
+
+class NearestModulesRequest(BaseModel):
+    points: List[NearestPoint]
+    k: int = Field(1, gt=0, le=100)
+    module_type: Optional[str] = None
+    status: Optional[str] = None
@@ -17,4 +17,16 @@ class Object(ObjectBase):
     created_at: datetime
 
     class Config:
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
+
+class ObjectWithDistance(Object):
+    distance: float  # metres, great-circle on the lunar sphere
+
+class ZoneConflict(BaseModel):
+    id: str
+    distance: float
+
+class ConflictPair(BaseModel):
+    first_id: str
+    second_id: str
+    distance: float
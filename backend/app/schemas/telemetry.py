@@ -0,0 +1,53 @@
+from pydantic import BaseModel, conlist
+from datetime import datetime
+from typing import List, Literal, Optional
+
+ResourceName = Literal["energy", "water", "oxygen", "food"]
+
+class Reading(BaseModel):
+    resource: ResourceName
+    value: float
+    ts: Optional[datetime] = None  # defaults to the time of receipt
+
+class TelemetryBatch(BaseModel):
+    readings: conlist(Reading, min_items=1, max_items=100000)
+
+class TelemetryAccepted(BaseModel):
+    accepted: int
+
+class TelemetryPoint(BaseModel):
+    ts: datetime
+    min: float
+    max: float
+    avg: float
+    count: int
+
+class TelemetrySeries(BaseModel):
+    resource: ResourceName
+    resolution: int
+    source: str  # 'raw' or 'rollup_<seconds>'
+    points: List[TelemetryPoint]
+
+class ResourceForecast(BaseModel):
+    resource: ResourceName
+    level: float
+    capacity: float
+    unit: str
+    rate_per_hour: Optional[float]  # negative while the resource is being consumed
+    time_to_empty_hours: Optional[float]
+    time_to_capacity_hours: Optional[float]
+    status: str  # 'normal', 'warning', 'critical', 'full'
+    samples: int
+
+class ResourceAlert(BaseModel):
+    resource: ResourceName
+    severity: str
+    level_fraction: float
+    time_to_empty_hours: Optional[float]
+    time_to_capacity_hours: Optional[float]
+
+class Forecast(BaseModel):
+    computed_at: datetime
+    window_seconds: float
+    resources: List[ResourceForecast]
+    alerts: List[ResourceAlert]
@@ -0,0 +1,35 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional, List
+
+class UploadSessionCreate(BaseModel):
+    name: str
+    file_type: str
+    description: Optional[str] = None
+    is_public: bool = False
+    total_size: int
+    chunk_size: Optional[int] = None
+
+class UploadSession(BaseModel):
+    id: str
+    name: str
+    file_type: str
+    total_size: int
+    chunk_size: int
+    total_chunks: int
+    status: str
+    created_at: datetime
+    job_id: Optional[str] = None
+
+    class Config:
+        orm_mode = True
+
+class UploadSessionStatus(UploadSession):
+    received_chunks: List[int]
+    missing_chunks: List[int]
+    received_ranges: List[List[int]]  # [start, end) byte ranges
+
+class ChunkReceipt(BaseModel):
+    index: int
+    size: int
+    sha256: str
@@ -0,0 +1,284 @@
+# backend/app/services/conflicts.py
+import asyncio
+import logging
+import math
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.object import LunarObject
+from app.services.spatial import MOON_RADIUS_M, great_circle_distance, radius_bbox
+
+logger = logging.getLogger(__name__)
+
+Cell = Tuple[int, int]
+
+# Смещения соседних ячеек в 3D-сетке (включая саму ячейку)
+_NEIGHBOUR_OFFSETS = [(dx, dy, dz) for dx in (-1, 0, 1) for dy in (-1, 0, 1) for dz in (-1, 0, 1)]
+
+
+def _haversine(lat1, lng1, lat2, lng2):
+    """Vectorized great-circle distance on the lunar sphere, in metres"""
+    phi1, phi2 = np.radians(lat1), np.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = np.radians(lng2 - lng1)
+    a = np.sin(dphi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlmb / 2) ** 2
+    return 2 * MOON_RADIUS_M * np.arcsin(np.minimum(1.0, np.sqrt(a)))
+
+
+def _cell_keys(cells: np.ndarray) -> np.ndarray:
+    # 21 бит на ось со смещением: хватает для ячеек от ~2 м на сфере Луны
+    shifted = cells + (1 << 20)
+    return (shifted[:, 0] << 42) | (shifted[:, 1] << 21) | shifted[:, 2]
+
+
+def overlapping_pairs(lat: np.ndarray, lng: np.ndarray, radius: np.ndarray):
+    """All index pairs (i < j) whose restriction zones overlap.
+
+    Points are bucketed into a 3D grid on the lunar sphere with cells as large
+    as the widest possible overlap, so every overlapping pair lies in
+    neighbouring cells; candidates from the 27 neighbour offsets are expanded
+    with searchsorted/repeat and filtered by great-circle distance, all in
+    NumPy.
+    """
+    n = len(lat)
+    empty = np.empty(0, dtype=np.int64)
+    if n < 2:
+        return empty, empty, np.empty(0)
+
+    phi, lmb = np.radians(lat), np.radians(lng)
+    xyz = MOON_RADIUS_M * np.column_stack((np.cos(phi) * np.cos(lmb), np.cos(phi) * np.sin(lmb), np.sin(phi)))
+    cell_size = max(2 * float(radius.max()), 10.0)
+    cells = np.floor(xyz / cell_size).astype(np.int64)
+
+    keys = _cell_keys(cells)
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    positions = np.arange(n)
+
+    left, right = [], []
+    for dx, dy, dz in _NEIGHBOUR_OFFSETS:
+        # Ключ линеен по смещению, так что ключи соседей тоже отсортированы
+        neighbour_keys = sorted_keys + ((dx << 42) + (dy << 21) + dz)
+        lo = np.searchsorted(sorted_keys, neighbour_keys, side="left")
+        hi = np.searchsorted(sorted_keys, neighbour_keys, side="right")
+        counts = hi - lo
+        total = int(counts.sum())
+        if total == 0:
+            continue
+        i_pos = np.repeat(positions, counts)
+        j_pos = np.arange(total) + np.repeat(lo - (np.cumsum(counts) - counts), counts)
+        i_idx, j_idx = order[i_pos], order[j_pos]
+        keep = i_idx < j_idx
+        left.append(i_idx[keep])
+        right.append(j_idx[keep])
+
+    if not left:
+        return empty, empty, np.empty(0)
+    i_idx, j_idx = np.concatenate(left), np.concatenate(right)
+    distance = _haversine(lat[i_idx], lng[i_idx], lat[j_idx], lng[j_idx])
+    hit = distance < radius[i_idx] + radius[j_idx]
+    return i_idx[hit], j_idx[hit], distance[hit]
+
+
+class ConflictIndex:
+    """In-memory grid index over object restriction zones.
+
+    Loaded from the database in a background thread at startup and kept up
+    to date by the object endpoints. Full rebuilds (after a bulk import, and
+    every ``refresh_seconds`` to pick up other workers' writes, since every
+    worker process holds its own copy) also run in the background; queries
+    keep using the current index until the new one is swapped in.
+    """
+
+    def __init__(self, cell_deg: float, refresh_seconds: float):
+        self.cell_deg = cell_deg
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.RLock()
+        self._ready = threading.Condition(self._lock)
+        self._objects: Dict[str, Tuple[float, float, float]] = {}
+        self._cells: Dict[Cell, Set[str]] = {}
+        self._max_radius = 0.0
+        self._loaded = False
+        self._rebuilding = False
+        self._stale = False
+        self._error: Optional[Exception] = None
+        # Изменения, пришедшие во время пересборки: применяются к новому индексу
+        self._pending: Optional[List[tuple]] = None
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"rebuilds": 0, "failed_rebuilds": 0}
+
+    def _cell(self, lat: float, lng: float) -> Cell:
+        return (math.floor(lat / self.cell_deg), math.floor(lng / self.cell_deg))
+
+    def ensure_loaded(self):
+        """Wait for the first load; later rebuilds never block callers"""
+        with self._ready:
+            while not self._loaded:
+                if not self._rebuilding:
+                    if self._error is not None:
+                        error, self._error = self._error, None
+                        raise RuntimeError(f"Conflict index is not loaded: {error}")
+                    self._start_rebuild()
+                self._ready.wait()
+
+    def invalidate(self):
+        """Rebuild from the database in the background, e.g. after a bulk import"""
+        with self._lock:
+            if self._rebuilding:
+                # Текущая пересборка могла прочитать таблицу до изменений
+                self._stale = True
+                return
+            self._start_rebuild()
+
+    def _start_rebuild(self):
+        self._rebuilding = True
+        self._stale = False
+        self._error = None
+        threading.Thread(target=self._rebuild, name="conflict-index", daemon=True).start()
+
+    def _rebuild(self):
+        while True:
+            try:
+                self._build()
+            except Exception as e:
+                logger.exception("Conflict index rebuild failed")
+                with self._ready:
+                    self.stats["failed_rebuilds"] += 1
+                    self._pending = None
+                    self._rebuilding = False
+                    self._error = e
+                    self._ready.notify_all()
+                return
+            with self._ready:
+                if not self._stale:
+                    self._rebuilding = False
+                    self._ready.notify_all()
+                    return
+                self._stale = False
+
+    def _build(self):
+        with self._lock:
+            self._pending = []
+        db = SessionLocal()
+        try:
+            rows = db.query(
+                LunarObject.id, LunarObject.lat, LunarObject.lng, LunarObject.restriction_radius
+            ).all()
+        finally:
+            db.close()
+        fresh = ConflictIndex(self.cell_deg, self.refresh_seconds)
+        for obj_id, lat, lng, radius in rows:
+            fresh._insert(obj_id, lat, lng, radius)
+        with self._lock:
+            self._objects, self._cells, self._max_radius = fresh._objects, fresh._cells, fresh._max_radius
+            for op in self._pending:
+                if op[0] == "upsert":
+                    self._discard(op[1])
+                    self._insert(*op[1:])
+                else:
+                    self._discard(op[1])
+            self._pending = None
+            self._loaded = True
+            self.stats["rebuilds"] += 1
+
+    def _insert(self, obj_id: str, lat: float, lng: float, radius: Optional[float]):
+        radius = radius if radius is not None else 0.0
+        self._objects[obj_id] = (lat, lng, radius)
+        self._cells.setdefault(self._cell(lat, lng), set()).add(obj_id)
+        self._max_radius = max(self._max_radius, radius)
+
+    def upsert(self, obj: LunarObject):
+        with self._lock:
+            self._discard(obj.id)
+            self._insert(obj.id, obj.lat, obj.lng, obj.restriction_radius)
+            if self._pending is not None:
+                self._pending.append(("upsert", obj.id, obj.lat, obj.lng, obj.restriction_radius))
+
+    def remove(self, obj_id: str):
+        with self._lock:
+            self._discard(obj_id)
+            if self._pending is not None:
+                self._pending.append(("remove", obj_id))
+
+    def _discard(self, obj_id: str):
+        old = self._objects.pop(obj_id, None)
+        if old is None:
+            return
+        cell = self._cell(old[0], old[1])
+        ids = self._cells.get(cell)
+        if ids is not None:
+            ids.discard(obj_id)
+            if not ids:
+                del self._cells[cell]
+
+    def _candidate_cells(self, lat: float, lng: float, search_radius: float):
+        for min_lng, min_lat, max_lng, max_lat in radius_bbox(lat, lng, search_radius):
+            lo_lat, lo_lng = self._cell(min_lat, min_lng)
+            hi_lat, hi_lng = self._cell(max_lat, max_lng)
+            if (hi_lat - lo_lat + 1) * (hi_lng - lo_lng + 1) > len(self._cells):
+                # Широкий охват (у полюсов) — дешевле пройти по непустым ячейкам
+                for cell in list(self._cells):
+                    if lo_lat <= cell[0] <= hi_lat and lo_lng <= cell[1] <= hi_lng:
+                        yield cell
+                continue
+            for cell_lat in range(lo_lat, hi_lat + 1):
+                for cell_lng in range(lo_lng, hi_lng + 1):
+                    yield (cell_lat, cell_lng)
+
+    def violations(self, lat: float, lng: float, exclude_id: Optional[str] = None) -> List[Tuple[str, float]]:
+        """Objects whose restriction zone contains the point (lat, lng)"""
+        with self._lock:
+            found = []
+            seen: Set[str] = set()
+            for cell in self._candidate_cells(lat, lng, self._max_radius):
+                for obj_id in self._cells.get(cell, ()):
+                    if obj_id == exclude_id or obj_id in seen:
+                        continue
+                    seen.add(obj_id)
+                    o_lat, o_lng, o_radius = self._objects[obj_id]
+                    distance = great_circle_distance(lat, lng, o_lat, o_lng)
+                    if distance < o_radius:
+                        found.append((obj_id, distance))
+            found.sort(key=lambda f: f[1])
+            return found
+
+    def all_conflicts(self) -> List[Tuple[str, str, float]]:
+        with self._lock:
+            ids = list(self._objects)
+            values = np.array([self._objects[i] for i in ids], dtype=np.float64).reshape(-1, 3)
+        i_idx, j_idx, distance = overlapping_pairs(values[:, 0], values[:, 1], values[:, 2])
+        return [(ids[i], ids[j], float(d)) for i, j, d in zip(i_idx, j_idx, distance)]
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.refresh_seconds)
+            self.invalidate()
+
+    async def start(self):
+        self.invalidate()
+        if self._task is None and self.refresh_seconds > 0:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                **self.stats,
+                "objects": len(self._objects),
+                "loaded": self._loaded,
+                "rebuilding": self._rebuilding,
+            }
+
+
+conflict_index = ConflictIndex(settings.CONFLICT_GRID_CELL_DEG, settings.CONFLICT_INDEX_REFRESH_SECONDS)
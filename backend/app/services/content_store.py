@@ -0,0 +1,115 @@
+# backend/app/services/content_store.py
+import os
+import shutil
+from typing import List, Tuple
+
+from app.core.config import settings
+from app.services.shapefile import SIDECAR_EXTENSIONS
+
+# (локальный файл, имя объекта внутри содержимого)
+ContentFile = Tuple[str, str]
+
+
+def content_files(file_path: str, file_type: str) -> List[ContentFile]:
+    """Local files making up an upload: the GeoTIFF or every shapefile sidecar"""
+    if file_type != "shapefile":
+        return [(file_path, f"data{os.path.splitext(file_path)[1]}")]
+    base_path = os.path.splitext(file_path)[0]
+    return [
+        (f"{base_path}{ext}", f"data{ext}")
+        for ext in SIDECAR_EXTENSIONS
+        if os.path.exists(f"{base_path}{ext}")
+    ]
+
+
+def content_key(sha256: str, name: str) -> str:
+    return f"{sha256[:2]}/{sha256}/{name}"
+
+
+class LocalContentStore:
+    """Content-addressed store on the local filesystem, for development and tests"""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, *key.split("/"))
+
+    def put(self, sha256: str, files: List[ContentFile]):
+        for path, name in files:
+            target = self._path(content_key(sha256, name))
+            if os.path.exists(target):
+                continue
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            tmp_path = f"{target}.tmp"
+            shutil.copyfile(path, tmp_path)
+            os.replace(tmp_path, target)
+
+    def delete(self, sha256: str):
+        shutil.rmtree(os.path.dirname(self._path(content_key(sha256, "data"))), ignore_errors=True)
+
+
+class MinioContentStore:
+    """Content-addressed store in a MinIO bucket; objects are streamed from
+    disk as multipart uploads, and ones already present are skipped."""
+
+    def __init__(self, endpoint: str, access_key: str, secret_key: str, bucket: str, secure: bool, part_size: int):
+        self.endpoint = endpoint
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.bucket = bucket
+        self.secure = secure
+        self.part_size = part_size
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            from minio import Minio
+
+            client = Minio(self.endpoint, access_key=self.access_key, secret_key=self.secret_key, secure=self.secure)
+            if not client.bucket_exists(self.bucket):
+                client.make_bucket(self.bucket)
+            self._client = client
+        return self._client
+
+    def _exists(self, key: str) -> bool:
+        from minio.error import S3Error
+
+        try:
+            self.client.stat_object(self.bucket, key)
+            return True
+        except S3Error as e:
+            if e.code in ("NoSuchKey", "NoSuchObject"):
+                return False
+            raise
+
+    def put(self, sha256: str, files: List[ContentFile]):
+        for path, name in files:
+            key = content_key(sha256, name)
+            if self._exists(key):
+                continue
+            self.client.fput_object(
+                self.bucket, key, path, part_size=self.part_size, metadata={"sha256": sha256}
+            )
+
+    def delete(self, sha256: str):
+        prefix = content_key(sha256, "")
+        for obj in self.client.list_objects(self.bucket, prefix=prefix, recursive=True):
+            self.client.remove_object(self.bucket, obj.object_name)
+
+
+def build_content_store():
+    if settings.CONTENT_STORE == "local":
+        return LocalContentStore(settings.CONTENT_STORE_PATH)
+    return MinioContentStore(
+        settings.MINIO_ENDPOINT,
+        settings.MINIO_ACCESS_KEY,
+        settings.MINIO_SECRET_KEY,
+        settings.MINIO_BUCKET,
+        settings.MINIO_SECURE,
+        settings.MINIO_PART_SIZE,
+    )
+
+
+content_store = build_content_store()
@@ -0,0 +1,243 @@
+# backend/app/services/elevation.py
+import math
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.raster import _gdal, _osr
+from app.services.spatial import MOON_RADIUS_M
+
+# (путь, mtime_ns, канал, bx, by)
+BlockKey = Tuple[str, int, int, int, int]
+
+
+class RasterInfo(NamedTuple):
+    width: int
+    height: int
+    block_x: int
+    block_y: int
+    inverse: Tuple[float, float, float, float, float, float]  # world -> pixel
+    nodata: Dict[int, float]
+    to_raster: Optional[Any]  # osr.CoordinateTransformation lng/lat -> SRS растра
+
+
+class BlockCache:
+    """LRU of decoded raster blocks, bounded by bytes and shared by all threads"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._blocks: "OrderedDict[BlockKey, np.ndarray]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, key: BlockKey, load: Callable[[], np.ndarray]) -> np.ndarray:
+        with self._lock:
+            block = self._blocks.get(key)
+            if block is not None:
+                self._blocks.move_to_end(key)
+                self.stats["hits"] += 1
+                return block
+            self.stats["misses"] += 1
+        # Чтение вне блокировки: другие потоки работают со своими блоками
+        block = load()
+        with self._lock:
+            if key not in self._blocks:
+                self._blocks[key] = block
+                self._bytes += block.nbytes
+            while self._bytes > self.max_bytes and len(self._blocks) > 1:
+                _, evicted = self._blocks.popitem(last=False)
+                self._bytes -= evicted.nbytes
+                self.stats["evictions"] += 1
+        return block
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "blocks": len(self._blocks),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hit_ratio": self.stats["hits"] / lookups if lookups else None,
+            }
+
+
+def _invert(gt) -> Tuple[float, float, float, float, float, float]:
+    # Обратное аффинное преобразование GDAL geotransform
+    det = gt[1] * gt[5] - gt[2] * gt[4]
+    if det == 0:
+        raise ValueError("Raster has a degenerate geotransform")
+    a, b = gt[5] / det, -gt[2] / det
+    d, e = -gt[4] / det, gt[1] / det
+    return (-a * gt[0] - b * gt[3], a, b, -d * gt[0] - e * gt[3], d, e)
+
+
+def _geographic_transform(wkt: str):
+    """Lng/lat -> raster coordinates for a projected raster. None when the
+    raster is geographic or has no SRS: its coordinates are lng/lat already."""
+    if not wkt:
+        return None
+    osr = _osr()
+    srs = osr.SpatialReference(wkt=wkt)
+    if srs.IsGeographic():
+        return None
+    if not srs.IsProjected():
+        raise ValueError("Raster coordinate system is neither geographic nor projected")
+    # Географическая СК того же тела (Луны), а не WGS84
+    geographic = srs.CloneGeogCS()
+    for ref in (srs, geographic):
+        ref.SetAxisMappingStrategy(osr.OAMS_TRADITIONAL_GIS_ORDER)
+    return osr.CoordinateTransformation(geographic, srs)
+
+
+class ElevationReader:
+    """Bilinear sampling of GeoTIFFs straight from disk.
+
+    Only the blocks the points fall in are read, through a shared LRU
+    block cache; GDAL handles and coordinate transformations are per thread
+    since neither is thread-safe. Blocking; call it from a worker thread.
+    """
+
+    def __init__(self, cache_bytes: int, max_open: int = 8):
+        self.cache = BlockCache(cache_bytes)
+        self.max_open = max_open
+        self._local = threading.local()
+
+    def _dataset(self, path: str, mtime: int):
+        handles = getattr(self._local, "handles", None)
+        if handles is None:
+            handles = self._local.handles = OrderedDict()
+        key = (path, mtime)
+        entry = handles.get(key)
+        if entry is None:
+            ds = _gdal().Open(path)
+            band = ds.GetRasterBand(1)
+            block_x, block_y = band.GetBlockSize()
+            info = RasterInfo(
+                width=ds.RasterXSize,
+                height=ds.RasterYSize,
+                block_x=block_x,
+                block_y=block_y,
+                inverse=_invert(ds.GetGeoTransform()),
+                nodata={
+                    i: ds.GetRasterBand(i).GetNoDataValue()
+                    for i in range(1, ds.RasterCount + 1)
+                },
+                to_raster=_geographic_transform(ds.GetProjection()),
+            )
+            entry = handles[key] = (ds, info)
+            while len(handles) > self.max_open:
+                handles.popitem(last=False)
+        handles.move_to_end(key)
+        return entry
+
+    def _read_block(self, ds, info: RasterInfo, band: int, bx: int, by: int) -> np.ndarray:
+        x, y = bx * info.block_x, by * info.block_y
+        w, h = min(info.block_x, info.width - x), min(info.block_y, info.height - y)
+        # Блоки хранятся в исходном типе: для Float32/Int16 это вдвое-вчетверо меньше памяти
+        return ds.GetRasterBand(band).ReadAsArray(x, y, w, h)
+
+    def sample(self, path: str, lng: np.ndarray, lat: np.ndarray, band: int = 1) -> np.ndarray:
+        """Elevations at geographic (lng, lat), transformed into the raster's
+        SRS if it is projected; NaN outside the raster and where every
+        neighbouring pixel is nodata"""
+        mtime = os.stat(path).st_mtime_ns
+        ds, info = self._dataset(path, mtime)
+        if band not in info.nodata:
+            raise ValueError(f"Raster has no band {band}")
+
+        x, y = lng, lat
+        if info.to_raster is not None and lng.size:
+            projected = np.asarray(
+                info.to_raster.TransformPoints(np.column_stack((lng, lat)).tolist()), dtype=np.float64
+            )
+            x, y = projected[:, 0], projected[:, 1]
+        c, a, b, f, d, e = info.inverse
+        # Центры пикселей в целых координатах; точки вне области проекции (inf) — снаружи
+        px = c + a * x + b * y - 0.5
+        py = f + d * x + e * y - 0.5
+        px[~np.isfinite(px)] = -1.0
+        py[~np.isfinite(py)] = -1.0
+        inside = (px >= -0.5) & (px <= info.width - 0.5) & (py >= -0.5) & (py <= info.height - 0.5)
+
+        x0 = np.floor(px)
+        y0 = np.floor(py)
+        tx = px - x0
+        ty = py - y0
+        x0 = x0.astype(np.int64)
+        y0 = y0.astype(np.int64)
+        # Четыре соседа (N, 4), прижатые к краям растра
+        ix = np.clip(np.stack([x0, x0 + 1, x0, x0 + 1], axis=1), 0, info.width - 1)
+        iy = np.clip(np.stack([y0, y0, y0 + 1, y0 + 1], axis=1), 0, info.height - 1)
+        weights = np.stack([(1 - tx) * (1 - ty), tx * (1 - ty), (1 - tx) * ty, tx * ty], axis=1)
+
+        ix, iy = ix[inside].ravel(), iy[inside].ravel()
+        values = np.full(ix.shape, np.nan)
+        if ix.size:
+            bx, by = ix // info.block_x, iy // info.block_y
+            blocks_per_row = -(-info.width // info.block_x)
+            keys = by * blocks_per_row + bx
+            order = np.argsort(keys, kind="stable")
+            unique, starts = np.unique(keys[order], return_index=True)
+            ends = np.append(starts[1:], order.size)
+            for key, start, end in zip(unique.tolist(), starts.tolist(), ends.tolist()):
+                block_y, block_x = divmod(key, blocks_per_row)
+                block = self.cache.get(
+                    (path, mtime, band, block_x, block_y),
+                    lambda: self._read_block(ds, info, band, block_x, block_y),
+                )
+                idx = order[start:end]
+                values[idx] = block[iy[idx] - block_y * info.block_y, ix[idx] - block_x * info.block_x]
+            nodata = info.nodata[band]
+            if nodata is not None:
+                values[values == nodata] = np.nan
+
+        # Соседи с nodata исключаются, веса остальных перенормируются
+        values = values.reshape(-1, 4)
+        w = np.where(np.isnan(values), 0.0, weights[inside])
+        total = w.sum(axis=1)
+        result = np.full(lng.shape, np.nan)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            result[inside] = np.where(total > 0, np.nansum(values * w, axis=1) / total, np.nan)
+        return result
+
+
+def densify(lng: np.ndarray, lat: np.ndarray, step: float, max_points: int):
+    """Points every ``step`` metres along the great circles of a polyline,
+    with the distance of each from the start"""
+    phi, lmb = np.radians(lat), np.radians(lng)
+    xyz = np.column_stack((np.cos(phi) * np.cos(lmb), np.cos(phi) * np.sin(lmb), np.sin(phi)))
+    angles = np.arccos(np.clip(np.einsum("ij,ij->i", xyz[:-1], xyz[1:]), -1.0, 1.0))
+    counts = np.maximum(np.ceil(angles * MOON_RADIUS_M / step).astype(np.int64), 1)
+    if int(counts.sum()) + 1 > max_points:
+        raise ValueError(f"Profile would have more than {max_points} samples; increase step")
+
+    points, distances = [], []
+    travelled = 0.0
+    for start, end, angle, n in zip(xyz[:-1], xyz[1:], angles, counts):
+        f = np.arange(n) / n
+        if angle < 1e-12:
+            segment = np.repeat(start[None, :], n, axis=0)
+        else:
+            # Сферическая интерполяция (slerp) по дуге большого круга
+            segment = (
+                np.sin((1 - f) * angle)[:, None] * start + np.sin(f * angle)[:, None] * end
+            ) / math.sin(angle)
+        points.append(segment)
+        distances.append(travelled + f * angle * MOON_RADIUS_M)
+        travelled += angle * MOON_RADIUS_M
+    points.append(xyz[-1:])
+    distances.append(np.array([travelled]))
+
+    xyz = np.concatenate(points)
+    out_lat = np.degrees(np.arcsin(np.clip(xyz[:, 2], -1.0, 1.0)))
+    out_lng = np.degrees(np.arctan2(xyz[:, 1], xyz[:, 0]))
+    return out_lng, out_lat, np.concatenate(distances)
+
+
+elevation_reader = ElevationReader(settings.ELEVATION_BLOCK_CACHE_BYTES)
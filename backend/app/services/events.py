@@ -0,0 +1,151 @@
+# backend/app/services/events.py
+import asyncio
+import json
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from fastapi.encoders import jsonable_encoder
+
+from app.core.config import settings
+from app.services.telemetry import telemetry_store
+
+logger = logging.getLogger(__name__)
+
+TOPICS = ("resources", "objects", "jobs")
+# Отправляется вместо отброшенных событий: клиент должен перечитать состояние по REST
+RESYNC = json.dumps({"topic": "*", "type": "resync"})
+
+
+class Subscriber:
+    """One push connection.
+
+    Pending events are keyed by (topic, key), so a newer event for the same
+    resource/object/job replaces an unsent one instead of queueing behind
+    it. When more than ``max_pending`` distinct keys pile up the backlog is
+    dropped and the client is told to resync.
+    """
+
+    def __init__(self, topics: Set[str], user_id: Optional[int], max_pending: int):
+        self.topics = topics
+        self.user_id = user_id
+        self.max_pending = max_pending
+        self._pending: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+        self._wakeup = asyncio.Event()
+        self._lagged = False
+
+    def offer(self, slot: Tuple[str, str], payload: str) -> bool:
+        """Queue a serialized event; True when it replaced an unsent one"""
+        coalesced = slot in self._pending
+        if not coalesced and len(self._pending) >= self.max_pending:
+            self._pending.clear()
+            self._lagged = True
+        else:
+            self._pending[slot] = payload
+        self._wakeup.set()
+        return coalesced
+
+    async def next_batch(self) -> List[str]:
+        await self._wakeup.wait()
+        self._wakeup.clear()
+        batch = list(self._pending.values())
+        self._pending.clear()
+        if self._lagged:
+            self._lagged = False
+            batch.insert(0, RESYNC)
+        return batch
+
+
+class EventBroker:
+    """In-process fan-out of change events to push subscribers.
+
+    ``publish`` may be called from sync endpoints in the threadpool; the
+    event is serialized once there and fanned out on the event loop. Only
+    subscribers of this worker process receive it.
+    """
+
+    def __init__(self, max_pending: int, resource_interval: float):
+        self.max_pending = max_pending
+        self.resource_interval = resource_interval
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._subscribers: Dict[str, Set[Subscriber]] = {topic: set() for topic in TOPICS}
+        self._resource_task: Optional[asyncio.Task] = None
+        self._last_levels: Dict[str, float] = {}
+        self.stats = {"published": 0, "delivered": 0, "coalesced": 0}
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(set().union(*self._subscribers.values()))
+
+    def subscribe(self, topics: Iterable[str], user_id: Optional[int] = None) -> Subscriber:
+        subscriber = Subscriber(set(topics), user_id, self.max_pending)
+        for topic in subscriber.topics:
+            self._subscribers[topic].add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        for topic in subscriber.topics:
+            self._subscribers[topic].discard(subscriber)
+
+    def publish(self, topic: str, key: Any, event_type: str, data: Any = None, user_id: Optional[int] = None):
+        """Send an event to the topic's subscribers; ``user_id`` limits it to
+        that user's connections"""
+        if self._loop is None or not self._subscribers[topic]:
+            return
+        payload = json.dumps(
+            {"topic": topic, "type": event_type, "key": key, "data": jsonable_encoder(data)},
+            ensure_ascii=False,
+        )
+        slot = (topic, str(key))
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._dispatch(topic, slot, payload, user_id)
+        else:
+            self._loop.call_soon_threadsafe(self._dispatch, topic, slot, payload, user_id)
+
+    def _dispatch(self, topic: str, slot: Tuple[str, str], payload: str, user_id: Optional[int]):
+        self.stats["published"] += 1
+        for subscriber in self._subscribers[topic]:
+            if user_id is not None and subscriber.user_id != user_id:
+                continue
+            if subscriber.offer(slot, payload):
+                self.stats["coalesced"] += 1
+            self.stats["delivered"] += 1
+
+    def publish_levels(self, levels: Dict[str, float]):
+        """Publish only the resources whose level changed since the last call"""
+        changed = {name: value for name, value in levels.items() if self._last_levels.get(name) != value}
+        if not changed:
+            return
+        self._last_levels.update(changed)
+        self.publish("resources", "levels", "changed", changed)
+
+    async def _resource_loop(self):
+        while True:
+            await asyncio.sleep(self.resource_interval)
+            if self._subscribers["resources"]:
+                self.publish_levels({name: value for name, (_, value) in telemetry_store.latest().items()})
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        if self._resource_task is None:
+            self._resource_task = asyncio.create_task(self._resource_loop())
+
+    async def stop(self):
+        if self._resource_task is not None:
+            self._resource_task.cancel()
+            try:
+                await self._resource_task
+            except asyncio.CancelledError:
+                pass
+            self._resource_task = None
+        self._loop = None
+
+    def snapshot(self) -> dict:
+        return {**self.stats, "subscribers": self.subscriber_count}
+
+
+event_broker = EventBroker(settings.EVENTS_MAX_PENDING, settings.EVENTS_RESOURCE_INTERVAL)
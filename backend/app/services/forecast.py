@@ -0,0 +1,216 @@
+# backend/app/services/forecast.py
+import asyncio
+import logging
+import math
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.crud.resource import get_resources, set_resource_statuses
+from app.db.session import SessionLocal
+from app.services.events import event_broker
+from app.services.telemetry import RESOURCES, telemetry_store
+
+logger = logging.getLogger(__name__)
+
+NORMAL, WARNING, CRITICAL, FULL = "normal", "warning", "critical", "full"
+
+
+# Шаг точек регрессии: поминутные средние
+BUCKET_SECONDS = 60
+
+
+class RunningFit:
+    """Least-squares sums over (t, y) points that can be added and removed.
+
+    Times are kept relative to ``origin`` so the sums stay small enough for
+    float64 to hold the slope accurately.
+    """
+
+    def __init__(self, origin: float):
+        self.origin = origin
+        self.n = 0
+        self.t = self.tt = self.y = self.ty = 0.0
+
+    def add(self, t: float, y: float, sign: int = 1):
+        t -= self.origin
+        self.n += sign
+        self.t += sign * t
+        self.tt += sign * t * t
+        self.y += sign * y
+        self.ty += sign * t * y
+
+    def remove(self, t: float, y: float):
+        self.add(t, y, -1)
+
+    def slope(self) -> float:
+        if self.n < 2:
+            return math.nan
+        denominator = self.n * self.tt - self.t * self.t
+        return (self.n * self.ty - self.t * self.y) / denominator if denominator > 0 else math.nan
+
+
+def classify(fraction: np.ndarray, to_empty: np.ndarray) -> List[str]:
+    critical = (fraction < settings.FORECAST_CRITICAL_FRACTION) | (to_empty < settings.FORECAST_CRITICAL_HOURS)
+    warning = (fraction < settings.FORECAST_WARNING_FRACTION) | (to_empty < settings.FORECAST_WARNING_HOURS)
+    full = fraction >= settings.FORECAST_FULL_FRACTION
+    return np.select([critical, warning, full], [CRITICAL, WARNING, FULL], NORMAL).tolist()
+
+
+class Forecaster:
+    """Depletion forecasts for base resources, updated incrementally.
+
+    Every refresh reads only the per-minute buckets that can still change
+    (the persisted rollups from a flush interval back, plus this worker's
+    unflushed readings), so readings ingested by other workers are picked
+    up too, and updates running least-squares sums per resource with them
+    and with the buckets leaving the window. Once per window the sums are
+    rebuilt from scratch, which also takes in late backfilled readings.
+    When no bucket and no current level changed, the cached result is
+    returned.
+    """
+
+    def __init__(self, window_seconds: float, interval: float):
+        self.window_seconds = window_seconds
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._origin: Optional[float] = None
+        self._watermark = 0.0
+        self._fits: Dict[str, RunningFit] = {}
+        # Учтенные в суммах точки: начало корзины -> (t, y)
+        self._points: Dict[str, Dict[float, Tuple[float, float]]] = {}
+        self._latest: Optional[dict] = None
+        self._result: Optional[dict] = None
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"recomputed": 0, "cached": 0, "resyncs": 0, "buckets_read": 0}
+
+    def _advance(self, db, now: float) -> bool:
+        """Bring the running sums up to ``now``; True if any point changed"""
+        start = now - self.window_seconds
+        # Пересборка раз в окно: с тех пор все учтенные при ней корзины уже вышли из окна
+        if self._origin is None or start - self._origin > self.window_seconds:
+            self._origin = start
+            self._fits = {name: RunningFit(start) for name in RESOURCES}
+            self._points = {name: {} for name in RESOURCES}
+            since = start
+            self.stats["resyncs"] += 1
+        else:
+            since = self._watermark
+        first = math.floor(start / BUCKET_SECONDS) * BUCKET_SECONDS
+        changed = since == start
+        for name in RESOURCES:
+            fit, points = self._fits[name], self._points[name]
+            for bucket in [b for b in points if b < first]:
+                fit.remove(*points.pop(bucket))
+                changed = True
+            _, _, buckets = telemetry_store.series(db, name, max(since, start), now, BUCKET_SECONDS)
+            self.stats["buckets_read"] += len(buckets.start)
+            for bucket, total, count in zip(buckets.start.tolist(), buckets.sum.tolist(), buckets.count.tolist()):
+                point = (bucket + BUCKET_SECONDS / 2, total / max(count, 1))
+                old = points.get(bucket)
+                if old == point:
+                    continue
+                if old is not None:
+                    fit.remove(*old)
+                fit.add(*point)
+                points[bucket] = point
+                changed = True
+        # Корзины других воркеров дописываются в базу до интервала сброса спустя
+        self._watermark = math.floor((now - telemetry_store.flush_seconds) / BUCKET_SECONDS) * BUCKET_SECONDS
+        return changed
+
+    def _compute(self, db, now: float, latest: dict) -> dict:
+        rates = np.array([self._fits[name].slope() for name in RESOURCES]) * 3600.0  # единиц в час
+
+        stored = {r.name: r for r in get_resources(db)}
+        levels = np.array([
+            latest[name][1] if name in latest else (stored[name].current_level if name in stored else np.nan)
+            for name in RESOURCES
+        ])
+        capacities = np.array([stored[name].capacity if name in stored else np.nan for name in RESOURCES])
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            fraction = levels / capacities
+            to_empty = np.where(rates < 0, levels / -rates, np.inf)
+            to_capacity = np.where(rates > 0, (capacities - levels) / rates, np.inf)
+        statuses = classify(fraction, to_empty)
+
+        resources, alerts = [], []
+        for i, name in enumerate(RESOURCES):
+            if name not in stored:
+                continue
+            item = {
+                "resource": name,
+                "level": float(levels[i]),
+                "capacity": float(capacities[i]),
+                "unit": stored[name].unit,
+                "rate_per_hour": None if np.isnan(rates[i]) else float(rates[i]),
+                "time_to_empty_hours": float(to_empty[i]) if np.isfinite(to_empty[i]) else None,
+                "time_to_capacity_hours": float(to_capacity[i]) if np.isfinite(to_capacity[i]) else None,
+                "status": statuses[i],
+                "samples": len(self._points[name]),
+            }
+            resources.append(item)
+            if statuses[i] != NORMAL:
+                alerts.append({
+                    "resource": name,
+                    "severity": statuses[i],
+                    "level_fraction": float(fraction[i]),
+                    "time_to_empty_hours": item["time_to_empty_hours"],
+                    "time_to_capacity_hours": item["time_to_capacity_hours"],
+                })
+
+        status_by_name = {item["resource"]: item["status"] for item in resources}
+        changed = set_resource_statuses(db, status_by_name)
+        db.commit()
+        for name in changed:
+            event_broker.publish("resources", f"status:{name}", "status", {"resource": name, "status": status_by_name[name]})
+        return {"computed_at": now, "window_seconds": self.window_seconds, "resources": resources, "alerts": alerts}
+
+    def refresh(self, db) -> dict:
+        with self._lock:
+            now = time.time()
+            changed = self._advance(db, now)
+            latest = telemetry_store.latest()
+            if self._result is not None and not changed and latest == self._latest:
+                self.stats["cached"] += 1
+                return self._result
+            self._result = self._compute(db, now, latest)
+            self._latest = latest
+            self.stats["recomputed"] += 1
+            return self._result
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await run_in_threadpool(self._refresh_once)
+            except Exception:
+                logger.exception("Resource forecast failed")
+
+    def _refresh_once(self):
+        db = SessionLocal()
+        try:
+            self.refresh(db)
+        finally:
+            db.close()
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+forecaster = Forecaster(settings.FORECAST_WINDOW_SECONDS, settings.FORECAST_INTERVAL)
@@ -0,0 +1,209 @@
+# backend/app/services/geoserver.py
+import asyncio
+import os
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Tuple
+
+import aiofiles
+import httpx
+
+from app.core.config import settings
+
+# Статусы, при которых запрос к GeoServer имеет смысл повторить
+RETRYABLE_STATUSES = {502, 503, 504}
+
+
+class GeoServerError(Exception):
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class GeoServerClient:
+    """Async client for the GeoServer REST API.
+
+    A single instance keeps a keep-alive connection pool for the whole
+    process; bodies of large uploads are streamed from disk.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        user: str,
+        password: str,
+        max_connections: int = 10,
+        timeout: float = 60.0,
+        connect_timeout: float = 10.0,
+        max_retries: int = 3,
+        retry_backoff: float = 0.5,
+        chunk_size: int = 1024 * 1024,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.auth = (user, password)
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.chunk_size = chunk_size
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                auth=self.auth,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+                timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+            )
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        *,
+        json: Any = None,
+        content_factory: Optional[Callable[[], AsyncIterator[bytes]]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        params: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+        rest: bool = True,
+    ) -> httpx.Response:
+        """Send a request, retrying transport errors and 502/503/504.
+
+        Streamed bodies are passed as a factory so every attempt gets a
+        fresh iterator. ``rest=False`` targets OGC services instead of the
+        REST API.
+        """
+        request_timeout = httpx.Timeout(
+            timeout if timeout is not None else self.timeout,
+            connect=self.connect_timeout,
+        )
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = await self.client.request(
+                    method,
+                    f"/rest{path}" if rest else path,
+                    json=json,
+                    content=content_factory() if content_factory else None,
+                    headers=headers,
+                    params=params,
+                    timeout=request_timeout,
+                )
+            except httpx.TransportError as e:
+                if attempt == self.max_retries:
+                    raise GeoServerError(f"GeoServer request failed: {e}")
+            else:
+                if response.status_code not in RETRYABLE_STATUSES or attempt == self.max_retries:
+                    return response
+            await asyncio.sleep(self.retry_backoff * 2 ** attempt)
+
+    async def request_ok(self, method: str, path: str, error: str, **kwargs) -> httpx.Response:
+        response = await self.request(method, path, **kwargs)
+        if response.is_error:
+            raise GeoServerError(f"{error}: {response.text}", response.status_code)
+        return response
+
+    def _file_stream(self, file_path: str) -> Callable[[], AsyncIterator[bytes]]:
+        async def stream() -> AsyncIterator[bytes]:
+            async with aiofiles.open(file_path, "rb") as f:
+                while chunk := await f.read(self.chunk_size):
+                    yield chunk
+
+        return stream
+
+    async def put_file(
+        self,
+        path: str,
+        file_path: str,
+        content_type: str,
+        error: str,
+        params: Optional[Dict[str, Any]] = None,
+    ) -> httpx.Response:
+        """Stream a file from disk as the body of a PUT."""
+        return await self.put_stream(
+            path, self._file_stream(file_path), os.path.getsize(file_path), content_type, error, params
+        )
+
+    async def put_stream(
+        self,
+        path: str,
+        content_factory: Callable[[], AsyncIterator[bytes]],
+        content_length: int,
+        content_type: str,
+        error: str,
+        params: Optional[Dict[str, Any]] = None,
+    ) -> httpx.Response:
+        """PUT a generated body of known length without buffering it."""
+        return await self.request_ok(
+            "PUT",
+            path,
+            error,
+            content_factory=content_factory,
+            headers={
+                "Content-type": content_type,
+                "Content-Length": str(content_length),
+            },
+            params=params,
+            timeout=settings.GEOSERVER_UPLOAD_TIMEOUT,
+        )
+
+    async def put_json(self, path: str, payload: dict, error: str) -> httpx.Response:
+        return await self.request_ok("PUT", path, error, json=payload)
+
+    async def delete(self, path: str, error: str, params: Optional[Dict[str, Any]] = None) -> httpx.Response:
+        return await self.request_ok("DELETE", path, error, params=params)
+
+    async def get_map(
+        self,
+        workspace: str,
+        layer: str,
+        bbox: Tuple[float, float, float, float],
+        srs: str = "EPSG:3857",
+        size: int = 256,
+        image_format: str = "image/png",
+    ) -> bytes:
+        """Render one WMS GetMap image"""
+        response = await self.request_ok(
+            "GET",
+            f"/{workspace}/wms",
+            "WMS GetMap failed",
+            params={
+                "service": "WMS",
+                "version": "1.1.1",
+                "request": "GetMap",
+                "layers": f"{workspace}:{layer}",
+                "styles": "",
+                "bbox": ",".join(str(v) for v in bbox),
+                "width": size,
+                "height": size,
+                "srs": srs,
+                "format": image_format,
+                "transparent": "true",
+            },
+            rest=False,
+        )
+        # GeoServer reports WMS errors as 200 with an XML body
+        if not response.headers.get("content-type", "").startswith("image/"):
+            raise GeoServerError(f"WMS GetMap failed: {response.text[:500]}")
+        return response.content
+
+
+geoserver = GeoServerClient(
+    settings.GEOSERVER_URL,
+    settings.GEOSERVER_USER,
+    settings.GEOSERVER_PASSWORD,
+    max_connections=settings.GEOSERVER_MAX_CONNECTIONS,
+    timeout=settings.GEOSERVER_TIMEOUT,
+    connect_timeout=settings.GEOSERVER_CONNECT_TIMEOUT,
+    max_retries=settings.GEOSERVER_MAX_RETRIES,
+)
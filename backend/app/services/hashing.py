@@ -0,0 +1,130 @@
+# backend/app/services/hashing.py
+import asyncio
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from typing import Optional, Tuple
+
+from passlib.context import CryptContext
+
+from app.core.config import settings
+
+
+def build_context(rounds: int) -> CryptContext:
+    # min_rounds: хэши с меньшей стоимостью считаются устаревшими и перехэшируются
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__rounds=rounds,
+        bcrypt__min_rounds=rounds,
+    )
+
+
+@lru_cache(maxsize=None)
+def _context(rounds: int) -> CryptContext:
+    return build_context(rounds)
+
+
+# Выполняются в дочерних процессах, поэтому модульные функции
+def _hash(password: str, rounds: int) -> str:
+    return _context(rounds).hash(password)
+
+
+def _verify_and_update(password: str, hashed: str, rounds: int) -> Tuple[bool, Optional[str]]:
+    return _context(rounds).verify_and_update(password, hashed)
+
+
+class HasherOverloaded(Exception):
+    """More hashing requests are waiting than the queue allows"""
+
+
+class HasherUnavailable(Exception):
+    """The pool did not produce a result in time or crashed"""
+
+
+class PasswordHasher:
+    """bcrypt on a dedicated process pool instead of the shared threadpool.
+
+    At most ``workers + max_pending`` hashes are admitted at once, counting
+    ones whose caller already timed out but which still occupy the pool;
+    the rest fail fast with HasherOverloaded rather than queueing behind a
+    login storm.
+    """
+
+    def __init__(self, workers: int, max_pending: int, timeout: float, rounds: int):
+        self.workers = workers
+        self.capacity = workers + max_pending
+        self.timeout = timeout
+        self.rounds = rounds
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.stats = {"completed": 0, "rejected": 0, "timeouts": 0, "rehashed": 0}
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _release(self, _future=None):
+        with self._lock:
+            self._in_flight -= 1
+
+    async def _submit(self, fn, *args):
+        with self._lock:
+            if self._in_flight >= self.capacity:
+                self.stats["rejected"] += 1
+                raise HasherOverloaded()
+            self._in_flight += 1
+        try:
+            future = self.executor.submit(fn, *args)
+        except BrokenProcessPool:
+            self._release()
+            self._executor = None
+            raise HasherUnavailable("Password hashing pool crashed")
+        except BaseException:
+            self._release()
+            raise
+        # Слот освобождается, когда задача закончилась в пуле, а не когда запрос
+        # перестал ждать: после таймаута bcrypt еще идет, и иначе под нагрузкой
+        # допуск превысил бы workers + max_pending
+        future.add_done_callback(self._release)
+        try:
+            result = await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            raise HasherUnavailable("Password hashing timed out")
+        except BrokenProcessPool:
+            # Упавший воркер ломает весь пул — пересоздаём при следующем запросе
+            self._executor = None
+            raise HasherUnavailable("Password hashing pool crashed")
+        self.stats["completed"] += 1
+        return result
+
+    async def hash(self, password: str) -> str:
+        return await self._submit(_hash, password, self.rounds)
+
+    async def verify_and_update(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        """(valid, new_hash); new_hash is set when ``hashed`` used outdated cost settings"""
+        valid, new_hash = await self._submit(_verify_and_update, password, hashed, self.rounds)
+        if new_hash is not None:
+            self.stats["rehashed"] += 1
+        return valid, new_hash
+
+    def snapshot(self) -> dict:
+        return {**self.stats, "in_flight": self._in_flight, "capacity": self.capacity}
+
+
+password_hasher = PasswordHasher(
+    settings.PASSWORD_HASH_WORKERS,
+    settings.PASSWORD_HASH_QUEUE_SIZE,
+    settings.PASSWORD_HASH_TIMEOUT,
+    settings.BCRYPT_ROUNDS,
+)
@@ -0,0 +1,252 @@
+# backend/app/services/jobs.py
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.crud.content import fail_orphaned_contents
+from app.crud.job import (
+    claim_publish_job,
+    create_publish_job,
+    fail_stale_jobs,
+    get_jobs_by_status,
+    get_publish_job,
+    touch_publish_jobs,
+    update_publish_job,
+)
+from app.db.session import SessionLocal, run_db
+from app.services.events import event_broker
+from app.schemas.map import MapCreate
+from app.services.publishing import publish_map, remove_map_files, render_terrain_layer
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RENDERING = "rendering"
+STORING = "storing"
+CONVERTING = "converting"
+COMPUTING_STATS = "computing_stats"
+PUBLISHING = "publishing"
+CONFIGURING_SRS = "configuring_srs"
+DONE = "done"
+FAILED = "failed"
+ACTIVE_STATUSES = [RENDERING, STORING, CONVERTING, COMPUTING_STATS, PUBLISHING, CONFIGURING_SRS]
+
+# Владелец задач этого процесса: у каждого воркера uvicorn свой
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class QueueFullError(Exception):
+    pass
+
+
+async def _set_job_state(db, job, **fields):
+    await run_db(db, update_publish_job, job, **fields)
+    event_broker.publish(
+        "jobs",
+        job.id,
+        "status",
+        {"status": job.status, "progress": job.progress, "error": job.error, "map_id": job.map_id},
+        user_id=job.created_by,
+    )
+
+
+async def run_publish_job(job_id: str):
+    """Run the publish steps for one job, persisting every state change.
+
+    Session work goes to the threadpool: a slow or saturated database must
+    not freeze the event loop the API shares with these workers.
+    """
+    db = SessionLocal()
+    try:
+        job = await run_db(db, get_publish_job, job_id)
+        if job is None or job.status != QUEUED:
+            return
+        # Одну задачу могут поставить в очередь несколько процессов: выполняет захвативший
+        first_step = RENDERING if job.derivative else STORING
+        if not await run_db(db, claim_publish_job, job_id, WORKER_ID, first_step):
+            return
+        await run_in_threadpool(db.refresh, job)
+        await _set_job_state(db, job)
+
+        # Производный слой: первая половина прогресса — рендеринг, вторая — публикация
+        offset = 0.5 if job.derivative else 0.0
+
+        async def on_step(status: str, progress: float):
+            await _set_job_state(db, job, status=status, progress=offset + (1.0 - offset) * progress)
+
+        async def on_render_step(status: str, progress: float):
+            await _set_job_state(db, job, status=status, progress=offset * progress)
+
+        try:
+            content_hash = job.content_hash
+            if job.derivative:
+                content_hash = await render_terrain_layer(
+                    db, job.source_map_id, job.derivative, job.derivative_params or {}, job.file_path, on_render_step
+                )
+                await run_db(db, update_publish_job, job, content_hash=content_hash)
+            db_map = await publish_map(
+                db,
+                job.file_path,
+                MapCreate(
+                    name=job.name,
+                    description=job.description,
+                    file_type=job.file_type,
+                    is_public=job.is_public
+                ),
+                job.created_by,
+                on_step,
+                content_hash=content_hash
+            )
+        except Exception as e:
+            await run_in_threadpool(db.rollback)
+            error = e.detail if isinstance(e, HTTPException) else str(e)
+            await _set_job_state(db, job, status=FAILED, error=str(error))
+            logger.warning("Publish job %s failed: %s", job_id, error)
+            return
+
+        await _set_job_state(db, job, status=DONE, progress=1.0, map_id=db_map.id)
+    finally:
+        await run_in_threadpool(db.close)
+
+
+class PublishQueue:
+    """Bounded pool of workers that publish uploaded maps in the background.
+
+    Publishing is network-bound (streamed PUTs to GeoServer), so workers are
+    tasks on the event loop; ``workers`` caps how many publishes hit
+    GeoServer at once and ``max_queued`` caps the backlog.
+
+    Several processes share the jobs table: a job runs in the process that
+    claims it, which keeps its heartbeat fresh while it runs. Jobs whose
+    heartbeat is older than ``stale_seconds`` belong to a stopped worker and
+    are failed by whichever process notices first.
+    """
+
+    def __init__(self, workers: int, max_queued: int, heartbeat_seconds: float, stale_seconds: float):
+        self.workers = workers
+        self.max_queued = max_queued
+        self.heartbeat_seconds = heartbeat_seconds
+        self.stale_seconds = stale_seconds
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=self.max_queued)
+        for job_id in await run_in_threadpool(self._recover):
+            self._queue.put_nowait(job_id)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._heartbeat()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def _recover(self) -> List[str]:
+        # Queued jobs are picked up again; a job queued by a live process too
+        # runs only once, since running it starts with a claim
+        db = SessionLocal()
+        try:
+            self._fail_stale(db)
+            return [job.id for job in get_jobs_by_status(db, [QUEUED])][:self.max_queued]
+        finally:
+            db.close()
+
+    def _fail_stale(self, db):
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.stale_seconds)
+        failed = fail_stale_jobs(db, ACTIVE_STATUSES, cutoff, "Interrupted: the worker running it stopped")
+        if failed:
+            logger.warning("Failed %d publish jobs of stopped workers", len(failed))
+        fail_orphaned_contents(db, ACTIVE_STATUSES)
+
+    def _beat(self):
+        db = SessionLocal()
+        try:
+            touch_publish_jobs(db, WORKER_ID, ACTIVE_STATUSES)
+            self._fail_stale(db)
+        finally:
+            db.close()
+
+    async def _heartbeat(self):
+        while True:
+            await asyncio.sleep(self.heartbeat_seconds)
+            try:
+                await run_in_threadpool(self._beat)
+            except Exception:
+                logger.exception("Publish job heartbeat failed")
+
+    @property
+    def full(self) -> bool:
+        return self._queue is not None and self._queue.full()
+
+    def submit(self, job_id: str):
+        if self._queue is None:
+            raise QueueFullError("Publish queue is not running")
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is not self._loop:
+            # asyncio.Queue не потокобезопасна: из пула потоков (sync-эндпоинты) кладем через цикл воркеров
+            asyncio.run_coroutine_threadsafe(self._put(job_id), self._loop).result()
+            return
+        try:
+            self._queue.put_nowait(job_id)
+        except asyncio.QueueFull:
+            raise QueueFullError("Publish queue is full")
+
+    async def _put(self, job_id: str):
+        self.submit(job_id)
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await run_publish_job(job_id)
+            except Exception:
+                logger.exception("Publish job %s crashed", job_id)
+            finally:
+                self._queue.task_done()
+
+
+publish_queue = PublishQueue(
+    settings.PUBLISH_WORKERS,
+    settings.PUBLISH_QUEUE_SIZE,
+    settings.PUBLISH_HEARTBEAT_SECONDS,
+    settings.PUBLISH_STALE_SECONDS,
+)
+
+
+def submit_publish_job(
+    db,
+    file_path: str,
+    map_in: MapCreate,
+    user_id: int,
+    content_hash: Optional[str] = None,
+    source_map_id: Optional[int] = None,
+    derivative: Optional[str] = None,
+    derivative_params: Optional[dict] = None
+):
+    """Persist a publish job for a saved upload, or for a derivative of
+    ``source_map_id`` to render first, and hand it to the queue"""
+    job = create_publish_job(
+        db, map_in, user_id, file_path, content_hash, source_map_id, derivative, derivative_params
+    )
+    try:
+        publish_queue.submit(job.id)
+    except QueueFullError as e:
+        update_publish_job(db, job, status=FAILED, error=str(e))
+        remove_map_files(file_path)
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "30"})
+    return job
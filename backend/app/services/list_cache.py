@@ -0,0 +1,165 @@
+# backend/app/services/list_cache.py
+import hashlib
+import json
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple
+
+from fastapi import Request, Response
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.etag import if_none_match
+from app.models.map import UserMap
+from app.models.module import Module
+from app.models.object import LunarObject
+from app.models.user import User
+
+# Коллекции, у которых есть кэшируемые списки
+COLLECTIONS = {UserMap: "maps", LunarObject: "objects", Module: "modules", User: "users"}
+
+# Ответ всегда перепроверяется, но благодаря ETag обходится без тела и без БД
+CACHE_CONTROL = "private, no-cache"
+
+
+class ListCache:
+    """Versioned cache of serialized list pages.
+
+    Every collection has a version counter that committed creates, updates
+    and deletes bump. A page's ETag is derived from the collection version,
+    the query parameters and the caller's visibility scope, so a matching
+    ``If-None-Match`` is answered with 304 before any query runs, and the
+    serialized body is kept in a byte-bounded LRU under the same ETag.
+
+    Versions live in this process: writes made by other worker processes
+    or directly in the database are not seen.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        # ETag старого процесса не должен совпасть с версией нового
+        self._boot = uuid.uuid4().hex[:8]
+        self._lock = threading.Lock()
+        self._versions: Dict[str, int] = {}
+        self._pages: "OrderedDict[str, Tuple[str, bytes]]" = OrderedDict()
+        self._collections: Dict[str, Set[str]] = {}
+        self._size = 0
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "not_modified": 0,
+            "invalidations": 0,
+            "evictions": 0,
+        }
+
+    def etag(self, collection: str, scope: Any = None, **params) -> Tuple[str, int]:
+        """ETag of a page and the collection version it was derived from"""
+        with self._lock:
+            version = self._versions.get(collection, 0)
+        digest = hashlib.sha1(json.dumps([scope, params], sort_keys=True, default=str).encode()).hexdigest()
+        return f'"{collection}-{self._boot}-{version}-{digest[:16]}"', version
+
+    def lookup(self, request: Request, etag: str) -> Optional[Response]:
+        """304 for a matching If-None-Match, the cached page, or None on a miss"""
+        headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+        if if_none_match(request, etag):
+            with self._lock:
+                self.stats["not_modified"] += 1
+            return Response(status_code=304, headers=headers)
+        with self._lock:
+            entry = self._pages.get(etag)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            self._pages.move_to_end(etag)
+            self.stats["hits"] += 1
+        return Response(entry[1], media_type="application/json", headers=headers)
+
+    def store(self, collection: str, etag: str, version: int, body: bytes) -> Response:
+        """Cache a freshly serialized page and wrap it in a response"""
+        with self._lock:
+            # Пока строилась страница, коллекция могла измениться: такую не кэшируем
+            if self._versions.get(collection, 0) == version and len(body) <= self.max_bytes:
+                self._put(collection, etag, body)
+        return Response(body, media_type="application/json", headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
+    def _put(self, collection: str, etag: str, body: bytes):
+        previous = self._pages.pop(etag, None)
+        if previous is not None:
+            self._size -= len(previous[1])
+        self._pages[etag] = (collection, body)
+        self._collections.setdefault(collection, set()).add(etag)
+        self._size += len(body)
+        while self._size > self.max_bytes:
+            old_etag, (old_collection, old_body) = self._pages.popitem(last=False)
+            self._collections[old_collection].discard(old_etag)
+            self._size -= len(old_body)
+            self.stats["evictions"] += 1
+
+    def bump(self, *collections: str):
+        """New version for the collections; their cached pages are dropped"""
+        with self._lock:
+            for collection in collections:
+                self._versions[collection] = self._versions.get(collection, 0) + 1
+                for etag in self._collections.pop(collection, ()):
+                    _, body = self._pages.pop(etag)
+                    self._size -= len(body)
+                self.stats["invalidations"] += 1
+
+    @staticmethod
+    def touch(db: Session, collection: str):
+        """Mark a collection changed by writes the ORM does not see (Core
+        inserts); the version is bumped when the session commits"""
+        db.info.setdefault("list_cache_dirty", set()).add(collection)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "versions": dict(self._versions),
+                "pages": len(self._pages),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "hit_ratio": self.stats["hits"] / lookups if lookups else None,
+            }
+
+
+list_cache = ListCache(settings.LIST_CACHE_BYTES)
+
+
+def _mark(session: Session, instances):
+    for instance in instances:
+        collection = COLLECTIONS.get(type(instance))
+        if collection is not None:
+            ListCache.touch(session, collection)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changes(session, flush_context):
+    _mark(session, session.new)
+    _mark(session, session.dirty)
+    _mark(session, session.deleted)
+
+
+@event.listens_for(Session, "after_bulk_update")
+@event.listens_for(Session, "after_bulk_delete")
+def _collect_bulk_changes(context):
+    collection = COLLECTIONS.get(context.mapper.class_)
+    if collection is not None:
+        ListCache.touch(context.session, collection)
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_committed(session):
+    # Версия меняется только после коммита: до него читатели видят старые данные
+    dirty = session.info.pop("list_cache_dirty", None)
+    if dirty:
+        list_cache.bump(*dirty)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back(session):
+    session.info.pop("list_cache_dirty", None)
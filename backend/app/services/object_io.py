@@ -0,0 +1,216 @@
+# backend/app/services/object_io.py
+import codecs
+import csv
+import io
+import json
+import re
+import uuid
+from datetime import datetime
+from typing import AsyncIterator, Iterator, List, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+
+from app.models.object import LunarObject
+from app.schemas.object import ObjectCreate
+from app.services.list_cache import list_cache
+from app.services.serialization import buffered, dumps
+
+# Самый большой допустимый объект в потоке импорта
+MAX_FEATURE_BYTES = 1024 * 1024
+
+_FEATURES_START = re.compile(r'"features"\s*:\s*\[')
+_decoder = json.JSONDecoder()
+
+EXPORT_COLUMNS = (
+    LunarObject.id,
+    LunarObject.type,
+    LunarObject.name,
+    LunarObject.lat,
+    LunarObject.lng,
+    LunarObject.restriction_radius,
+    LunarObject.created_at,
+)
+
+
+class BulkImportError(Exception):
+    def __init__(self, message: str, errors: List[dict] = None):
+        super().__init__(message)
+        self.errors = errors or []
+
+
+async def _text_chunks(stream: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    # Многобайтовые символы могут разрываться между чанками
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    async for chunk in stream:
+        yield decoder.decode(chunk)
+    yield decoder.decode(b"", final=True)
+
+
+async def iter_ndjson(stream: AsyncIterator[bytes]) -> AsyncIterator[dict]:
+    buffer = ""
+    async for text in _text_chunks(stream):
+        buffer += text
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            if line.strip():
+                yield json.loads(line)
+        if len(buffer) > MAX_FEATURE_BYTES:
+            raise BulkImportError("NDJSON line is too long")
+    if buffer.strip():
+        yield json.loads(buffer)
+
+
+async def iter_feature_collection(stream: AsyncIterator[bytes]) -> AsyncIterator[dict]:
+    """Yield the members of a FeatureCollection's ``features`` array one by one
+    without holding the whole document in memory."""
+    buffer = ""
+    pos = 0
+    in_features = False
+    chunks = _text_chunks(stream)
+    exhausted = False
+
+    while True:
+        if not in_features:
+            match = _FEATURES_START.search(buffer)
+            if match:
+                in_features = True
+                pos = match.end()
+            elif exhausted:
+                raise BulkImportError("No 'features' array in FeatureCollection")
+            else:
+                # Хвост может содержать начало ключа "features"
+                buffer = buffer[-64:]
+        if in_features:
+            while True:
+                while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                    pos += 1
+                if pos < len(buffer) and buffer[pos] == "]":
+                    return
+                if pos >= len(buffer):
+                    break
+                try:
+                    feature, end = _decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if exhausted:
+                        raise BulkImportError("Malformed GeoJSON feature")
+                    if len(buffer) - pos > MAX_FEATURE_BYTES:
+                        raise BulkImportError("GeoJSON feature is too large")
+                    break
+                yield feature
+                pos = end
+            buffer, pos = buffer[pos:], 0
+        if exhausted:
+            raise BulkImportError("Unterminated 'features' array")
+        try:
+            buffer += await chunks.__anext__()
+        except StopAsyncIteration:
+            exhausted = True
+
+
+def feature_to_object(item: dict) -> ObjectCreate:
+    """Accept a GeoJSON Point feature or a flat object record"""
+    if not isinstance(item, dict):
+        raise ValueError("Expected a JSON object")
+    if item.get("type") == "Feature":
+        geometry = item.get("geometry") or {}
+        if not isinstance(geometry, dict) or geometry.get("type") != "Point":
+            raise ValueError("Only Point geometries are supported")
+        lng, lat = geometry["coordinates"][:2]
+        return ObjectCreate(**{**(item.get("properties") or {}), "lat": lat, "lng": lng})
+    return ObjectCreate(**item)
+
+
+def validate_batch(items: List[dict], offset: int) -> Tuple[List[dict], List[dict]]:
+    rows, errors = [], []
+    now = datetime.utcnow()
+    for i, item in enumerate(items):
+        try:
+            obj = feature_to_object(item)
+        except (ValidationError, ValueError, KeyError, TypeError, IndexError) as e:
+            errors.append({"index": offset + i, "error": str(e)})
+            continue
+        rows.append({
+            "id": str(uuid.uuid4()),
+            "type": obj.type,
+            "name": obj.name,
+            "lat": obj.lat,
+            "lng": obj.lng,
+            "restriction_radius": obj.restriction_radius,
+            "created_at": now,
+        })
+    return rows, errors
+
+
+_COPY_FIELDS = ("id", "type", "name", "lat", "lng", "restriction_radius", "created_at")
+
+
+def write_batch(db: Session, rows: List[dict]):
+    """Insert a batch inside the session's transaction: COPY on PostgreSQL,
+    executemany elsewhere. The caller commits."""
+    if not rows:
+        return
+    # COPY и Core-вставки идут мимо ORM-событий сессии
+    list_cache.touch(db, "objects")
+    connection = db.connection()
+    if connection.dialect.name == "postgresql":
+        payload = io.StringIO()
+        writer = csv.writer(payload)
+        for row in rows:
+            writer.writerow([row[field] for field in _COPY_FIELDS])
+        payload.seek(0)
+        cursor = connection.connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY {LunarObject.__tablename__} ({', '.join(_COPY_FIELDS)}) FROM STDIN WITH (FORMAT csv)",
+                payload,
+            )
+        finally:
+            cursor.close()
+    else:
+        connection.execute(LunarObject.__table__.insert(), rows)
+
+
+def export_rows(session_factory, batch_size: int = 1000) -> Iterator[tuple]:
+    """Stream objects from a server-side cursor in created_at order"""
+    db = session_factory()
+    try:
+        query = (
+            db.query(*EXPORT_COLUMNS)
+            .order_by(LunarObject.created_at, LunarObject.id)
+            .execution_options(stream_results=True)
+            .yield_per(batch_size)
+        )
+        for row in query:
+            yield row
+    finally:
+        db.close()
+
+
+def _feature(row) -> dict:
+    return {
+        "type": "Feature",
+        "id": row.id,
+        "geometry": {"type": "Point", "coordinates": [row.lng, row.lat]},
+        "properties": {
+            "type": row.type,
+            "name": row.name,
+            "restriction_radius": row.restriction_radius,
+            "created_at": row.created_at.isoformat() if row.created_at else None,
+        },
+    }
+
+
+def iter_geojson(rows: Iterator[tuple]) -> Iterator[bytes]:
+    def parts():
+        yield b'{"type":"FeatureCollection","features":['
+        first = True
+        for row in rows:
+            yield (b"" if first else b",") + dumps(_feature(row))
+            first = False
+        yield b"]}"
+    return buffered(parts())
+
+
+def iter_ndjson_export(rows: Iterator[tuple]) -> Iterator[bytes]:
+    return buffered(dumps(_feature(row)) + b"\n" for row in rows)
@@ -0,0 +1,152 @@
+# backend/app/services/principals.py
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from jose import JWTError, jwt
+from pydantic import BaseModel
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+
+from app.core.config import settings
+from app.models.user import User
+
+
+class Principal(BaseModel):
+    """Read-only snapshot of the authenticated user, safe to share between requests"""
+    id: int
+    username: str
+    email: Optional[str] = None
+    full_name: Optional[str] = None
+    is_active: Optional[bool] = True
+    is_superuser: Optional[bool] = False
+
+    class Config:
+        orm_mode = True
+        allow_mutation = False
+
+
+class PrincipalCache:
+    """Caches for get_current_user.
+
+    Decoded tokens are memoized until the token expires, and the user
+    behind a token subject is kept as a detached ``Principal`` snapshot for
+    ``ttl`` seconds. Updates and deletes of User rows in this process
+    invalidate the entry when their transaction commits; other worker
+    processes rely on the TTL.
+    """
+
+    def __init__(self, max_size: int, ttl: float, max_tokens: int):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.max_tokens = max_tokens
+        self._lock = threading.Lock()
+        self._principals: "OrderedDict[str, Tuple[float, Principal]]" = OrderedDict()
+        self._tokens: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self.stats = {
+            "token_hits": 0,
+            "token_misses": 0,
+            "principal_hits": 0,
+            "principal_misses": 0,
+            "invalidations": 0,
+            "evictions": 0,
+        }
+
+    def subject(self, token: str) -> str:
+        """The ``sub`` claim of a valid token; raises JWTError otherwise"""
+        now = time.time()
+        with self._lock:
+            entry = self._tokens.get(token)
+            if entry is not None and entry[0] > now:
+                self._tokens.move_to_end(token)
+                self.stats["token_hits"] += 1
+                return entry[1]
+            self.stats["token_misses"] += 1
+
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        subject = payload.get("sub")
+        if subject is None:
+            raise JWTError("Token has no subject")
+        expires = payload.get("exp", now + self.ttl)
+
+        with self._lock:
+            self._tokens[token] = (expires, subject)
+            self._tokens.move_to_end(token)
+            while len(self._tokens) > self.max_tokens:
+                self._tokens.popitem(last=False)
+        return subject
+
+    def get(self, subject: str) -> Optional[Principal]:
+        with self._lock:
+            entry = self._principals.get(subject)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._principals[subject]
+                self.stats["principal_misses"] += 1
+                return None
+            self._principals.move_to_end(subject)
+            self.stats["principal_hits"] += 1
+            return entry[1]
+
+    def put(self, subject: str, user: User) -> Principal:
+        principal = Principal.from_orm(user)
+        with self._lock:
+            self._principals[subject] = (time.monotonic() + self.ttl, principal)
+            self._principals.move_to_end(subject)
+            while len(self._principals) > self.max_size:
+                self._principals.popitem(last=False)
+                self.stats["evictions"] += 1
+        return principal
+
+    def invalidate(self, subject: str):
+        with self._lock:
+            if self._principals.pop(subject, None) is not None:
+                self.stats["invalidations"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._principals.clear()
+            self._tokens.clear()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            stats = dict(self.stats)
+            stats["principals"] = len(self._principals)
+            stats["tokens"] = len(self._tokens)
+        for kind in ("token", "principal"):
+            lookups = stats[f"{kind}_hits"] + stats[f"{kind}_misses"]
+            stats[f"{kind}_hit_ratio"] = stats[f"{kind}_hits"] / lookups if lookups else 0.0
+        return stats
+
+
+principal_cache = PrincipalCache(
+    settings.PRINCIPAL_CACHE_SIZE,
+    settings.PRINCIPAL_CACHE_TTL,
+    settings.TOKEN_CACHE_SIZE,
+)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _collect_principal(mapper, connection, target):
+    # Токены выдаются на username, поэтому сбрасываем и старое имя при переименовании
+    session = object_session(target)
+    if session is None:
+        return
+    history = inspect(target).attrs.username.history
+    stale = session.info.setdefault("principal_cache_stale", set())
+    stale.update(username for username in {target.username, *history.deleted} if username is not None)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session):
+    # Сброс только после коммита: иначе параллельный запрос успел бы закэшировать
+    # строку в состоянии до коммита, и она жила бы до конца TTL
+    for username in session.info.pop("principal_cache_stale", ()):
+        principal_cache.invalidate(username)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back(session):
+    session.info.pop("principal_cache_stale", None)
@@ -0,0 +1,347 @@
+# backend/app/services/publishing.py
+import asyncio
+import logging
+import os
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, Optional
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.crud.content import (
+    acquire_content,
+    claim_content,
+    delete_content,
+    mark_content_failed,
+    mark_content_published,
+    release_content,
+    restore_content,
+)
+from app.crud.map import create_user_map, delete_user_map, get_user_map, set_map_raster_stats
+from app.db.session import run_db
+from app.models.map import UserMap
+from app.schemas.map import MapCreate
+from app.services.content_store import content_files, content_store
+from app.services.geoserver import geoserver, GeoServerError
+from app.services.raster import convert_to_cog
+from app.services.raster_stats import raster_stats as raster_stats_engine
+from app.services.shapefile import ShapefileError, iter_zip, remove_sidecars, zip_length, zip_members
+from app.services.terrain import TerrainParams, terrain
+from app.services.tile_cache import tile_cache
+
+logger = logging.getLogger(__name__)
+
+# Колбэк этапа публикации: (status, progress)
+StepCallback = Callable[[str, float], Awaitable[None]]
+
+
+async def publish_to_geoserver(
+    file_path: str,
+    file_type: str,
+    workspace: str = settings.GEOSERVER_WORKSPACE,
+    on_step: Optional[StepCallback] = None
+):
+    """Publish file to GeoServer with proper workspace handling"""
+    layer_name = os.path.splitext(os.path.basename(file_path))[0]
+    layer_name = layer_name.replace(" ", "_").lower()
+    
+    # 1. Check/create workspace and namespace (остается без изменений)
+    
+    if file_type == "geotiff":
+        try:
+            # Create coverage store
+            await geoserver.put_file(
+                f"/workspaces/{workspace}/coveragestores/{layer_name}/file.geotiff",
+                file_path,
+                "image/geotiff",
+                "Failed to create coverage store",
+                params={"configure": "first", "coverageName": layer_name},
+            )
+            
+            if on_step:
+                await on_step("configuring_srs", 0.8)
+
+            # Enable layer and set SRS
+            layer_config = {
+                "layer": {
+                    "defaultStyle": {
+                        "name": "raster"
+                    },
+                    "enabled": True
+                }
+            }
+            await geoserver.put_json(
+                f"/layers/{workspace}:{layer_name}",
+                layer_config,
+                "Failed to configure layer",
+            )
+            
+            # Set SRS for the coverage
+            coverage_config = {
+                "coverage": {
+                    "srs": "EPSG:4326",
+                    "projectionPolicy": "FORCE_DECLARED",
+                    "enabled": True
+                }
+            }
+            await geoserver.put_json(
+                f"/workspaces/{workspace}/coveragestores/{layer_name}/coverages/{layer_name}",
+                coverage_config,
+                "Failed to configure coverage",
+            )
+            
+            return layer_name
+            
+        except GeoServerError as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"GeoServer GeoTIFF upload failed: {str(e)}"
+            )
+
+    elif file_type == "shapefile":
+        # For shapefile, we need to upload a zip containing all required files;
+        # it is generated on the fly from the sidecars, nothing is written to disk
+        try:
+            members = await run_in_threadpool(zip_members, file_path, layer_name)
+
+            # Upload to GeoServer
+            await geoserver.put_stream(
+                f"/workspaces/{workspace}/datastores/{layer_name}/file.shp",
+                lambda: iter_zip(members, geoserver.chunk_size),
+                zip_length(members),
+                "application/zip",
+                "GeoServer Shapefile upload failed",
+                params={"configure": "first"},
+            )
+                
+            return layer_name
+            
+        except (GeoServerError, OSError, ShapefileError) as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Shapefile processing failed: {str(e)}"
+            )
+    else:
+        raise HTTPException(
+            status_code=400,
+            detail="Unsupported file type"
+        )
+
+async def compute_raster_stats(file_path: str) -> Optional[dict]:
+    """Statistics of a published raster; a failure here must not fail the
+    publish, the stats endpoint computes them on demand instead"""
+    try:
+        return await run_in_threadpool(raster_stats_engine.compute, file_path)
+    except Exception:
+        logger.exception("Raster statistics failed for %s", file_path)
+        return None
+
+
+# Расчеты статистики по запросу: один на файл, сколько бы клиентов ни ждали
+_pending_stats: Dict[str, asyncio.Task] = {}
+
+
+async def ensure_raster_stats(db: Session, db_map: UserMap) -> Optional[dict]:
+    """Stats of a map, computing and storing them for maps published before
+    statistics existed or whose ingest-time computation failed"""
+    if db_map.raster_stats is not None:
+        return db_map.raster_stats
+    file_path = map_file_path(db_map.file_type, db_map.file_path)
+    task = _pending_stats.get(file_path)
+    if task is None:
+        task = asyncio.ensure_future(compute_raster_stats(file_path))
+        _pending_stats[file_path] = task
+        task.add_done_callback(lambda _: _pending_stats.pop(file_path, None))
+    stats = await asyncio.shield(task)
+    if stats is not None:
+        await run_db(db, set_map_raster_stats, db_map, stats)
+    return stats
+
+
+async def render_terrain_layer(
+    db: Session,
+    source_map_id: Optional[int],
+    derivative: str,
+    params: dict,
+    file_path: str,
+    on_step: Optional[StepCallback] = None
+) -> str:
+    """Render a derivative of a published DEM to ``file_path``, ready for
+    ``publish_map``; returns the content hash of the rendered GeoTIFF"""
+    source = await run_db(db, get_user_map, source_map_id) if source_map_id else None
+    if source is None or source.file_type != "geotiff":
+        raise HTTPException(status_code=404, detail="Source map not found")
+
+    async def on_progress(fraction: float):
+        if on_step:
+            await on_step("rendering", fraction)
+
+    try:
+        return await terrain.render(
+            source.file_path,
+            map_file_path(source.file_type, source.file_path),
+            derivative,
+            TerrainParams(**params),
+            file_path,
+            on_progress,
+        )
+    except Exception:
+        remove_map_files(file_path)
+        raise
+
+
+async def _claim_content(db: Session, content_hash: str, file_type: str):
+    """Share published content with the same hash, or become its publisher.
+
+    Returns ``(content, owned)``. While another job is publishing the same
+    bytes this waits for it instead of publishing a second copy.
+    """
+    deadline = time.monotonic() + settings.CONTENT_WAIT_TIMEOUT
+    while True:
+        content = await run_db(db, acquire_content, content_hash)
+        if content is not None:
+            return content, False
+        content, owned = await run_db(db, claim_content, content_hash, file_type)
+        if owned:
+            return content, True
+        if time.monotonic() > deadline:
+            raise HTTPException(status_code=409, detail="Identical upload is still being published")
+        await asyncio.sleep(settings.CONTENT_POLL_SECONDS)
+
+
+async def publish_map(
+    db: Session,
+    file_path: str,
+    map_in: MapCreate,
+    user_id: int,
+    on_step: Optional[StepCallback] = None,
+    content_hash: Optional[str] = None
+):
+    """Publish a saved upload to GeoServer and register it as a UserMap.
+
+    With a ``content_hash``, bytes that are already published are not
+    stored or published again: the new map points at the existing layer.
+    """
+    owned = False
+    raster_layout = None
+    raster_stats = None
+    try:
+        if content_hash:
+            content, owned = await _claim_content(db, content_hash, map_in.file_type)
+            if not owned:
+                remove_map_files(file_path)
+                return await run_db(
+                    db, create_user_map, map_in, user_id, content.layer_name, content.raster_layout, content_hash,
+                    content.raster_stats
+                )
+            if on_step:
+                await on_step("storing", 0.02)
+            files = content_files(file_path, map_in.file_type)
+            size = sum(os.path.getsize(path) for path, _ in files)
+            await run_in_threadpool(content_store.put, content_hash, files)
+
+        # Rewrite GeoTIFFs as tiled COGs so WMS reads only the blocks it needs
+        if map_in.file_type == "geotiff" and settings.COG_CONVERSION_ENABLED:
+            if on_step:
+                await on_step("converting", 0.05)
+            raster_layout = await run_in_threadpool(convert_to_cog, file_path)
+
+        # Statistics for colour ramps, computed once here instead of by every client
+        if map_in.file_type == "geotiff":
+            if on_step:
+                await on_step("computing_stats", 0.2)
+            raster_stats = await compute_raster_stats(file_path)
+
+        # Publish to GeoServer
+        if on_step:
+            await on_step("publishing", 0.3)
+        layer_name = await publish_to_geoserver(file_path, map_in.file_type, on_step=on_step)
+        await tile_cache.invalidate_layer(layer_name)
+    except Exception as e:
+        if owned:
+            await run_db(db, mark_content_failed, content_hash)
+        remove_map_files(file_path)
+        if isinstance(e, HTTPException) and e.status_code == 409:
+            raise
+        raise HTTPException(
+            status_code=500,
+            detail=f"Map publish failed: {str(e)}"
+        )
+
+    if owned:
+        await run_db(db, mark_content_published, content, layer_name, size, raster_layout, raster_stats)
+    
+    # Create DB record
+    return await run_db(
+        db,
+        create_user_map,
+        map_in,
+        user_id,
+        layer_name,  # Store the layer name instead of file path
+        raster_layout,
+        content_hash,
+        raster_stats
+    )
+
+
+async def release_map_content(db: Session, db_map: UserMap):
+    """Delete a map and drop its reference to the stored content; the layer,
+    local files and stored objects go away with the last reference."""
+    if not db_map.content_hash:
+        await unpublish_from_geoserver(db_map.file_path, db_map.file_type)
+        remove_map_files(map_file_path(db_map.file_type, db_map.file_path))
+        await run_in_threadpool(terrain.forget, db_map.file_path)
+        await run_db(db, delete_user_map, db_map)
+        return
+
+    content = await run_db(db, release_content, db_map.content_hash)
+    if content is not None:
+        try:
+            await unpublish_from_geoserver(content.layer_name, content.file_type)
+        except HTTPException:
+            await run_db(db, restore_content, content)
+            raise
+    await run_db(db, delete_user_map, db_map)
+    if content is not None:
+        remove_map_files(map_file_path(content.file_type, content.layer_name))
+        await run_in_threadpool(terrain.forget, content.layer_name)
+        await run_in_threadpool(content_store.delete, content.sha256)
+        await run_db(db, delete_content, content)
+
+
+async def unpublish_from_geoserver(layer_name: str, file_type: str, workspace: str = settings.GEOSERVER_WORKSPACE):
+    """Remove a published layer together with its store"""
+    store = "coveragestores" if file_type == "geotiff" else "datastores"
+    try:
+        await geoserver.delete(
+            f"/workspaces/{workspace}/{store}/{layer_name}",
+            "Failed to delete store",
+            params={"recurse": "true", "purge": "all"},
+        )
+    except GeoServerError as e:
+        # Уже удален — не ошибка
+        if e.status_code != 404:
+            raise HTTPException(status_code=500, detail=f"GeoServer delete failed: {str(e)}")
+    await tile_cache.invalidate_layer(layer_name)
+
+
+def map_file_path(file_type: str, file_id: Optional[str] = None) -> str:
+    # Create uploads directory if not exists
+    upload_dir = settings.GEOSERVER_UPLOAD_PATH
+    os.makedirs(upload_dir, exist_ok=True)
+    
+    # Generate unique filename
+    file_id = file_id or str(uuid.uuid4())
+    file_ext = ".tif" if file_type == "geotiff" else ".shp"
+    return os.path.join(upload_dir, f"{file_id}{file_ext}")
+
+
+def remove_map_files(file_path: str):
+    """Delete a saved upload, including the sidecars of a shapefile"""
+    if file_path.endswith(".shp"):
+        remove_sidecars(file_path)
+    elif os.path.exists(file_path):
+        os.remove(file_path)
@@ -0,0 +1,93 @@
+# backend/app/services/raster.py
+import os
+from typing import Optional
+
+from app.core.config import settings
+
+
+def _gdal():
+    # GDAL тяжелый, импортируем только когда он нужен
+    from osgeo import gdal
+    gdal.UseExceptions()
+    return gdal
+
+
+def _osr():
+    from osgeo import osr
+    osr.UseExceptions()
+    return osr
+
+
+def inspect_raster(file_path: str) -> dict:
+    """Describe the on-disk layout of a raster: tiling, overviews, compression"""
+    gdal = _gdal()
+    ds = gdal.Open(file_path)
+    try:
+        band = ds.GetRasterBand(1)
+        block_x, block_y = band.GetBlockSize()
+        structure = ds.GetMetadata("IMAGE_STRUCTURE") or {}
+        return {
+            "driver": ds.GetDriver().ShortName,
+            "width": ds.RasterXSize,
+            "height": ds.RasterYSize,
+            "bands": ds.RasterCount,
+            "data_type": gdal.GetDataTypeName(band.DataType),
+            "block_size": [block_x, block_y],
+            "tiled": block_y > 1 and (block_x < ds.RasterXSize or block_x == block_y),
+            "overviews": band.GetOverviewCount(),
+            "compression": structure.get("COMPRESSION", "NONE"),
+            "interleave": structure.get("INTERLEAVE"),
+            "layout": structure.get("LAYOUT"),
+        }
+    finally:
+        ds = None
+
+
+def needs_cog_conversion(info: dict) -> bool:
+    if info["layout"] == "COG":
+        return False
+    small = max(info["width"], info["height"]) <= settings.COG_BLOCKSIZE
+    if small:
+        return False
+    return not info["tiled"] or info["overviews"] == 0 or info["compression"] == "NONE"
+
+
+def convert_to_cog(file_path: str, compression: Optional[str] = None) -> dict:
+    """Rewrite a GeoTIFF in place as a tiled COG with internal overviews.
+
+    Blocking and CPU-heavy; call it from a worker thread. Returns the layout
+    of the file that will be published, plus the layout it had on upload.
+    """
+    source = inspect_raster(file_path)
+    if not needs_cog_conversion(source):
+        return {**source, "converted": False}
+
+    gdal = _gdal()
+    compression = compression or settings.COG_COMPRESSION
+    creation_options = [
+        f"COMPRESS={compression}",
+        f"BLOCKSIZE={settings.COG_BLOCKSIZE}",
+        f"OVERVIEW_RESAMPLING={settings.COG_OVERVIEW_RESAMPLING}",
+        "OVERVIEWS=AUTO",
+        "BIGTIFF=IF_SAFER",
+        "NUM_THREADS=ALL_CPUS",
+    ]
+    if compression in ("DEFLATE", "LZW", "ZSTD"):
+        creation_options.append("PREDICTOR=YES")
+
+    tmp_path = f"{file_path}.cog.tmp"
+    try:
+        gdal.Translate(tmp_path, file_path, format="COG", creationOptions=creation_options)
+        os.replace(tmp_path, file_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    return {
+        **inspect_raster(file_path),
+        "converted": True,
+        "source": {
+            key: source[key]
+            for key in ("block_size", "tiled", "overviews", "compression", "layout")
+        },
+    }
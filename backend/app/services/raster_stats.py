@@ -0,0 +1,263 @@
+# backend/app/services/raster_stats.py
+import math
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.raster import _gdal
+
+# Целые типы, для которых гистограмма по всем значениям точная за один проход
+_EXACT_RANGES = {"Byte": (0, 256), "Int8": (-128, 256), "UInt16": (0, 65536), "Int16": (-32768, 65536)}
+# Разрешение внутренней гистограммы для вещественных растров
+FINE_BINS = 65536
+
+# (xoff, yoff, xsize, ysize)
+Window = Tuple[int, int, int, int]
+# Диапазон внутренней гистограммы канала: (lo, hi, bins, exact); None — только моменты.
+# exact — по корзине на значение целого типа из _EXACT_RANGES
+HistogramRange = Optional[Tuple[float, float, int, bool]]
+
+
+def windows(width: int, height: int, block_x: int, block_y: int, target: int) -> List[Window]:
+    """Cover the raster with windows of about ``target`` pixels a side,
+    aligned to the file's blocks so every block is decoded once."""
+    step_x = max(block_x, target // block_x * block_x)
+    step_y = max(block_y, target // block_y * block_y)
+    return [
+        (x, y, min(step_x, width - x), min(step_y, height - y))
+        for y in range(0, height, step_y)
+        for x in range(0, width, step_x)
+    ]
+
+
+def _valid(data: np.ndarray, nodata: Optional[float]) -> np.ndarray:
+    if nodata is not None:
+        data = data[data != nodata] if not math.isnan(nodata) else data
+    if data.dtype.kind == "f":
+        data = data[np.isfinite(data)]
+    return data.ravel()
+
+
+def _histogram(values: np.ndarray, lo: float, hi: float, bins: int, exact: bool) -> np.ndarray:
+    # Совпадение hi - lo == bins у Int32 (min=0, max=65536) — не повод для bincount:
+    # он вернул бы bins + 1 корзину
+    if exact:
+        return np.bincount((values.astype(np.int64) - int(lo)), minlength=bins)
+    scale = bins / (hi - lo) if hi > lo else 0.0
+    index = ((values.astype(np.float64) - lo) * scale).astype(np.int64)
+    np.clip(index, 0, bins - 1, out=index)
+    return np.bincount(index, minlength=bins)
+
+
+# Выполняется в дочерних процессах, поэтому модульная функция
+def _scan(file_path: str, window_batch: List[Window], ranges: Sequence[HistogramRange]) -> List[dict]:
+    """Partial statistics of every band over a batch of windows"""
+    gdal = _gdal()
+    ds = gdal.Open(file_path)
+    try:
+        partials = []
+        for index, hist_range in enumerate(ranges):
+            band = ds.GetRasterBand(index + 1)
+            nodata = band.GetNoDataValue()
+            count, nodata_count = 0, 0
+            mean, m2 = 0.0, 0.0
+            minimum, maximum = math.inf, -math.inf
+            hist = np.zeros(hist_range[2], dtype=np.int64) if hist_range else None
+            for x, y, w, h in window_batch:
+                values = _valid(band.ReadAsArray(x, y, w, h), nodata)
+                nodata_count += w * h - values.size
+                if values.size == 0:
+                    continue
+                # Параллельное объединение моментов (Chan et al.) — устойчиво на миллиардах пикселей
+                as_float = values.astype(np.float64)
+                n_b = values.size
+                mean_b = float(as_float.mean())
+                m2_b = float(((as_float - mean_b) ** 2).sum())
+                total = count + n_b
+                delta = mean_b - mean
+                mean += delta * n_b / total
+                m2 += m2_b + delta * delta * count * n_b / total
+                count = total
+                minimum = min(minimum, float(values.min()))
+                maximum = max(maximum, float(values.max()))
+                if hist is not None:
+                    hist += _histogram(values, *hist_range)
+            partials.append({
+                "count": count, "nodata_count": nodata_count, "mean": mean, "m2": m2,
+                "min": minimum, "max": maximum, "histogram": hist,
+            })
+        return partials
+    finally:
+        ds = None
+
+
+def _merge(a: dict, b: dict) -> dict:
+    total = a["count"] + b["count"]
+    if total == 0:
+        mean, m2 = 0.0, 0.0
+    else:
+        delta = b["mean"] - a["mean"]
+        mean = a["mean"] + delta * b["count"] / total
+        m2 = a["m2"] + b["m2"] + delta * delta * a["count"] * b["count"] / total
+    hist = None
+    if a["histogram"] is not None:
+        hist = a["histogram"] + b["histogram"]
+    return {
+        "count": total, "nodata_count": a["nodata_count"] + b["nodata_count"], "mean": mean, "m2": m2,
+        "min": min(a["min"], b["min"]), "max": max(a["max"], b["max"]), "histogram": hist,
+    }
+
+
+def _percentiles(hist: np.ndarray, lo: float, hi: float, exact: bool, minimum: float, maximum: float,
+                 percentiles: Sequence[float]) -> dict:
+    cdf = np.cumsum(hist)
+    total = int(cdf[-1])
+    width = (hi - lo) / len(hist)
+    result = {}
+    for p in percentiles:
+        # Ранг по методу nearest-rank
+        rank = max(1, math.ceil(p / 100 * total))
+        index = int(np.searchsorted(cdf, rank))
+        value = lo + index if exact else lo + (index + 0.5) * width
+        result[f"p{p:g}"] = float(min(max(value, minimum), maximum))
+    return result
+
+
+def _output_histogram(hist: np.ndarray, lo: float, hi: float, exact: bool, minimum: float, maximum: float,
+                      bins: int) -> dict:
+    """Re-bin the fine histogram to ``bins`` equal bins over [min, max]"""
+    if exact:
+        bins = min(bins, int(maximum - minimum) + 1)
+        centers = lo + np.arange(len(hist))
+        edges = (minimum, maximum + 1)
+    else:
+        width = (hi - lo) / len(hist)
+        centers = lo + (np.arange(len(hist)) + 0.5) * width
+        edges = (minimum, maximum) if maximum > minimum else (minimum, minimum + 1)
+    keep = hist > 0
+    counts, bin_edges = np.histogram(centers[keep], bins=bins, range=edges, weights=hist[keep])
+    return {"min": float(bin_edges[0]), "max": float(bin_edges[-1]), "counts": counts.astype(np.int64).tolist()}
+
+
+class RasterStatsEngine:
+    """Per-band statistics, percentiles and histograms of a raster.
+
+    The raster is read in block-aligned windows, so memory per worker is one
+    window whatever the file size, and batches of windows are scanned in a
+    process pool. Integer rasters up to 16 bits are histogrammed exactly in
+    a single pass; other types take a moments pass to find the range and a
+    second pass over a 65536-bin histogram.
+    """
+
+    def __init__(self, workers: int, window: int, bins: int, percentiles: Sequence[float]):
+        self.workers = workers
+        self.window = window
+        self.bins = bins
+        self.percentiles = list(percentiles)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            return self._executor
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _run(self, file_path: str, batches: List[List[Window]], ranges: Sequence[HistogramRange]) -> List[dict]:
+        futures = [self.executor.submit(_scan, file_path, batch, ranges) for batch in batches]
+        merged = None
+        for future in futures:
+            partials = future.result()
+            merged = partials if merged is None else [_merge(a, b) for a, b in zip(merged, partials)]
+        return merged
+
+    def compute(self, file_path: str) -> dict:
+        """Blocking; call it from a worker thread"""
+        gdal = _gdal()
+        ds = gdal.Open(file_path)
+        try:
+            width, height, band_count = ds.RasterXSize, ds.RasterYSize, ds.RasterCount
+            first = ds.GetRasterBand(1)
+            block_x, block_y = first.GetBlockSize()
+            bands = [
+                (gdal.GetDataTypeName(ds.GetRasterBand(i).DataType), ds.GetRasterBand(i).GetNoDataValue())
+                for i in range(1, band_count + 1)
+            ]
+        finally:
+            ds = None
+
+        all_windows = windows(width, height, block_x, block_y, self.window)
+        per_batch = max(1, math.ceil(len(all_windows) / (self.workers * 4)))
+        batches = [all_windows[i:i + per_batch] for i in range(0, len(all_windows), per_batch)]
+
+        exact = [data_type in _EXACT_RANGES for data_type, _ in bands]
+        ranges: List[HistogramRange] = [
+            (_EXACT_RANGES[data_type][0], _EXACT_RANGES[data_type][0] + _EXACT_RANGES[data_type][1],
+             _EXACT_RANGES[data_type][1], True) if is_exact else None
+            for (data_type, _), is_exact in zip(bands, exact)
+        ]
+        results = self._run(file_path, batches, ranges)
+
+        if not all(exact):
+            # Второй проход: гистограмма вещественных каналов по найденному диапазону
+            float_ranges: List[HistogramRange] = [
+                None if is_exact or result["count"] == 0 else (result["min"], result["max"], FINE_BINS, False)
+                for result, is_exact in zip(results, exact)
+            ]
+            second = self._run(file_path, batches, float_ranges)
+            for i, hist_range in enumerate(float_ranges):
+                if hist_range is not None:
+                    results[i]["histogram"] = second[i]["histogram"]
+                    ranges[i] = hist_range
+
+        return {
+            "width": width,
+            "height": height,
+            "bands": [
+                self._band_stats(i + 1, data_type, nodata, result, ranges[i], exact[i])
+                for i, ((data_type, nodata), result) in enumerate(zip(bands, results))
+            ],
+        }
+
+    def _band_stats(self, index: int, data_type: str, nodata: Optional[float], result: dict,
+                    hist_range: HistogramRange, exact: bool) -> dict:
+        stats = {
+            "band": index,
+            "data_type": data_type,
+            "nodata": None if nodata is None or math.isnan(nodata) else nodata,
+            "valid_count": result["count"],
+            "nodata_count": result["nodata_count"],
+            "min": None, "max": None, "mean": None, "std": None,
+            "percentiles": {},
+            "histogram": None,
+        }
+        if result["count"] == 0:
+            return stats
+        minimum, maximum = result["min"], result["max"]
+        lo, hi, _, _ = hist_range
+        stats.update(
+            min=minimum,
+            max=maximum,
+            mean=result["mean"],
+            std=math.sqrt(result["m2"] / result["count"]),
+            percentiles=_percentiles(result["histogram"], lo, hi, exact, minimum, maximum, self.percentiles),
+            histogram=_output_histogram(result["histogram"], lo, hi, exact, minimum, maximum, self.bins),
+        )
+        return stats
+
+
+raster_stats = RasterStatsEngine(
+    settings.RASTER_STATS_WORKERS,
+    settings.RASTER_STATS_WINDOW,
+    settings.RASTER_STATS_BINS,
+    settings.RASTER_STATS_PERCENTILES,
+)
@@ -0,0 +1,86 @@
+# backend/app/services/serialization.py
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+import orjson
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy.orm import Query, Session
+
+from app.core.config import settings
+
+STREAM_FORMATS = ("ndjson", "array")
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, BaseModel):
+        return obj.dict()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(obj: Any) -> bytes:
+    """orjson with pydantic models allowed; datetimes come out as ISO 8601
+    like with the standard encoder"""
+    return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def page_body(rows: Iterable, next_cursor: Optional[str]) -> bytes:
+    """A ``Page`` of plain rows (see ``crud.base.schema_columns``), serialized
+    without building pydantic models"""
+    return dumps({"items": [row._asdict() for row in rows], "next_cursor": next_cursor})
+
+
+def buffered(parts: Iterator[bytes], size: int = 64 * 1024) -> Iterator[bytes]:
+    # Склеиваем мелкие фрагменты, чтобы не писать в сокет по строке
+    buffer, length = [], 0
+    for part in parts:
+        buffer.append(part)
+        length += len(part)
+        if length >= size:
+            yield b"".join(buffer)
+            buffer, length = [], 0
+    if buffer:
+        yield b"".join(buffer)
+
+
+def iter_query(db: Session, query: Query, batch_size: int) -> Iterator[Any]:
+    """Rows from a server-side cursor; closes the session when exhausted"""
+    try:
+        for row in query.execution_options(stream_results=True).yield_per(batch_size):
+            yield row
+    finally:
+        db.close()
+
+
+def iter_ndjson(rows: Iterable) -> Iterator[bytes]:
+    return buffered(dumps(row._asdict()) + b"\n" for row in rows)
+
+
+def iter_json_array(rows: Iterable) -> Iterator[bytes]:
+    def parts():
+        yield b"["
+        first = True
+        for row in rows:
+            yield (b"" if first else b",") + dumps(row._asdict())
+            first = False
+        yield b"]"
+    return buffered(parts())
+
+
+def stream_rows(session_factory: Callable[[], Session], build: Callable[[Session], Query], format: str) -> StreamingResponse:
+    """Stream every row of ``build(db)`` as NDJSON or a JSON array while the
+    cursor produces them.
+
+    The query is built before the response starts, so a malformed cursor
+    still raises ValueError here instead of cutting the stream.
+    """
+    db = session_factory()
+    try:
+        query = build(db)
+    except Exception:
+        db.close()
+        raise
+    rows = iter_query(db, query, settings.STREAM_BATCH_SIZE)
+    if format == "ndjson":
+        return StreamingResponse(iter_ndjson(rows), media_type=NDJSON_MEDIA_TYPE)
+    return StreamingResponse(iter_json_array(rows), media_type="application/json")
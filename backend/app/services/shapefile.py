@@ -0,0 +1,329 @@
+# backend/app/services/shapefile.py
+import hashlib
+import os
+import struct
+import time
+import zipfile
+import zlib
+from typing import AsyncIterator, BinaryIO, Dict, List, NamedTuple, Optional, Tuple
+
+import aiofiles
+
+SIDECAR_EXTENSIONS = (".shp", ".shx", ".dbf", ".prj", ".cpg")
+REQUIRED_EXTENSIONS = (".shp", ".shx", ".dbf")
+
+# Сколько байт заголовка нужно, чтобы проверить файл
+_HEADER_BYTES = {".shp": 100, ".shx": 100, ".dbf": 32}
+# У .dbf может быть завершающий байт 0x1A
+_TRAILER_BYTES = {".dbf": 1}
+# Текстовые сайдкары (.prj, .cpg) крошечные
+MAX_TEXT_SIDECAR_BYTES = 1024 * 1024
+
+_SHAPE_TYPES = {0, 1, 3, 5, 8, 11, 13, 15, 18, 21, 23, 25, 28, 31}
+_DBF_VERSIONS = {0x02, 0x03, 0x30, 0x31, 0x32, 0x43, 0x63, 0x83, 0x8B, 0xCB, 0xF5, 0xFB}
+
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+class ShapefileError(ValueError):
+    pass
+
+
+def sidecar_extension(filename: str) -> str:
+    ext = os.path.splitext(filename or "")[1].lower()
+    if ext not in SIDECAR_EXTENSIONS:
+        raise ShapefileError(f"Unsupported shapefile member: {filename}")
+    return ext
+
+
+def _expected_size(ext: str, head: bytes) -> Optional[int]:
+    """Validate a member header; return the file size it declares"""
+    if ext in (".shp", ".shx"):
+        if len(head) < 100:
+            raise ShapefileError(f"{ext} header is truncated")
+        file_code, = struct.unpack(">i", head[0:4])
+        words, = struct.unpack(">i", head[24:28])
+        version, shape_type = struct.unpack("<ii", head[28:36])
+        if file_code != 9994 or version != 1000:
+            raise ShapefileError(f"{ext} is not an ESRI shapefile")
+        if shape_type not in _SHAPE_TYPES:
+            raise ShapefileError(f"{ext} has unknown shape type {shape_type}")
+        if words * 2 < 100:
+            raise ShapefileError(f"{ext} declares an invalid file length")
+        return words * 2
+    if ext == ".dbf":
+        if len(head) < 32:
+            raise ShapefileError(".dbf header is truncated")
+        if head[0] not in _DBF_VERSIONS:
+            raise ShapefileError(".dbf is not a dBASE table")
+        records, header_length, record_length = struct.unpack("<IHH", head[4:12])
+        if header_length < 33 or record_length < 1:
+            raise ShapefileError(".dbf header is malformed")
+        return header_length + records * record_length
+    return None
+
+
+class MemberWriter:
+    """Write one sidecar to disk, checking its header as soon as it arrives
+    and rejecting bytes past the size the header declares."""
+
+    def __init__(self, path: str, ext: str):
+        self.path = path
+        self.ext = ext
+        self.size = 0
+        self.head = b""
+        self.expected_size: Optional[int] = None
+        self.digest = hashlib.sha256()
+        self._file: BinaryIO = open(path, "wb")
+
+    def write(self, data: bytes):
+        self.size += len(data)
+        need = _HEADER_BYTES.get(self.ext)
+        if need and len(self.head) < need:
+            self.head += data[:need - len(self.head)]
+            if len(self.head) == need:
+                self.expected_size = _expected_size(self.ext, self.head)
+        if self.expected_size is not None and self.size > self.expected_size + _TRAILER_BYTES.get(self.ext, 0):
+            raise ShapefileError(f"{self.ext} is larger than its header declares")
+        if self.ext not in _HEADER_BYTES and self.size > MAX_TEXT_SIDECAR_BYTES:
+            raise ShapefileError(f"{self.ext} is too large")
+        self.digest.update(data)
+        self._file.write(data)
+
+    def close(self):
+        self._file.close()
+        need = _HEADER_BYTES.get(self.ext)
+        if need and len(self.head) < need:
+            _expected_size(self.ext, self.head)
+        if self.expected_size is not None and self.size < self.expected_size:
+            raise ShapefileError(f"{self.ext} is truncated: {self.size} of {self.expected_size} bytes")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._file.close()
+
+
+class ShapefileSet:
+    """Sidecars of one shapefile saved side by side as ``{base}{ext}``"""
+
+    def __init__(self, shp_path: str):
+        self.base_path = os.path.splitext(shp_path)[0]
+        self.members: Dict[str, MemberWriter] = {}
+
+    def open(self, ext: str) -> MemberWriter:
+        if ext in self.members:
+            raise ShapefileError(f"Duplicate {ext} member")
+        writer = MemberWriter(f"{self.base_path}{ext}", ext)
+        self.members[ext] = writer
+        return writer
+
+    def extract_zip(self, fileobj: BinaryIO):
+        """Copy the shapefile members of a zip archive member by member"""
+        try:
+            archive = zipfile.ZipFile(fileobj)
+        except zipfile.BadZipFile as e:
+            raise ShapefileError(f"Invalid zip archive: {e}")
+        with archive:
+            members = {}
+            stems = set()
+            for info in archive.infolist():
+                name = os.path.basename(info.filename)
+                if info.is_dir() or info.filename.startswith("__MACOSX/") or name.startswith("."):
+                    continue
+                stem, ext = os.path.splitext(name)
+                # .sbn, .qix, .xml и прочие индексы GeoServer строит сам
+                if ext.lower() not in SIDECAR_EXTENSIONS:
+                    continue
+                if ext.lower() in members:
+                    raise ShapefileError("Archive must contain exactly one shapefile")
+                members[ext.lower()] = info
+                stems.add(stem)
+            if len(stems) > 1:
+                raise ShapefileError("All shapefile members must share one name")
+            for ext, info in members.items():
+                with archive.open(info) as src, self.open(ext) as dst:
+                    while data := src.read(COPY_CHUNK_SIZE):
+                        dst.write(data)
+
+    def finish(self) -> str:
+        """Check the set is complete and consistent; return the .shp path"""
+        missing = [ext for ext in REQUIRED_EXTENSIONS if ext not in self.members]
+        if missing:
+            raise ShapefileError(f"Missing shapefile members: {', '.join(missing)}")
+        shx, dbf = self.members[".shx"], self.members[".dbf"]
+        shapes = (shx.size - 100) // 8
+        records, = struct.unpack("<I", dbf.head[4:8])
+        if shapes != records:
+            raise ShapefileError(f".shx indexes {shapes} shapes but .dbf has {records} records")
+        return f"{self.base_path}.shp"
+
+    @property
+    def content_hash(self) -> str:
+        """SHA-256 over the member digests, independent of file names and upload order"""
+        combined = hashlib.sha256()
+        for ext in sorted(self.members):
+            combined.update(f"{ext}:{self.members[ext].digest.hexdigest()}\n".encode())
+        return combined.hexdigest()
+
+    def discard(self):
+        for writer in self.members.values():
+            writer._file.close()
+        remove_sidecars(f"{self.base_path}.shp")
+
+
+def remove_sidecars(shp_path: str):
+    base_path = os.path.splitext(shp_path)[0]
+    for ext in SIDECAR_EXTENSIONS:
+        if os.path.exists(f"{base_path}{ext}"):
+            os.remove(f"{base_path}{ext}")
+
+
+def unpack_archive(archive_path: str, shp_path: str) -> Tuple[str, str]:
+    """Unpack an uploaded zip into sidecars next to ``shp_path`` and drop it.
+    Returns the .shp path and the content hash."""
+    parts = ShapefileSet(shp_path)
+    try:
+        with open(archive_path, "rb") as f:
+            parts.extract_zip(f)
+        return parts.finish(), parts.content_hash
+    except Exception:
+        parts.discard()
+        raise
+    finally:
+        os.remove(archive_path)
+
+
+# --- Потоковая сборка zip для GeoServer ---------------------------------
+
+_ZIP64_LIMIT = 0xFFFFFFFF
+_LOCAL_HEADER = struct.Struct("<IHHHHHIIIHH")
+_CENTRAL_HEADER = struct.Struct("<IHHHHHHIIIHHHHHII")
+_END_RECORD = struct.Struct("<IHHHHIIH")
+_ZIP64_END_RECORD = struct.Struct("<IQHHIIQQQQ")
+_ZIP64_LOCATOR = struct.Struct("<IIQI")
+
+
+class ZipMember(NamedTuple):
+    path: str
+    arcname: str
+    size: int
+    crc: int
+    dos_time: int
+    dos_date: int
+
+
+def _crc32(path: str) -> int:
+    crc = 0
+    with open(path, "rb") as f:
+        while data := f.read(COPY_CHUNK_SIZE):
+            crc = zlib.crc32(data, crc)
+    return crc
+
+
+def zip_members(shp_path: str, layer_name: str) -> List[ZipMember]:
+    """Describe the sidecars of a saved shapefile as stored zip entries.
+
+    CRCs are computed up front so every local header is complete: entries
+    need no data descriptors and the archive length is known in advance.
+    Blocking; run it in a thread.
+    """
+    base_path = os.path.splitext(shp_path)[0]
+    members = []
+    for ext in SIDECAR_EXTENSIONS:
+        path = f"{base_path}{ext}"
+        if not os.path.exists(path):
+            if ext in REQUIRED_EXTENSIONS:
+                raise ShapefileError(f"Missing shapefile member: {ext}")
+            continue
+        dt = time.localtime(os.path.getmtime(path))
+        members.append(ZipMember(
+            path=path,
+            arcname=f"{layer_name}{ext}",
+            size=os.path.getsize(path),
+            crc=_crc32(path),
+            dos_time=dt.tm_hour << 11 | dt.tm_min << 5 | dt.tm_sec // 2,
+            dos_date=max(dt.tm_year - 1980, 0) << 9 | dt.tm_mon << 5 | dt.tm_mday,
+        ))
+    return members
+
+
+def _local_header(member: ZipMember) -> bytes:
+    name = member.arcname.encode("utf-8")
+    extra = b""
+    size = member.size
+    if size >= _ZIP64_LIMIT:
+        extra = struct.pack("<HHQQ", 1, 16, size, size)
+        size = _ZIP64_LIMIT
+    version = 45 if extra else 20
+    header = _LOCAL_HEADER.pack(
+        0x04034B50, version, 0x800, zipfile.ZIP_STORED, member.dos_time, member.dos_date,
+        member.crc, size, size, len(name), len(extra),
+    )
+    return header + name + extra
+
+
+def _central_header(member: ZipMember, offset: int) -> bytes:
+    name = member.arcname.encode("utf-8")
+    fields = []
+    size = member.size
+    if size >= _ZIP64_LIMIT:
+        fields += [size, size]
+        size = _ZIP64_LIMIT
+    if offset >= _ZIP64_LIMIT:
+        fields.append(offset)
+        offset = _ZIP64_LIMIT
+    extra = struct.pack(f"<HH{len(fields)}Q", 1, 8 * len(fields), *fields) if fields else b""
+    version = 45 if extra else 20
+    header = _CENTRAL_HEADER.pack(
+        0x02014B50, 0x0300 | version, version, 0x800, zipfile.ZIP_STORED, member.dos_time, member.dos_date,
+        member.crc, size, size, len(name), len(extra), 0, 0, 0, 0o644 << 16, offset,
+    )
+    return header + name + extra
+
+
+def _end_records(count: int, directory_offset: int, directory_size: int) -> bytes:
+    records = b""
+    if directory_offset >= _ZIP64_LIMIT or directory_size >= _ZIP64_LIMIT or count >= 0xFFFF:
+        end_offset = directory_offset + directory_size
+        records += _ZIP64_END_RECORD.pack(0x06064B50, 44, 45, 45, 0, 0, count, count, directory_size, directory_offset)
+        records += _ZIP64_LOCATOR.pack(0x07064B50, 0, end_offset, 1)
+    records += _END_RECORD.pack(
+        0x06054B50, 0, 0, min(count, 0xFFFF), min(count, 0xFFFF),
+        min(directory_size, _ZIP64_LIMIT), min(directory_offset, _ZIP64_LIMIT), 0,
+    )
+    return records
+
+
+def _layout(members: List[ZipMember]):
+    offsets, position = [], 0
+    for member in members:
+        offsets.append(position)
+        position += len(_local_header(member)) + member.size
+    directory = b"".join(_central_header(m, o) for m, o in zip(members, offsets))
+    return position, directory + _end_records(len(members), position, len(directory))
+
+
+def zip_length(members: List[ZipMember]) -> int:
+    """Exact size of the archive ``iter_zip`` produces, for Content-Length"""
+    data_end, trailer = _layout(members)
+    return data_end + len(trailer)
+
+
+async def iter_zip(members: List[ZipMember], chunk_size: int = COPY_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """Stream a stored (uncompressed) zip of the members straight from disk"""
+    for member in members:
+        yield _local_header(member)
+        remaining = member.size
+        async with aiofiles.open(member.path, "rb") as f:
+            while remaining > 0:
+                data = await f.read(min(chunk_size, remaining))
+                if not data:
+                    raise ShapefileError(f"{member.arcname} changed while publishing")
+                remaining -= len(data)
+                yield data
+    yield _layout(members)[1]
@@ -0,0 +1,87 @@
+# backend/app/services/spatial.py
+import math
+from typing import List, Tuple
+
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Query
+
+from app.models.object import LunarObject
+
+# Средний радиус Луны, м
+MOON_RADIUS_M = 1737400.0
+
+# (min_lng, min_lat, max_lng, max_lat)
+BBox = Tuple[float, float, float, float]
+
+
+def parse_bbox(value: str) -> BBox:
+    parts = [float(v) for v in value.split(",")]
+    if len(parts) != 4:
+        raise ValueError("bbox must be min_lng,min_lat,max_lng,max_lat")
+    min_lng, min_lat, max_lng, max_lat = parts
+    if not (-90 <= min_lat <= max_lat <= 90 and -180 <= min_lng <= 180 and -180 <= max_lng <= 180):
+        raise ValueError("bbox is out of range")
+    return min_lng, min_lat, max_lng, max_lat
+
+
+def great_circle_distance(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Haversine distance on the lunar sphere, in metres"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * MOON_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+def radius_bbox(lat: float, lng: float, radius_m: float) -> List[BBox]:
+    """Envelope(s) that contain every point within ``radius_m`` of (lat, lng).
+
+    Returns two boxes when the circle crosses the antimeridian.
+    """
+    dlat = math.degrees(radius_m / MOON_RADIUS_M)
+    min_lat, max_lat = lat - dlat, lat + dlat
+    if min_lat <= -90 or max_lat >= 90 or dlat >= 90:
+        # Circle covers a pole: every longitude is in range
+        return [(-180.0, max(min_lat, -90.0), 180.0, min(max_lat, 90.0))]
+
+    dlng = math.degrees(math.asin(min(1.0, math.sin(math.radians(dlat)) / math.cos(math.radians(lat)))))
+    min_lng, max_lng = lng - dlng, lng + dlng
+    if min_lng < -180:
+        return [(min_lng + 360, min_lat, 180.0, max_lat), (-180.0, min_lat, max_lng, max_lat)]
+    if max_lng > 180:
+        return [(min_lng, min_lat, 180.0, max_lat), (-180.0, min_lat, max_lng - 360, max_lat)]
+    return [(min_lng, min_lat, max_lng, max_lat)]
+
+
+def split_bbox(bbox: BBox) -> List[BBox]:
+    """A bbox with min_lng > max_lng wraps around the antimeridian"""
+    min_lng, min_lat, max_lng, max_lat = bbox
+    if min_lng <= max_lng:
+        return [bbox]
+    return [(min_lng, min_lat, 180.0, max_lat), (-180.0, min_lat, max_lng, max_lat)]
+
+
+def object_point():
+    """The expression the GiST index on lunar_objects is built over"""
+    return func.ST_SetSRID(func.ST_MakePoint(LunarObject.lng, LunarObject.lat), 4326)
+
+
+def filter_bbox(query: Query, boxes: List[BBox]) -> Query:
+    """Restrict a LunarObject query to the given envelopes.
+
+    On PostGIS this is an index-backed ``&&`` against the expression index
+    on (lng, lat); elsewhere it falls back to range filters on the
+    (lat, lng) B-tree index.
+    """
+    if query.session.get_bind().dialect.name == "postgresql":
+        point = object_point()
+        conditions = [point.op("&&")(func.ST_MakeEnvelope(*box, 4326)) for box in boxes]
+    else:
+        conditions = [
+            and_(
+                LunarObject.lng.between(box[0], box[2]),
+                LunarObject.lat.between(box[1], box[3]),
+            )
+            for box in boxes
+        ]
+    return query.filter(or_(*conditions))
@@ -0,0 +1,262 @@
+# backend/app/services/telemetry.py
+import asyncio
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.crud.resource import get_resources
+from app.crud.telemetry import get_rollups, set_resource_levels, upsert_rollups
+from app.db.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+RESOURCES = ("energy", "water", "oxygen", "food")
+
+
+def to_epoch(value: datetime) -> float:
+    # Наивные datetime считаем UTC, как и created_at в остальных моделях
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def from_epoch(value: float) -> datetime:
+    return datetime.utcfromtimestamp(value)
+
+
+class Buckets(NamedTuple):
+    """Per-bucket aggregates as parallel arrays, sorted by start (epoch seconds)"""
+    start: np.ndarray
+    min: np.ndarray
+    max: np.ndarray
+    sum: np.ndarray
+    count: np.ndarray
+
+    @classmethod
+    def empty(cls) -> "Buckets":
+        return cls(*(np.empty(0) for _ in range(4)), np.empty(0, dtype=np.int64))
+
+    @classmethod
+    def concat(cls, parts: Sequence["Buckets"]) -> "Buckets":
+        parts = [p for p in parts if len(p.start)]
+        if not parts:
+            return cls.empty()
+        return cls(*(np.concatenate(column) for column in zip(*parts)))
+
+
+def regroup(buckets: Buckets, resolution: float) -> Buckets:
+    """Merge partial aggregates into buckets of ``resolution`` seconds"""
+    if not len(buckets.start):
+        return buckets
+    starts = np.floor(buckets.start / resolution) * resolution
+    order = np.argsort(starts, kind="stable")
+    starts = starts[order]
+    edges = np.flatnonzero(np.r_[True, starts[1:] != starts[:-1]])
+    return Buckets(
+        starts[edges],
+        np.minimum.reduceat(buckets.min[order], edges),
+        np.maximum.reduceat(buckets.max[order], edges),
+        np.add.reduceat(buckets.sum[order], edges),
+        np.add.reduceat(buckets.count[order], edges),
+    )
+
+
+def aggregate(ts: np.ndarray, values: np.ndarray, resolution: float) -> Buckets:
+    return regroup(Buckets(ts, values, values, values, np.ones(len(ts), dtype=np.int64)), resolution)
+
+
+class RingBuffer:
+    """Fixed-capacity (timestamp, value) buffer on preallocated NumPy arrays"""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.ts = np.zeros(capacity)
+        self.values = np.zeros(capacity)
+        self.size = 0
+        self._next = 0
+
+    def extend(self, ts: np.ndarray, values: np.ndarray):
+        if len(ts) > self.capacity:
+            ts, values = ts[-self.capacity:], values[-self.capacity:]
+        n = len(ts)
+        first = min(n, self.capacity - self._next)
+        self.ts[self._next:self._next + first] = ts[:first]
+        self.values[self._next:self._next + first] = values[:first]
+        # Остаток переносим в начало массива
+        self.ts[:n - first] = ts[first:]
+        self.values[:n - first] = values[first:]
+        self._next = (self._next + n) % self.capacity
+        self.size = min(self.capacity, self.size + n)
+
+    def window(self, start: float, end: float) -> Tuple[np.ndarray, np.ndarray]:
+        ts, values = self.ts[:self.size], self.values[:self.size]
+        mask = (ts >= start) & (ts < end)
+        ts, values = ts[mask], values[mask]
+        order = np.argsort(ts, kind="stable")
+        return ts[order], values[order]
+
+
+class TelemetryStore:
+    """Recent readings in per-resource ring buffers plus min/max/avg rollups.
+
+    Readings received since the last flush are kept aside and merged into
+    the ``resource_rollups`` table every ``flush_seconds``; queries merge
+    them with the stored rollups so the newest buckets are never missing.
+    """
+
+    def __init__(self, capacity: int, resolutions: Sequence[int], flush_seconds: float):
+        self.capacity = capacity
+        self.resolutions = sorted(resolutions)
+        self.flush_seconds = flush_seconds
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._buffers = {name: RingBuffer(capacity) for name in RESOURCES}
+        self._pending: Dict[str, List[Tuple[np.ndarray, np.ndarray]]] = {name: [] for name in RESOURCES}
+        self._latest: Dict[str, Tuple[float, float]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"readings": 0, "flushes": 0, "flush_errors": 0}
+
+    def ingest(self, resource: str, ts: np.ndarray, values: np.ndarray):
+        order = np.argsort(ts, kind="stable")
+        ts, values = ts[order], values[order]
+        with self._lock:
+            self._buffers[resource].extend(ts, values)
+            self._pending[resource].append((ts, values))
+            if resource not in self._latest or ts[-1] >= self._latest[resource][0]:
+                self._latest[resource] = (float(ts[-1]), float(values[-1]))
+            self.stats["readings"] += len(ts)
+
+    def latest(self) -> Dict[str, Tuple[float, float]]:
+        with self._lock:
+            return dict(self._latest)
+
+    def _pending_arrays(self, resource: str) -> Tuple[np.ndarray, np.ndarray]:
+        chunks = self._pending[resource]
+        if not chunks:
+            return np.empty(0), np.empty(0)
+        return np.concatenate([c[0] for c in chunks]), np.concatenate([c[1] for c in chunks])
+
+    def flush(self, db) -> int:
+        """Merge readings received since the last flush into the rollup table"""
+        with self._flush_lock:
+            with self._lock:
+                pending = {name: self._pending_arrays(name) for name in RESOURCES}
+                for name in RESOURCES:
+                    self._pending[name] = []
+                latest = dict(self._latest)
+            flushed = 0
+            try:
+                for name, (ts, values) in pending.items():
+                    if not len(ts):
+                        continue
+                    for resolution in self.resolutions:
+                        upsert_rollups(db, name, resolution, aggregate(ts, values, resolution))
+                    flushed += len(ts)
+                if latest:
+                    set_resource_levels(db, {name: (from_epoch(t), v) for name, (t, v) in latest.items()})
+                db.commit()
+            except Exception:
+                db.rollback()
+                with self._lock:
+                    # Вернём данные в очередь, но не больше, чем помещается в буфер
+                    for name, (ts, values) in pending.items():
+                        if len(ts):
+                            self._pending[name].insert(0, (ts[-self.capacity:], values[-self.capacity:]))
+                    self.stats["flush_errors"] += 1
+                raise
+            self.stats["flushes"] += 1
+            return flushed
+
+    def series(self, db, resource: str, start: float, end: float, step: float) -> Tuple[int, str, Buckets]:
+        """Buckets of about ``step`` seconds overlapping [start, end) from the
+        coarsest rollup that is not coarser than ``step``; finer steps are
+        computed from the ring buffer. Returns (resolution, source, buckets)."""
+        resolution = max((r for r in self.resolutions if r <= step), default=None)
+        if resolution is None:
+            step = max(int(step), 1)
+            with self._lock:
+                ts, values = self._buffers[resource].window(np.floor(start / step) * step, end)
+            return step, "raw", aggregate(ts, values, step)
+
+        # Шаг кратен разрешению, чтобы корзины объединялись без потерь;
+        # корзину, в которую попадает start, возвращаем целиком
+        step = int(step // resolution) * resolution
+        start = np.floor(start / step) * step
+        stored = get_rollups(db, resource, resolution, from_epoch(start), from_epoch(end))
+        stored = Buckets(
+            np.array([to_epoch(r.bucket_start) for r in stored]),
+            np.array([r.min for r in stored]),
+            np.array([r.max for r in stored]),
+            np.array([r.sum for r in stored]),
+            np.array([r.count for r in stored], dtype=np.int64),
+        )
+        with self._lock:
+            ts, values = self._pending_arrays(resource)
+        mask = (ts >= start) & (ts < end)
+        pending = aggregate(ts[mask], values[mask], resolution)
+        return step, f"rollup_{resolution}", regroup(Buckets.concat([stored, pending]), step)
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_seconds)
+            try:
+                await run_in_threadpool(self._flush_once)
+            except Exception:
+                logger.exception("Telemetry flush failed")
+
+    def _flush_once(self):
+        db = SessionLocal()
+        try:
+            self.flush(db)
+        finally:
+            db.close()
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await run_in_threadpool(self._flush_once)
+        except Exception:
+            logger.exception("Final telemetry flush failed")
+
+
+telemetry_store = TelemetryStore(
+    settings.TELEMETRY_BUFFER_SIZE,
+    settings.TELEMETRY_ROLLUP_RESOLUTIONS,
+    settings.TELEMETRY_FLUSH_SECONDS,
+)
+
+
+def current_levels(db) -> Dict[str, dict]:
+    """Resource levels for /resources: stored values overlaid with the
+    latest reading this process has received"""
+    latest = telemetry_store.latest()
+    levels = {}
+    for resource in get_resources(db):
+        level = {
+            "current_level": resource.current_level,
+            "capacity": resource.capacity,
+            "unit": resource.unit,
+            "status": resource.status,
+            "last_updated": resource.last_updated,
+        }
+        if resource.name in latest:
+            at, value = latest[resource.name]
+            level["current_level"] = value
+            level["last_updated"] = from_epoch(at)
+        levels[resource.name] = level
+    return levels
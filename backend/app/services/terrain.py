@@ -0,0 +1,412 @@
+# backend/app/services/terrain.py
+import asyncio
+import hashlib
+import io
+import math
+import os
+import shutil
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Awaitable, Callable, Dict, NamedTuple, Optional, Tuple
+
+import numpy as np
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.services.raster import _gdal
+from app.services.spatial import MOON_RADIUS_M
+from app.services.tile_cache import scan_cache
+
+DERIVATIVES = ("slope", "aspect", "hillshade")
+# slope и aspect — Float32 в градусах, hillshade — Byte 1..255 (0 — нет данных)
+FLOAT_NODATA = -9999.0
+HILLSHADE_NODATA = 0
+OUTPUT_BLOCK = 256
+
+# Колбэк прогресса сборки слоя: доля готовых тайлов
+ProgressCallback = Callable[[float], Awaitable[None]]
+
+
+class TerrainParams(NamedTuple):
+    z_factor: float = 1.0
+    azimuth: float = 315.0  # hillshade: sun direction, degrees clockwise from north
+    altitude: float = 45.0  # hillshade: sun elevation above the horizon, degrees
+
+    def variant(self, derivative: str) -> str:
+        """Cache directory of the parameters that affect ``derivative``"""
+        if derivative == "hillshade":
+            return f"z{self.z_factor:g}-az{self.azimuth:g}-alt{self.altitude:g}"
+        if derivative == "slope":
+            return f"z{self.z_factor:g}"
+        return "default"
+
+
+class Grid(NamedTuple):
+    width: int
+    height: int
+    geotransform: Tuple[float, float, float, float, float, float]
+    projection: str
+    tile_size: int
+
+    @property
+    def cols(self) -> int:
+        return -(-self.width // self.tile_size)
+
+    @property
+    def rows(self) -> int:
+        return -(-self.height // self.tile_size)
+
+
+def _is_geographic(projection: str) -> bool:
+    # GeoServer публикует растры как EPSG:4326, так что без проекции — градусы
+    return not projection or not projection.lstrip().startswith(("PROJCS", "PROJCRS"))
+
+
+def describe(file_path: str, tile_size: int) -> Grid:
+    ds = _gdal().Open(file_path)
+    try:
+        return Grid(ds.RasterXSize, ds.RasterYSize, tuple(ds.GetGeoTransform()), ds.GetProjection(), tile_size)
+    finally:
+        ds = None
+
+
+def _read_halo(band, nodata: Optional[float], grid: Grid, x: int, y: int, w: int, h: int) -> np.ndarray:
+    """The tile window plus a one-pixel border, so the 3x3 kernel sees the
+    neighbouring tiles; at the raster edge the outermost pixels are repeated"""
+    x0, y0 = max(x - 1, 0), max(y - 1, 0)
+    x1, y1 = min(x + w + 1, grid.width), min(y + h + 1, grid.height)
+    data = band.ReadAsArray(x0, y0, x1 - x0, y1 - y0).astype(np.float64)
+    if nodata is not None:
+        data[data == nodata] = np.nan
+    pad = ((y0 - (y - 1), y + h + 1 - y1), (x0 - (x - 1), x + w + 1 - x1))
+    return np.pad(data, pad, mode="edge")
+
+
+def _gradients(z: np.ndarray, grid: Grid, y: int) -> Tuple[np.ndarray, np.ndarray]:
+    """East and north elevation gradients (Horn's 3x3 kernel) of a haloed window"""
+    a, b, c = z[:-2, :-2], z[:-2, 1:-1], z[:-2, 2:]
+    d, f = z[1:-1, :-2], z[1:-1, 2:]
+    g, h, i = z[2:, :-2], z[2:, 1:-1], z[2:, 2:]
+    dz_col = ((c + 2 * f + i) - (a + 2 * d + g)) / 8
+    dz_row = ((g + 2 * h + i) - (a + 2 * b + c)) / 8
+
+    gt = grid.geotransform
+    if _is_geographic(grid.projection):
+        # Размер пикселя в метрах: по долготе сжимается к полюсам
+        metres_per_degree = math.pi / 180 * MOON_RADIUS_M
+        lat = gt[3] + (y + np.arange(z.shape[0] - 2) + 0.5) * gt[5]
+        dx = abs(gt[1]) * metres_per_degree * np.clip(np.cos(np.radians(lat)), 1e-6, None)[:, None]
+        dy = abs(gt[5]) * metres_per_degree
+    else:
+        dx, dy = abs(gt[1]), abs(gt[5])
+    # Знак шага пикселя задает направление осей: строки обычно идут на юг
+    return dz_col / dx * math.copysign(1, gt[1]), dz_row / dy * math.copysign(1, gt[5])
+
+
+def slope(gx: np.ndarray, gy: np.ndarray, params: TerrainParams) -> np.ndarray:
+    out = np.degrees(np.arctan(params.z_factor * np.hypot(gx, gy)))
+    return np.where(np.isnan(out), FLOAT_NODATA, out).astype(np.float32)
+
+
+def aspect(gx: np.ndarray, gy: np.ndarray, params: TerrainParams) -> np.ndarray:
+    # Направление спуска по часовой стрелке от севера; у плоских участков его нет
+    out = np.mod(np.degrees(np.arctan2(-gx, -gy)), 360.0)
+    flat = (gx == 0) & (gy == 0)
+    return np.where(np.isnan(out) | flat, FLOAT_NODATA, out).astype(np.float32)
+
+
+def hillshade(gx: np.ndarray, gy: np.ndarray, params: TerrainParams) -> np.ndarray:
+    azimuth, altitude = math.radians(params.azimuth), math.radians(params.altitude)
+    gx, gy = gx * params.z_factor, gy * params.z_factor
+    # Косинус угла между нормалью (-gx, -gy, 1) и направлением на Солнце
+    shade = (
+        -gx * math.sin(azimuth) * math.cos(altitude) - gy * math.cos(azimuth) * math.cos(altitude)
+        + math.sin(altitude)
+    ) / np.sqrt(gx * gx + gy * gy + 1)
+    out = 1 + np.round(254 * np.clip(shade, 0, 1))
+    return np.where(np.isnan(out), HILLSHADE_NODATA, out).astype(np.uint8)
+
+
+KERNELS = {"slope": slope, "aspect": aspect, "hillshade": hillshade}
+
+
+# Выполняется в дочерних процессах, поэтому модульная функция
+def _derive_tile(file_path: str, grid: Grid, derivative: str, tx: int, ty: int, params: TerrainParams) -> np.ndarray:
+    x, y = tx * grid.tile_size, ty * grid.tile_size
+    w, h = min(grid.tile_size, grid.width - x), min(grid.tile_size, grid.height - y)
+    ds = _gdal().Open(file_path)
+    try:
+        band = ds.GetRasterBand(1)
+        z = _read_halo(band, band.GetNoDataValue(), grid, x, y, w, h)
+    finally:
+        ds = None
+    gx, gy = _gradients(z, grid, y)
+    return KERNELS[derivative](gx, gy, params)
+
+
+def _load(path: str) -> Optional[np.ndarray]:
+    try:
+        return np.load(path)
+    except FileNotFoundError:
+        return None
+
+
+def _save(path: str, data: np.ndarray) -> int:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, data)
+    os.replace(tmp_path, path)
+    return os.path.getsize(path)
+
+
+def _create_output(out_path: str, grid: Grid, derivative: str):
+    gdal = _gdal()
+    is_byte = derivative == "hillshade"
+    ds = gdal.GetDriverByName("GTiff").Create(
+        out_path, grid.width, grid.height, 1, gdal.GDT_Byte if is_byte else gdal.GDT_Float32,
+        options=["TILED=YES", f"BLOCKXSIZE={OUTPUT_BLOCK}", f"BLOCKYSIZE={OUTPUT_BLOCK}",
+                 "COMPRESS=DEFLATE", "BIGTIFF=IF_SAFER"],
+    )
+    ds.SetGeoTransform(grid.geotransform)
+    if grid.projection:
+        ds.SetProjection(grid.projection)
+    ds.GetRasterBand(1).SetNoDataValue(HILLSHADE_NODATA if is_byte else FLOAT_NODATA)
+    return ds
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def render_png(derivative: str, data: np.ndarray) -> bytes:
+    """8-bit grey + alpha preview of a tile: slope 0-90 and aspect 0-360
+    degrees are scaled to 0-255, nodata is transparent"""
+    from PIL import Image
+
+    if derivative == "hillshade":
+        grey, valid = data, data != HILLSHADE_NODATA
+    else:
+        valid = data != FLOAT_NODATA
+        scale = 255 / (90.0 if derivative == "slope" else 360.0)
+        grey = np.clip(np.where(valid, data, 0) * scale, 0, 255)
+    pixels = np.dstack((grey, valid * 255)).astype(np.uint8)
+    out = io.BytesIO()
+    Image.fromarray(pixels).save(out, format="PNG")
+    return out.getvalue()
+
+
+class TerrainEngine:
+    """Slope, aspect and hillshade of DEMs, tile by tile.
+
+    Tiles are ``tile_size`` pixels of the source raster read with a
+    one-pixel halo, computed in a process pool and cached on disk as
+    ``{root}/{layer}/{derivative}/{variant}/{tx}/{ty}.npy``; sources are
+    immutable once published, so cached tiles never go stale. The disk
+    cache is an LRU bounded by ``disk_bytes``, indexed from file mtimes on
+    first use. Concurrent requests for a tile share one computation.
+    """
+
+    def __init__(self, root: str, workers: int, tile_size: int, disk_bytes: int):
+        self.root = root
+        self.workers = workers
+        self.tile_size = tile_size
+        self.disk_limit = disk_bytes
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._grids: Dict[str, Grid] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # Путь тайла относительно root -> размер; порядок LRU. Меняется и из пула потоков
+        self._disk: "OrderedDict[str, int]" = OrderedDict()
+        self._disk_size = 0
+        self._disk_lock = threading.Lock()
+        self._index: Optional[asyncio.Future] = None
+        self.stats = {"disk_hits": 0, "computed": 0, "coalesced": 0, "disk_evictions": 0}
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            return self._executor
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def grid(self, layer: str, file_path: str) -> Grid:
+        grid = self._grids.get(layer)
+        if grid is None:
+            grid = self._grids[layer] = await run_in_threadpool(describe, file_path, self.tile_size)
+        return grid
+
+    def _path(self, layer: str, derivative: str, params: TerrainParams, tx: int, ty: int) -> str:
+        return os.path.join(self.root, layer, derivative, params.variant(derivative), str(tx), f"{ty}.npy")
+
+    async def load_index(self):
+        """Index the disk cache once; concurrent callers wait for the same scan"""
+        if self._index is None:
+            self._index = asyncio.ensure_future(self._load_index())
+        await asyncio.shield(self._index)
+
+    async def _load_index(self):
+        entries = await run_in_threadpool(scan_cache, self.root, ".npy")
+        with self._disk_lock:
+            for _, parts, size in entries:
+                key = os.path.join(*parts)
+                if key not in self._disk:
+                    self._disk[key] = size
+                    self._disk_size += size
+        await run_in_threadpool(self._evict)
+
+    def _touch(self, path: str):
+        with self._disk_lock:
+            key = os.path.relpath(path, self.root)
+            if key in self._disk:
+                self._disk.move_to_end(key)
+
+    def _forget(self, key: str):
+        size = self._disk.pop(key, None)
+        if size is not None:
+            self._disk_size -= size
+
+    def _store(self, path: str, data: np.ndarray):
+        """Write a tile to the disk cache and evict the least recently used
+        ones over the budget (blocking)"""
+        if data.nbytes > self.disk_limit:
+            return
+        size = _save(path, data)
+        with self._disk_lock:
+            key = os.path.relpath(path, self.root)
+            self._forget(key)
+            self._disk[key] = size
+            self._disk_size += size
+        self._evict()
+
+    def _evict(self):
+        victims = []
+        with self._disk_lock:
+            while self._disk_size > self.disk_limit and self._disk:
+                key, size = self._disk.popitem(last=False)
+                self._disk_size -= size
+                victims.append(key)
+        for key in victims:
+            try:
+                os.remove(os.path.join(self.root, key))
+            except FileNotFoundError:
+                pass
+            self.stats["disk_evictions"] += 1
+
+    async def _compute(self, layer: str, file_path: str, derivative: str, tx: int, ty: int,
+                       params: TerrainParams) -> np.ndarray:
+        grid = await self.grid(layer, file_path)
+        data = await asyncio.get_running_loop().run_in_executor(
+            self.executor, _derive_tile, file_path, grid, derivative, tx, ty, params
+        )
+        self.stats["computed"] += 1
+        return data
+
+    async def tile(self, layer: str, file_path: str, derivative: str, tx: int, ty: int,
+                   params: TerrainParams) -> np.ndarray:
+        """Derivative values of one tile, from the disk cache or computed"""
+        path = self._path(layer, derivative, params, tx, ty)
+        inflight = self._inflight.get(path)
+        if inflight is not None:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[path] = future
+        try:
+            await self.load_index()
+            data = await run_in_threadpool(_load, path)
+            if data is not None:
+                self.stats["disk_hits"] += 1
+                self._touch(path)
+            else:
+                data = await self._compute(layer, file_path, derivative, tx, ty, params)
+                await run_in_threadpool(self._store, path, data)
+            future.set_result(data)
+        except Exception as e:
+            future.set_exception(e)
+            # Ошибку получит каждый ожидающий, помечаем её как полученную
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(path, None)
+        return data
+
+    async def render(self, layer: str, file_path: str, derivative: str, params: TerrainParams, out_path: str,
+                     on_progress: Optional[ProgressCallback] = None) -> str:
+        """Write the whole derivative as a tiled GeoTIFF with the source's
+        georeferencing; returns the SHA-256 of the file.
+
+        Tiles are computed directly, bypassing the disk cache: a full render
+        would otherwise write a float copy of the whole DEM into it.
+        """
+        grid = await self.grid(layer, file_path)
+        ds = await run_in_threadpool(_create_output, out_path, grid, derivative)
+        band = ds.GetRasterBand(1)
+        total = grid.cols * grid.rows
+        report_every = max(1, total // 20)
+        tiles = ((tx, ty) for ty in range(grid.rows) for tx in range(grid.cols))
+
+        def start(tile: Tuple[int, int]):
+            return tile, asyncio.ensure_future(self._compute(layer, file_path, derivative, *tile, params))
+
+        # Скользящее окно: не больше двух тайлов на процесс в работе, запись строго по порядку,
+        # чтобы одинаковый результат давал одинаковый файл (и хеш для дедупликации)
+        window = deque(start(tile) for tile in islice(tiles, self.workers * 2))
+        done = 0
+        try:
+            while window:
+                (tx, ty), task = window[0]
+                data = await task
+                window.popleft()
+                next_tile = next(tiles, None)
+                if next_tile is not None:
+                    window.append(start(next_tile))
+                # Запись идет по одному тайлу: датасет GDAL не потокобезопасен
+                await run_in_threadpool(band.WriteArray, data, tx * grid.tile_size, ty * grid.tile_size)
+                done += 1
+                if on_progress and (done % report_every == 0 or done == total):
+                    await on_progress(done / total)
+            await run_in_threadpool(band.FlushCache)
+        finally:
+            for _, task in window:
+                task.cancel()
+            band = None
+            ds = None
+        return await run_in_threadpool(_file_sha256, out_path)
+
+    def forget(self, layer: str):
+        """Drop the cached tiles of a layer that is being deleted (blocking)"""
+        self._grids.pop(layer, None)
+        with self._disk_lock:
+            for key in [key for key in self._disk if key.split(os.sep, 1)[0] == layer]:
+                self._forget(key)
+        shutil.rmtree(os.path.join(self.root, layer), ignore_errors=True)
+
+    def snapshot(self) -> dict:
+        return {
+            **self.stats,
+            "inflight": len(self._inflight),
+            "disk_bytes": self._disk_size,
+            "disk_limit": self.disk_limit,
+            "disk_tiles": len(self._disk),
+        }
+
+
+terrain = TerrainEngine(
+    settings.TERRAIN_CACHE_PATH,
+    settings.TERRAIN_WORKERS,
+    settings.TERRAIN_TILE_SIZE,
+    settings.TERRAIN_CACHE_BYTES,
+)
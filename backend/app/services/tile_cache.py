@@ -0,0 +1,247 @@
+# backend/app/services/tile_cache.py
+import asyncio
+import hashlib
+import os
+import shutil
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+import aiofiles
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+
+TileKey = Tuple[str, int, int, int]  # (layer, z, x, y)
+
+
+def scan_cache(root: str, suffix: str) -> List[Tuple[float, List[str], int]]:
+    """Files under ``root`` ending with ``suffix`` as (mtime, path parts
+    relative to root, size), oldest first (blocking)"""
+    entries = []
+    if os.path.isdir(root):
+        for dirpath, _, filenames in os.walk(root):
+            for filename in filenames:
+                if not filename.endswith(suffix):
+                    continue
+                path = os.path.join(dirpath, filename)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, os.path.relpath(path, root).split(os.sep), st.st_size))
+    entries.sort()
+    return entries
+
+
+class Tile:
+    __slots__ = ("data", "etag")
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.etag = f'"{hashlib.sha1(data).hexdigest()}"'
+
+
+class TileCache:
+    """Two-tier tile cache: a byte-bounded in-memory LRU over a byte-bounded
+    on-disk store.
+
+    Disk files are laid out as ``{root}/{layer}/{z}/{x}/{y}.png``; the disk
+    LRU order lives in memory and is rebuilt from file mtimes by
+    ``load_index``, in a thread on first use rather than at import, so a
+    large cache does not slow down worker boot.
+    """
+
+    def __init__(self, root: str, memory_bytes: int, disk_bytes: int):
+        self.root = root
+        self.memory_limit = memory_bytes
+        self.disk_limit = disk_bytes
+        self._memory: "OrderedDict[TileKey, Tile]" = OrderedDict()
+        self._memory_size = 0
+        self._disk: "OrderedDict[TileKey, int]" = OrderedDict()
+        self._disk_size = 0
+        self._layers: Dict[str, Set[TileKey]] = {}
+        self._inflight: Dict[TileKey, asyncio.Future] = {}
+        self._index: Optional[asyncio.Future] = None
+        self.stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "not_modified": 0,
+            "bytes_served": 0,
+            "bytes_fetched": 0,
+            "memory_evictions": 0,
+            "disk_evictions": 0,
+        }
+
+    def _path(self, key: TileKey) -> str:
+        layer, z, x, y = key
+        return os.path.join(self.root, layer, str(z), str(x), f"{y}.png")
+
+    async def load_index(self):
+        """Index the disk tier once; concurrent callers wait for the same scan"""
+        if self._index is None:
+            self._index = asyncio.ensure_future(self._load_disk_index())
+        await asyncio.shield(self._index)
+
+    async def _load_disk_index(self):
+        for _, parts, size in await run_in_threadpool(scan_cache, self.root, ".png"):
+            if len(parts) != 4:
+                continue
+            try:
+                key = (parts[0], int(parts[1]), int(parts[2]), int(parts[3][:-4]))
+            except ValueError:
+                continue
+            if key in self._disk:
+                continue
+            self._disk[key] = size
+            self._disk_size += size
+            self._layers.setdefault(key[0], set()).add(key)
+
+    # --- memory tier ---
+
+    def _memory_get(self, key: TileKey) -> Optional[Tile]:
+        tile = self._memory.get(key)
+        if tile is not None:
+            self._memory.move_to_end(key)
+        return tile
+
+    def _memory_put(self, key: TileKey, tile: Tile):
+        if len(tile.data) > self.memory_limit:
+            return
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_size -= len(old.data)
+        self._memory[key] = tile
+        self._memory_size += len(tile.data)
+        while self._memory_size > self.memory_limit:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_size -= len(evicted.data)
+            self.stats["memory_evictions"] += 1
+
+    # --- disk tier ---
+
+    async def _disk_get(self, key: TileKey) -> Optional[Tile]:
+        if key not in self._disk:
+            return None
+        try:
+            async with aiofiles.open(self._path(key), "rb") as f:
+                data = await f.read()
+        except FileNotFoundError:
+            self._disk_forget(key)
+            return None
+        self._disk.move_to_end(key)
+        return Tile(data)
+
+    async def _disk_put(self, key: TileKey, tile: Tile):
+        if len(tile.data) > self.disk_limit:
+            return
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        async with aiofiles.open(tmp_path, "wb") as f:
+            await f.write(tile.data)
+        os.replace(tmp_path, path)
+
+        self._disk_forget(key)
+        self._disk[key] = len(tile.data)
+        self._disk_size += len(tile.data)
+        self._layers.setdefault(key[0], set()).add(key)
+        while self._disk_size > self.disk_limit:
+            evicted, _ = next(iter(self._disk.items()))
+            self._disk_forget(evicted)
+            try:
+                os.remove(self._path(evicted))
+            except FileNotFoundError:
+                pass
+            self.stats["disk_evictions"] += 1
+
+    def _disk_forget(self, key: TileKey):
+        size = self._disk.pop(key, None)
+        if size is not None:
+            self._disk_size -= size
+        keys = self._layers.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+
+    # --- public API ---
+
+    async def get(self, key: TileKey, fetch: Callable[[], Awaitable[bytes]]) -> Tile:
+        """Return a tile from memory, disk or ``fetch``; concurrent misses on
+        the same tile share one upstream request."""
+        tile = self._memory_get(key)
+        if tile is not None:
+            self.stats["memory_hits"] += 1
+            return self._served(tile)
+
+        await self.load_index()
+        tile = await self._disk_get(key)
+        if tile is not None:
+            self.stats["disk_hits"] += 1
+            self._memory_put(key, tile)
+            return self._served(tile)
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.stats["coalesced"] += 1
+            return self._served(await asyncio.shield(inflight))
+
+        self.stats["misses"] += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            tile = Tile(await fetch())
+            self.stats["bytes_fetched"] += len(tile.data)
+            self._memory_put(key, tile)
+            await self._disk_put(key, tile)
+            future.set_result(tile)
+        except Exception as e:
+            future.set_exception(e)
+            # Ошибку получит каждый ожидающий, помечаем её как полученную
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+        return self._served(tile)
+
+    def _served(self, tile: Tile) -> Tile:
+        self.stats["bytes_served"] += len(tile.data)
+        return tile
+
+    def record_not_modified(self, tile: Tile):
+        # 304: the body was not sent after all
+        self.stats["not_modified"] += 1
+        self.stats["bytes_served"] -= len(tile.data)
+
+    async def invalidate_layer(self, layer: str):
+        # Индекс нужен целиком, иначе ключи слоя из еще не прочитанного индекса останутся
+        await self.load_index()
+        for key in [key for key in self._memory if key[0] == layer]:
+            self._memory_size -= len(self._memory.pop(key).data)
+        for key in list(self._layers.pop(layer, ())):
+            size = self._disk.pop(key, None)
+            if size is not None:
+                self._disk_size -= size
+        await run_in_threadpool(shutil.rmtree, os.path.join(self.root, layer), True)
+
+    def snapshot(self) -> dict:
+        lookups = sum(self.stats[k] for k in ("memory_hits", "disk_hits", "coalesced", "misses"))
+        hits = lookups - self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_ratio": hits / lookups if lookups else 0.0,
+            "memory_bytes": self._memory_size,
+            "memory_limit": self.memory_limit,
+            "memory_tiles": len(self._memory),
+            "disk_bytes": self._disk_size,
+            "disk_limit": self.disk_limit,
+            "disk_tiles": len(self._disk),
+            "disk_indexed": self._index is not None and self._index.done(),
+        }
+
+
+tile_cache = TileCache(
+    settings.TILE_CACHE_PATH,
+    settings.TILE_CACHE_MEMORY_BYTES,
+    settings.TILE_CACHE_DISK_BYTES,
+)
@@ -0,0 +1,157 @@
+# backend/app/services/uploads.py
+import hashlib
+import os
+import shutil
+import uuid
+from typing import AsyncIterator, List, Optional, Tuple
+
+import aiofiles
+
+from app.core.config import settings
+
+
+class ChunkError(Exception):
+    pass
+
+
+def session_dir(session_id: str) -> str:
+    return os.path.join(settings.UPLOAD_STAGING_PATH, session_id)
+
+
+def chunk_path(session_id: str, index: int) -> str:
+    return os.path.join(session_dir(session_id), f"{index:06d}.part")
+
+
+def expected_chunk_size(total_size: int, chunk_size: int, index: int) -> int:
+    return min(chunk_size, total_size - index * chunk_size)
+
+
+async def write_chunk(
+    session_id: str,
+    index: int,
+    stream: AsyncIterator[bytes],
+    expected_size: int,
+    expected_sha256: Optional[str] = None,
+) -> Tuple[int, str]:
+    """Stream a chunk to the staging directory, hashing it on the way.
+
+    The chunk is written to a private temp file and renamed into place only
+    after size and checksum are verified, so concurrent or repeated PUTs of
+    the same index never leave a torn chunk behind.
+    """
+    os.makedirs(session_dir(session_id), exist_ok=True)
+    final_path = chunk_path(session_id, index)
+    tmp_path = f"{final_path}.{uuid.uuid4().hex}.tmp"
+    digest = hashlib.sha256()
+    size = 0
+
+    try:
+        async with aiofiles.open(tmp_path, "wb") as f:
+            async for data in stream:
+                size += len(data)
+                if size > expected_size:
+                    raise ChunkError(f"Chunk {index} is larger than {expected_size} bytes")
+                digest.update(data)
+                await f.write(data)
+
+        if size != expected_size:
+            raise ChunkError(f"Chunk {index} has {size} bytes, expected {expected_size}")
+        sha256 = digest.hexdigest()
+        if expected_sha256 and expected_sha256.lower() != sha256:
+            raise ChunkError(f"Chunk {index} checksum mismatch")
+
+        os.replace(tmp_path, final_path)
+        return size, sha256
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def received_chunks(session_id: str) -> List[int]:
+    try:
+        names = os.listdir(session_dir(session_id))
+    except FileNotFoundError:
+        return []
+    return sorted(int(name[:-5]) for name in names if name.endswith(".part"))
+
+
+def received_ranges(chunks: List[int], chunk_size: int, total_size: int) -> List[List[int]]:
+    """Merge received chunk indices into [start, end) byte ranges"""
+    ranges: List[List[int]] = []
+    for index in chunks:
+        start = index * chunk_size
+        end = start + expected_chunk_size(total_size, chunk_size, index)
+        if ranges and ranges[-1][1] == start:
+            ranges[-1][1] = end
+        else:
+            ranges.append([start, end])
+    return ranges
+
+
+def _copy_fd(src_fd: int, dst_fd: int, count: int):
+    """Copy ``count`` bytes between descriptors without going through userspace.
+
+    copy_file_range lets the filesystem reflink or server-side copy the data
+    (btrfs, XFS, NFS 4.2); sendfile is the next best thing. Both advance the
+    file offsets, so the chunks are appended in order.
+    """
+    if hasattr(os, "copy_file_range"):
+        try:
+            while count > 0:
+                copied = os.copy_file_range(src_fd, dst_fd, count)
+                if copied == 0:
+                    break
+                count -= copied
+            if count == 0:
+                return
+        except OSError:
+            pass
+    if count > 0 and hasattr(os, "sendfile"):
+        try:
+            while count > 0:
+                sent = os.sendfile(dst_fd, src_fd, None, count)
+                if sent == 0:
+                    break
+                count -= sent
+            if count == 0:
+                return
+        except OSError:
+            pass
+    while count > 0:
+        data = os.read(src_fd, min(count, 1024 * 1024))
+        if not data:
+            raise ChunkError("Chunk ended before expected size")
+        os.write(dst_fd, data)
+        count -= len(data)
+
+
+def chunks_sha256(session_id: str, total_chunks: int) -> str:
+    """SHA-256 of the assembled file, read from the chunks (blocking).
+
+    A separate read pass, so ``assemble`` keeps its zero-copy path; the two
+    can run side by side.
+    """
+    digest = hashlib.sha256()
+    for index in range(total_chunks):
+        with open(chunk_path(session_id, index), "rb") as src:
+            while data := src.read(1024 * 1024):
+                digest.update(data)
+    return digest.hexdigest()
+
+
+def assemble(session_id: str, total_chunks: int, dest_path: str):
+    """Concatenate all chunks into ``dest_path`` (blocking, run in a thread)"""
+    tmp_path = f"{dest_path}.assembling"
+    try:
+        with open(tmp_path, "wb") as dst:
+            for index in range(total_chunks):
+                with open(chunk_path(session_id, index), "rb") as src:
+                    _copy_fd(src.fileno(), dst.fileno(), os.fstat(src.fileno()).st_size)
+        os.replace(tmp_path, dest_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def discard(session_id: str):
+    shutil.rmtree(session_dir(session_id), ignore_errors=True)
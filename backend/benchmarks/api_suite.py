@@ -0,0 +1,441 @@
+"""End-to-end API load suite on local stand-ins, comparable against a baseline.
+
+Migrates DATABASE_URL (a scratch PostGIS database, or sqlite:///... for a
+quick local run) and starts the API with uvicorn, with GEOSERVER_URL pointing
+at the in-process fake GeoServer (benchmarks.fake_geoserver) and content
+kept in a local store under --work-dir. Runs each scenario for --duration
+seconds with --concurrency clients: login, authenticated reads, object
+CRUD, module listing (PostGIS only, it selects ST_X/ST_Y); then uploads a
+GeoTIFF of every --upload-mb size (generated once into --data-dir) and
+waits for its publish job. reads_during_publish runs the reads workload on
+the idle server and again while a --busy-upload-mb GeoTIFF uploads and
+publishes, and reports both sets of latencies and the p95 slowdown; use
+--geoserver-delay to make the fake GeoServer answer like a remote one.
+
+Reports requests/s and p50/p95/p99 per operation, upload and publish
+throughput, and the server's peak RSS after every scenario. The results are
+JSON; with --baseline, metrics worse than the stored run by more than
+--tolerance are listed and the exit status is 1.
+
+    DATABASE_URL=postgresql://... python -m benchmarks.api_suite --upload-mb 1 100 5120 --output baseline.json
+    DATABASE_URL=postgresql://... python -m benchmarks.api_suite --upload-mb 1 100 5120 --baseline baseline.json
+    DATABASE_URL=postgresql://... python -m benchmarks.api_suite --scenarios reads_during_publish --busy-upload-mb 4096 --geoserver-delay 0.05
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter, defaultdict
+
+import httpx
+import numpy as np
+
+from app.services.raster import _gdal
+from benchmarks.db_load import wait_ready
+from benchmarks.fake_geoserver import FakeGeoServer
+from benchmarks.login_storm import create_user
+from benchmarks.wms_tiles import percentile
+
+SCENARIOS = ("login", "reads", "objects", "modules", "uploads", "reads_during_publish")
+READS = {
+    "maps": "/api/v1/maps?limit=50",
+    "map_content_stats": "/api/v1/maps/contents/stats",
+}
+MODULES = "/api/v1/base/modules/?limit=100"
+
+# Направление метрики при сравнении с базовым прогоном: 1 — больше лучше
+DIRECTIONS = {
+    "requests_per_sec": 1,
+    "upload_mb_per_s": 1,
+    "publish_mb_per_s": 1,
+    "p50_ms": -1,
+    "p95_ms": -1,
+    "p99_ms": -1,
+    "peak_rss_mb": -1,
+}
+
+ROWS = 256  # строк растра за одну запись
+
+
+def geotiff(data_dir: str, megabytes: int, seed: int) -> str:
+    """An uncompressed Float32 GeoTIFF of about ``megabytes``, generated once
+    per size and seed"""
+    path = os.path.join(data_dir, f"dem-{megabytes}mb-{seed}.tif")
+    if os.path.exists(path):
+        return path
+    gdal = _gdal()
+    side = max(ROWS, int(math.sqrt(megabytes * 2 ** 20 / 4)))
+    partial = path + ".part"
+    ds = gdal.GetDriverByName("GTiff").Create(
+        partial, side, side, 1, gdal.GDT_Float32,
+        options=["TILED=YES", "BLOCKXSIZE=256", "BLOCKYSIZE=256", "BIGTIFF=IF_NEEDED"],
+    )
+    ds.SetGeoTransform([-180.0, 360.0 / side, 0.0, 90.0, 0.0, -180.0 / side])
+    band = ds.GetRasterBand(1)
+    band.SetNoDataValue(-9999.0)
+    rnd = np.random.default_rng(seed)
+    for y in range(0, side, ROWS):
+        # Шум не сжимается, поэтому размер файла предсказуем
+        band.WriteArray(rnd.normal(0, 500, (min(ROWS, side - y), side)).astype(np.float32), 0, y)
+    band.FlushCache()
+    ds = None
+    os.replace(partial, path)
+    return path
+
+
+def stamp(path: str, token: str):
+    # Новый тег на каждую загрузку: иначе одинаковые байты дедуплицируются и не публикуются
+    ds = _gdal().Open(path, 1)
+    ds.SetMetadataItem("BENCHMARK_RUN", token)
+    ds = None
+
+
+def peak_rss_mb(pid: int) -> float:
+    """Sum of VmHWM over a process and its descendants (Linux)"""
+    parents = {}
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    # Имя процесса в скобках может содержать пробелы
+                    parents[int(entry)] = int(f.read().rsplit(")", 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+    tree, frontier = set(), [pid]
+    while frontier:
+        current = frontier.pop()
+        tree.add(current)
+        frontier.extend(child for child, parent in parents.items() if parent == current and child not in tree)
+    total = 0
+    for member in tree:
+        try:
+            with open(f"/proc/{member}/status") as f:
+                total += next(int(line.split()[1]) for line in f if line.startswith("VmHWM:"))
+        except (OSError, StopIteration):
+            continue
+    return total / 1024
+
+
+class Recorder:
+    """Latencies of successful requests and failures by status, per operation"""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(Counter)
+
+    async def request(self, name, send, ok=(200,)):
+        start = time.perf_counter()
+        try:
+            response = await send()
+        except httpx.HTTPError as e:
+            self.errors[name][type(e).__name__] += 1
+            return None
+        if response.status_code not in ok:
+            self.errors[name][str(response.status_code)] += 1
+            return None
+        self.latencies[name].append((time.perf_counter() - start) * 1000)
+        return response
+
+    def summary(self, elapsed: float) -> dict:
+        results = {}
+        for name in sorted(set(self.latencies) | set(self.errors)):
+            latencies = self.latencies[name]
+            results[name] = {
+                "requests": len(latencies),
+                "requests_per_sec": len(latencies) / elapsed,
+                "p50_ms": percentile(latencies, 50) if latencies else None,
+                "p95_ms": percentile(latencies, 95) if latencies else None,
+                "p99_ms": percentile(latencies, 99) if latencies else None,
+                "errors": dict(self.errors[name]),
+            }
+        return results
+
+
+async def login(client, recorder, rnd, credentials):
+    await recorder.request("login", lambda: client.post("/api/v1/auth/login", data=credentials))
+
+
+async def reads(client, recorder, rnd, credentials):
+    name, path = rnd.choice(list(READS.items()))
+    await recorder.request(name, lambda: client.get(path))
+
+
+async def objects(client, recorder, rnd, credentials):
+    payload = {
+        "type": "benchmark",
+        "name": f"bench-{uuid.uuid4().hex[:8]}",
+        "lat": rnd.uniform(-80, 80),
+        "lng": rnd.uniform(-180, 180),
+        "restriction_radius": 1.0,
+    }
+    created = await recorder.request("object_create", lambda: client.post("/api/v1/objects/", json=payload))
+    if created is None:
+        return
+    object_id = created.json()["id"]
+    await recorder.request(
+        "object_update", lambda: client.patch(f"/api/v1/objects/{object_id}", json={"name": payload["name"] + "-v2"})
+    )
+    await recorder.request("object_list", lambda: client.get("/api/v1/objects/?limit=100"))
+    await recorder.request("object_delete", lambda: client.delete(f"/api/v1/objects/{object_id}"))
+
+
+async def modules(client, recorder, rnd, credentials):
+    await recorder.request("modules", lambda: client.get(MODULES))
+
+
+async def run_scenario(client, operation, credentials, concurrency, duration, seed, until=None):
+    """Run ``operation`` in ``concurrency`` loops for ``duration`` seconds,
+    or until the ``until`` future is done"""
+    recorder = Recorder()
+    deadline = time.monotonic() + (duration or 0)
+
+    def running():
+        return not until.done() if until is not None else time.monotonic() < deadline
+
+    async def worker(index):
+        rnd = random.Random(seed * 1000 + index)
+        while running():
+            await operation(client, recorder, rnd, credentials)
+
+    started = time.monotonic()
+    await asyncio.gather(*(worker(index) for index in range(concurrency)))
+    return recorder.summary(time.monotonic() - started)
+
+
+async def upload(client, path, megabytes, poll, timeout):
+    size = os.path.getsize(path)
+    started = time.perf_counter()
+    with open(path, "rb") as f:
+        response = await client.post(
+            "/api/v1/maps/upload",
+            data={"name": f"bench-{megabytes}mb", "file_type": "geotiff", "is_public": "false"},
+            files={"file": (os.path.basename(path), f, "image/tiff")},
+            timeout=None,
+        )
+    uploaded = time.perf_counter() - started
+    result = {"megabytes": size / 2 ** 20, "status_code": response.status_code, "upload_seconds": uploaded}
+    if response.status_code != 202:
+        result["error"] = response.text[:500]
+        return result
+    job = response.json()
+    deadline = time.monotonic() + timeout
+    while job["status"] not in ("done", "failed") and time.monotonic() < deadline:
+        await asyncio.sleep(poll)
+        job = (await client.get(f"/api/v1/maps/jobs/{job['id']}")).json()
+    published = time.perf_counter() - started - uploaded
+    result.update({
+        "job_status": job["status"],
+        "error": job.get("error"),
+        "map_id": job.get("map_id"),
+        "publish_seconds": published,
+        "upload_mb_per_s": size / 2 ** 20 / uploaded,
+        "publish_mb_per_s": size / 2 ** 20 / published if job["status"] == "done" else None,
+    })
+    return result
+
+
+async def run_uploads(client, args, server_pid):
+    results = {}
+    token = uuid.uuid4().hex
+    for megabytes in args.upload_mb:
+        path = geotiff(args.data_dir, megabytes, args.seed)
+        runs = []
+        for attempt in range(args.upload_repeats):
+            stamp(path, f"{token}-{attempt}")
+            runs.append(await upload(client, path, megabytes, args.poll, args.publish_timeout))
+        for run in runs:
+            if run.get("map_id"):
+                await client.delete(f"/api/v1/maps/{run['map_id']}")
+        done = [run for run in runs if run.get("job_status") == "done"]
+
+        def median(field):
+            values = sorted(run[field] for run in done)
+            return values[len(values) // 2] if values else None
+
+        results[f"{megabytes}mb"] = {
+            "upload_mb_per_s": median("upload_mb_per_s"),
+            "publish_mb_per_s": median("publish_mb_per_s"),
+            "peak_rss_mb": peak_rss_mb(server_pid),
+            "runs": runs,
+        }
+    return results
+
+
+async def run_reads_during_publish(client, args, credentials, server_pid):
+    idle = await run_scenario(client, reads, credentials, args.concurrency, args.duration, args.seed)
+    path = geotiff(args.data_dir, args.busy_upload_mb, args.seed)
+    stamp(path, uuid.uuid4().hex)
+    # Загрузка идет своим клиентом, чтобы не занимать соединения читателей
+    async with httpx.AsyncClient(base_url=client.base_url, headers=client.headers, timeout=120) as uploader:
+        publish = asyncio.ensure_future(
+            upload(uploader, path, args.busy_upload_mb, args.poll, args.publish_timeout)
+        )
+        busy = await run_scenario(client, reads, credentials, args.concurrency, None, args.seed, until=publish)
+        run = await publish
+        if run.get("map_id"):
+            await uploader.delete(f"/api/v1/maps/{run['map_id']}")
+    slowdown = {
+        name: busy[name]["p95_ms"] / idle[name]["p95_ms"]
+        for name in idle.keys() & busy.keys()
+        if idle[name]["p95_ms"] and busy[name]["p95_ms"]
+    }
+    return {
+        "idle": {"operations": idle},
+        "busy": {"operations": busy},
+        "p95_slowdown": slowdown,
+        "publish": run,
+        "peak_rss_mb": peak_rss_mb(server_pid),
+    }
+
+
+async def run_suite(args, server_pid, username):
+    credentials = {"username": username, "password": args.password}
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}", limits=limits, timeout=120) as client:
+        await wait_ready(client)
+        token = (await client.post("/api/v1/auth/login", data=credentials)).json()["access_token"]
+        client.headers["Authorization"] = f"Bearer {token}"
+        operations = {"login": login, "reads": reads, "objects": objects, "modules": modules}
+        results = {}
+        for name in args.scenarios:
+            if name == "uploads":
+                results[name] = await run_uploads(client, args, server_pid)
+                continue
+            if name == "reads_during_publish":
+                results[name] = await run_reads_during_publish(client, args, credentials, server_pid)
+                continue
+            results[name] = {
+                "operations": await run_scenario(
+                    client, operations[name], credentials, args.concurrency, args.duration, args.seed
+                ),
+                "peak_rss_mb": peak_rss_mb(server_pid),
+            }
+        return results
+
+
+def flatten(results, prefix=""):
+    metrics = {}
+    for key, value in results.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            metrics.update(flatten(value, path + "."))
+        elif key in DIRECTIONS and isinstance(value, (int, float)):
+            metrics[path] = value
+    return metrics
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> dict:
+    """Metrics present in both runs that got worse by more than ``tolerance``"""
+    current, previous = flatten(results["scenarios"]), flatten(baseline["scenarios"])
+    regressions, improvements = [], 0
+    for metric in sorted(current.keys() & previous.keys()):
+        old, new = previous[metric], current[metric]
+        if not old:
+            continue
+        change = (new - old) / old
+        worse = -change * DIRECTIONS[metric.rsplit(".", 1)[1]]
+        if worse > tolerance:
+            regressions.append({"metric": metric, "baseline": old, "current": new, "change": change})
+        elif worse < -tolerance:
+            improvements += 1
+    return {"tolerance": tolerance, "compared": len(current.keys() & previous.keys()),
+            "improvements": improvements, "regressions": regressions}
+
+
+def environment(args) -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "database": os.environ.get("DATABASE_URL", "").split(":", 1)[0],
+        "workers": args.workers,
+        "concurrency": args.concurrency,
+        "duration": args.duration,
+        "seed": args.seed,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=15.0, help="seconds per scenario")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--upload-mb", nargs="+", type=int, default=[1, 100])
+    parser.add_argument("--upload-repeats", type=int, default=1)
+    parser.add_argument("--busy-upload-mb", type=int, default=2048, help="GeoTIFF published during reads_during_publish")
+    parser.add_argument("--poll", type=float, default=0.1, help="seconds between publish job polls")
+    parser.add_argument("--publish-timeout", type=float, default=6 * 60 * 60)
+    parser.add_argument("--password", default="bench-password")
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "lunar-bench-data"))
+    parser.add_argument("--work-dir", help="uploads and content store of the server; a temporary one by default")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--geoserver-port", type=int, default=8600)
+    parser.add_argument("--geoserver-delay", type=float, default=0.0, help="seconds added to every GeoServer reply")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--baseline", help="results of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="relative change counted as a regression")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="lunar-bench-")
+    geoserver = FakeGeoServer(args.geoserver_port, args.geoserver_delay).start()
+    env = {
+        **os.environ,
+        "GEOSERVER_URL": geoserver.url,
+        "CONTENT_STORE": "local",
+        "CONTENT_STORE_PATH": os.path.join(work_dir, "content"),
+        "GEOSERVER_UPLOAD_PATH": os.path.join(work_dir, "uploads"),
+        "UPLOAD_STAGING_PATH": os.path.join(work_dir, "uploads", ".staging"),
+        "TILE_CACHE_PATH": os.path.join(work_dir, "tile_cache"),
+        "TERRAIN_CACHE_PATH": os.path.join(work_dir, "terrain_cache"),
+    }
+    for path in ("content", "uploads/.staging", "tile_cache", "terrain_cache"):
+        os.makedirs(os.path.join(work_dir, path), exist_ok=True)
+
+    subprocess.run([sys.executable, "-m", "app.db.migrate"], env=env, check=True)
+    username = create_user(args.password)
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port),
+         "--workers", str(args.workers), "--log-level", "warning"],
+        env=env,
+    )
+    try:
+        scenarios = asyncio.run(run_suite(args, server.pid, username))
+        server_rss = peak_rss_mb(server.pid)
+    finally:
+        server.terminate()
+        server.wait()
+        geoserver.stop()
+
+    results = {
+        "environment": environment(args),
+        "scenarios": scenarios,
+        "server_peak_rss_mb": server_rss,
+        "client_peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "geoserver": geoserver.snapshot(),
+    }
+    if args.baseline:
+        with open(args.baseline) as f:
+            results["comparison"] = compare(results, json.load(f), args.tolerance)
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if results.get("comparison", {}).get("regressions"):
+        sys.exit(1)
@@ -0,0 +1,93 @@
+"""DB queries and latency of get_current_user with cold vs. warm tokens.
+
+Creates M users in DATABASE_URL (use a scratch database), issues a token
+for each and resolves every token R times, counting SQL statements per
+request. The first round runs on an empty principal cache.
+
+    DATABASE_URL=postgresql://... python -m benchmarks.auth_cache --users 100 --rounds 20
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import uuid
+
+from sqlalchemy import event
+
+from app.api.deps import get_current_user
+from app.core.security import create_access_token
+from app.db.session import SessionLocal, engine
+from app.models.user import User
+from app.services.principals import principal_cache
+
+
+def seed(db, count):
+    prefix = uuid.uuid4().hex[:8]
+    users = [
+        User(username=f"bench-{prefix}-{i}", email=f"bench-{prefix}-{i}@lunar.test", hashed_password="-")
+        for i in range(count)
+    ]
+    db.add_all(users)
+    db.commit()
+    return users
+
+
+def run(users, rounds):
+    queries = 0
+
+    def count(*_):
+        nonlocal queries
+        queries += 1
+
+    db = SessionLocal()
+    created = seed(db, users)
+    tokens = [create_access_token({"sub": u.username}) for u in created]
+    principal_cache.clear()
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        results = []
+        for round_no in range(rounds):
+            queries = 0
+            samples = []
+            for token in tokens:
+                # Отдельная сессия на запрос, как в get_db
+                request_db = SessionLocal()
+                start = time.perf_counter()
+                asyncio.run(get_current_user(db=request_db, token=token))
+                samples.append((time.perf_counter() - start) * 1000)
+                request_db.close()
+            results.append({
+                "round": round_no,
+                "queries_per_request": queries / len(tokens),
+                "median_ms": statistics.median(samples),
+            })
+        return {
+            "users": users,
+            "cold": results[0],
+            "warm": {
+                "queries_per_request": statistics.mean(r["queries_per_request"] for r in results[1:]),
+                "median_ms": statistics.median(r["median_ms"] for r in results[1:]),
+            } if rounds > 1 else None,
+            "cache": principal_cache.snapshot(),
+        }
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+        for user in created:
+            db.delete(user)
+        db.commit()
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    result = run(args.users, args.rounds)
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
@@ -0,0 +1,103 @@
+"""Requests/sec of the object and module list endpoints, sync vs. async DB mode.
+
+Starts the API with uvicorn once per mode (DB_ASYNC=false/true) against
+DATABASE_URL and hammers each endpoint with concurrent clients. Seed the
+database first, e.g. with benchmarks.object_queries.
+
+    DATABASE_URL=postgresql://... python -m benchmarks.db_load --concurrency 64 --duration 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+ENDPOINTS = {
+    "objects": "/api/v1/objects/?limit=100",
+    "modules": "/api/v1/base/modules/?limit=100",
+}
+
+
+async def wait_ready(client, timeout=60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/docs")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.5)
+    raise RuntimeError("API did not start")
+
+
+async def hammer(client, path, concurrency, duration):
+    latencies, errors = [], 0
+    deadline = time.monotonic() + duration
+
+    async def worker():
+        nonlocal errors
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            try:
+                response = await client.get(path)
+                ok = response.status_code == 200
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies.append((time.perf_counter() - start) * 1000)
+            else:
+                errors += 1
+
+    started = time.monotonic()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.monotonic() - started
+    latencies.sort()
+    return {
+        "requests_per_sec": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) if latencies else None,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] if latencies else None,
+        "errors": errors,
+    }
+
+
+async def run_mode(db_async, args):
+    env = {**os.environ, "DB_ASYNC": "true" if db_async else "false"}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port),
+         "--workers", str(args.workers), "--log-level", "warning"],
+        env=env,
+    )
+    try:
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}", limits=limits, timeout=60) as client:
+            await wait_ready(client)
+            result = {"mode": "async" if db_async else "sync"}
+            for name, path in ENDPOINTS.items():
+                await hammer(client, path, args.concurrency, 2)  # прогрев
+                result[name] = await hammer(client, path, args.concurrency, args.duration)
+            result["pool"] = (await client.get("/api/v1/base/db/pool")).json()
+            return result
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    results = [asyncio.run(run_mode(db_async, args)) for db_async in (False, True)]
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
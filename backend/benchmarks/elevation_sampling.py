@@ -0,0 +1,103 @@
+"""Batch elevation sampling: throughput of random vs clustered point sets.
+
+Generates a tiled Float32 DEM of --size pixels a side (the same generator as
+the raster statistics benchmark) unless --input is given, then samples
+--points points per request with a fresh block cache of each --cache-mb size.
+Random points touch most blocks of the raster; clustered points (a few
+Gaussian blobs, like sites around a base) touch a handful, so repeated
+requests are served from the block cache. Each set is run cold and then
+--repeat times warm.
+
+    python -m benchmarks.elevation_sampling --size 20000 --points 100000 --cache-mb 64 256
+"""
+import argparse
+import json
+import os
+import resource
+import tempfile
+import time
+
+import numpy as np
+
+from app.services.elevation import ElevationReader
+from app.services.raster import _gdal
+from benchmarks.raster_stats import generate_dem
+
+
+def point_sets(width: int, height: int, geotransform, count: int, clusters: int, seed: int) -> dict:
+    rnd = np.random.default_rng(seed)
+    px = rnd.uniform(0, width, count)
+    py = rnd.uniform(0, height, count)
+    sets = {"random": (px, py)}
+
+    centers = rnd.uniform(0.1, 0.9, (clusters, 2)) * (width, height)
+    which = rnd.integers(0, clusters, count)
+    spread = min(width, height) / 200
+    cx = np.clip(centers[which, 0] + rnd.normal(0, spread, count), 0, width)
+    cy = np.clip(centers[which, 1] + rnd.normal(0, spread, count), 0, height)
+    sets["clustered"] = (cx, cy)
+
+    # Пиксели -> координаты растра
+    x0, dx, rx, y0, ry, dy = geotransform
+    return {name: (x0 + x * dx + y * rx, y0 + x * ry + y * dy) for name, (x, y) in sets.items()}
+
+
+def run(path: str, points, cache_bytes: int, repeat: int) -> dict:
+    reader = ElevationReader(cache_bytes)
+    lng, lat = points
+    timings = []
+    for _ in range(repeat + 1):
+        started = time.perf_counter()
+        values = reader.sample(path, lng, lat)
+        timings.append(time.perf_counter() - started)
+    cache = reader.cache.snapshot()
+    warm = min(timings[1:]) if repeat else None
+    return {
+        "cache_mb": cache_bytes / 2 ** 20,
+        "cold_seconds": timings[0],
+        "warm_seconds": warm,
+        "cold_points_per_s": lng.size / timings[0],
+        "warm_points_per_s": lng.size / warm if warm else None,
+        "valid": int(np.count_nonzero(~np.isnan(values))),
+        "blocks_read": cache["misses"],
+        "hit_ratio": cache["hit_ratio"],
+        "evictions": cache["evictions"],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--input", help="existing GeoTIFF instead of a generated DEM")
+    parser.add_argument("--size", type=int, default=20000, help="generated DEM side, pixels")
+    parser.add_argument("--points", type=int, default=100000)
+    parser.add_argument("--clusters", type=int, default=5)
+    parser.add_argument("--cache-mb", nargs="+", type=int, default=[64, 256])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--dir", help="scratch directory (default: a temp dir)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as directory:
+        path = args.input
+        if path is None:
+            path = os.path.join(directory, "dem.tif")
+            generate_dem(path, args.size, args.seed)
+        ds = _gdal().Open(path)
+        sets = point_sets(ds.RasterXSize, ds.RasterYSize, ds.GetGeoTransform(), args.points, args.clusters, args.seed)
+        ds = None
+        results = {
+            "file": path,
+            "file_bytes": os.path.getsize(path),
+            "points": args.points,
+            "runs": {
+                name: [run(path, points, cache_mb * 2 ** 20, args.repeat) for cache_mb in args.cache_mb]
+                for name, points in sets.items()
+            },
+            "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        }
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
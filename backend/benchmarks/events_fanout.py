@@ -0,0 +1,121 @@
+"""Push fan-out to many WebSocket subscribers.
+
+Starts the API with uvicorn (or uses --url), opens N subscribers on the objects topic (a
+fraction of them read slowly) and patches one object M times through the
+REST API. Reports delivery latency for fast subscribers, how many events
+slow subscribers received after coalescing, and the broker counters.
+
+    DATABASE_URL=postgresql://... python -m benchmarks.events_fanout --subscribers 1000 --events 200
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+import websockets
+
+from benchmarks.db_load import wait_ready
+
+
+async def subscriber(url, ready, done, slow_delay, object_id, received):
+    async with websockets.connect(url, max_queue=None) as ws:
+        ready.release()
+        while not done.is_set():
+            try:
+                message = json.loads(await asyncio.wait_for(ws.recv(), 1.0))
+            except asyncio.TimeoutError:
+                continue
+            if message.get("key") != object_id or "name" not in (message.get("data") or {}):
+                continue
+            received.append(time.time() - float(message["data"]["name"]))
+            if slow_delay:
+                await asyncio.sleep(slow_delay)
+
+
+async def run(args):
+    resource.setrlimit(resource.RLIMIT_NOFILE, (resource.getrlimit(resource.RLIMIT_NOFILE)[1],) * 2)
+    server = None
+    if not args.url:
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port), "--log-level", "warning"],
+            env=dict(os.environ),
+        )
+    base_url = args.url or f"http://127.0.0.1:{args.port}"
+    try:
+        async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+            await wait_ready(client)
+            created = await client.post("/api/v1/objects/", params={"force": True}, json={
+                "type": "marker", "name": "0", "lat": 0.0, "lng": 0.0, "restriction_radius": 0.0
+            })
+            object_id = created.json()["id"]
+
+            url = base_url.replace("http", "ws", 1) + "/api/v1/events/ws?topics=objects"
+            ready, done = asyncio.Semaphore(0), asyncio.Event()
+            slow_count = int(args.subscribers * args.slow_fraction)
+            received = [[] for _ in range(args.subscribers)]
+            tasks = [
+                asyncio.create_task(subscriber(
+                    url, ready, done, args.slow_delay if i < slow_count else 0, object_id, received[i]
+                ))
+                for i in range(args.subscribers)
+            ]
+            for _ in range(args.subscribers):
+                await ready.acquire()
+
+            start = time.perf_counter()
+            for _ in range(args.events):
+                await client.patch(f"/api/v1/objects/{object_id}", json={"name": repr(time.time())})
+                await asyncio.sleep(args.interval)
+            publish_seconds = time.perf_counter() - start
+            await asyncio.sleep(args.drain)
+            done.set()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            stats = (await client.get("/api/v1/events/stats")).json()
+            await client.delete(f"/api/v1/objects/{object_id}")
+
+        fast = [lat for r in received[slow_count:] for lat in r]
+        fast.sort()
+        slow_counts = [len(r) for r in received[:slow_count]]
+        return {
+            "subscribers": args.subscribers,
+            "slow_subscribers": slow_count,
+            "events": args.events,
+            "publish_seconds": publish_seconds,
+            "fast_latency_ms": {
+                "p50": statistics.median(fast) * 1000 if fast else None,
+                "p99": fast[int(len(fast) * 0.99) - 1] * 1000 if fast else None,
+                "delivered_per_subscriber": len(fast) / max(1, args.subscribers - slow_count),
+            },
+            "slow_received_per_subscriber": statistics.mean(slow_counts) if slow_counts else None,
+            "broker": stats,
+        }
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--subscribers", type=int, default=1000)
+    parser.add_argument("--events", type=int, default=200)
+    parser.add_argument("--interval", type=float, default=0.01, help="pause between patches, seconds")
+    parser.add_argument("--slow-fraction", type=float, default=0.1)
+    parser.add_argument("--slow-delay", type=float, default=0.5, help="per-message delay of slow subscribers")
+    parser.add_argument("--drain", type=float, default=3.0)
+    parser.add_argument("--port", type=int, default=8767)
+    parser.add_argument("--url", help="use an already running API instead of starting one")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
@@ -0,0 +1,91 @@
+"""In-process GeoServer stand-in for benchmarks.
+
+Answers every REST call the publisher makes (coverage and data stores,
+layer and coverage configuration, deletes) with success after reading the
+request body to the end, and WMS GetMap with a small PNG, so upload and
+tile paths can be measured without a real GeoServer. ``delay`` adds a fixed
+latency to every response.
+
+    python -m benchmarks.fake_geoserver --port 8600
+"""
+import argparse
+import asyncio
+import io
+import threading
+import time
+from collections import Counter
+
+import uvicorn
+from PIL import Image
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+METHODS = ["GET", "POST", "PUT", "DELETE", "HEAD"]
+
+
+def _png(size: int = 256) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGBA", (size, size), (128, 128, 128, 255)).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+class FakeGeoServer:
+    def __init__(self, port: int, delay: float = 0.0):
+        self.port = port
+        self.delay = delay
+        self.url = f"http://127.0.0.1:{port}/geoserver"
+        self.stats = {"requests": Counter(), "bytes_received": 0}
+        self._tile = _png()
+        app = Starlette(routes=[Route("/geoserver/{path:path}", self._handle, methods=METHODS)])
+        self._server = uvicorn.Server(
+            uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", lifespan="off")
+        )
+        self._thread = None
+
+    async def _handle(self, request: Request) -> Response:
+        path = request.path_params["path"]
+        # Тело дочитываем до конца: загрузка должна пройти по сети целиком
+        async for chunk in request.stream():
+            self.stats["bytes_received"] += len(chunk)
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        kind = "wms" if path.endswith("/wms") else "rest"
+        self.stats["requests"][f"{request.method} {kind}"] += 1
+        if kind == "wms":
+            return Response(self._tile, media_type="image/png")
+        if request.method == "PUT" and path.endswith(("/file.geotiff", "/file.shp")):
+            return Response(status_code=201)
+        if request.method == "GET":
+            return JSONResponse({})
+        return Response(status_code=200)
+
+    def start(self, timeout: float = 10.0):
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+        self._thread.start()
+        deadline = time.monotonic() + timeout
+        while not self._server.started:
+            if time.monotonic() > deadline or not self._thread.is_alive():
+                raise RuntimeError("Fake GeoServer did not start")
+            time.sleep(0.05)
+        return self
+
+    def stop(self):
+        self._server.should_exit = True
+        if self._thread is not None:
+            self._thread.join()
+
+    def snapshot(self) -> dict:
+        return {"requests": dict(self.stats["requests"]), "bytes_received": self.stats["bytes_received"]}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds added to every response")
+    args = parser.parse_args()
+
+    server = FakeGeoServer(args.port, args.delay)
+    print(f"GEOSERVER_URL={server.url}")
+    server._server.run()
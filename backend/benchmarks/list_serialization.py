@@ -0,0 +1,114 @@
+"""List serialization: ORM + pydantic + json vs. plain rows + orjson vs. streaming.
+
+Seeds N random objects into DATABASE_URL (use a scratch database) and
+serializes the whole table the way GET /objects/ used to (ORM instances,
+Page[Object] validation, jsonable_encoder, json.dumps), as a page of plain
+rows encoded with orjson, and as an NDJSON stream from a server-side cursor.
+Reports wall time and peak Python heap of each, then gzip/brotli cost and
+ratio on the serialized body.
+
+    DATABASE_URL=postgresql://... python -m benchmarks.list_serialization --objects 100000
+"""
+import argparse
+import gzip
+import json
+import random
+import resource
+import time
+import tracemalloc
+
+from fastapi.encoders import jsonable_encoder
+
+from app.core.compression import brotli
+from app.crud.base import schema_columns
+from app.crud.object import OBJECT_ORDER
+from app.db.session import SessionLocal
+from app.models.object import LunarObject
+from app.schemas.object import Object
+from app.schemas.page import Page
+from app.services.serialization import iter_ndjson, iter_query, page_body
+from benchmarks.object_queries import seed
+
+ORDER = [c.desc() for c in OBJECT_ORDER]
+
+
+def orm_pydantic() -> int:
+    db = SessionLocal()
+    try:
+        objects = db.query(LunarObject).order_by(*ORDER).all()
+        page = Page[Object](items=objects, next_cursor=None)
+        return len(json.dumps(jsonable_encoder(page)).encode())
+    finally:
+        db.close()
+
+
+def rows_orjson() -> int:
+    db = SessionLocal()
+    try:
+        rows = db.query(*schema_columns(LunarObject, Object)).order_by(*ORDER).all()
+        return len(page_body(rows, None))
+    finally:
+        db.close()
+
+
+def stream_ndjson(batch_size: int) -> int:
+    db = SessionLocal()
+    query = db.query(*schema_columns(LunarObject, Object)).order_by(*ORDER)
+    return sum(len(chunk) for chunk in iter_ndjson(iter_query(db, query, batch_size)))
+
+
+def measure(fn, *args) -> dict:
+    tracemalloc.start()
+    started = time.perf_counter()
+    size = fn(*args)
+    seconds = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": seconds, "peak_heap_mb": peak / 2 ** 20, "bytes": size}
+
+
+def compression(body: bytes) -> dict:
+    codecs = {"gzip-6": lambda data: gzip.compress(data, 6)}
+    if brotli is not None:
+        codecs["br-4"] = lambda data: brotli.compress(data, quality=4)
+    results = {}
+    for name, compress in codecs.items():
+        started = time.perf_counter()
+        packed = compress(body)
+        results[name] = {"seconds": time.perf_counter() - started, "ratio": len(body) / len(packed)}
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--objects", type=int, default=100000)
+    parser.add_argument("--batch", type=int, default=1000, help="rows per cursor fetch when streaming")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        seed(db, args.objects, random.Random(args.seed))
+    finally:
+        db.close()
+
+    body_db = SessionLocal()
+    try:
+        body = page_body(body_db.query(*schema_columns(LunarObject, Object)).order_by(*ORDER).all(), None)
+    finally:
+        body_db.close()
+
+    results = {
+        "objects": args.objects,
+        "orm_pydantic_json": measure(orm_pydantic),
+        "rows_orjson": measure(rows_orjson),
+        "stream_ndjson": measure(stream_ndjson, args.batch),
+        "compression": compression(body),
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
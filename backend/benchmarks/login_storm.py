@@ -0,0 +1,108 @@
+"""Login throughput and latency of other endpoints during a login storm.
+
+Starts the API with uvicorn against DATABASE_URL, creates a benchmark user
+and measures the p99 of a cheap sync endpoint (GET /base/resources) alone,
+then again while C clients log in continuously.
+
+    DATABASE_URL=postgresql://... python -m benchmarks.login_storm --storm 64 --duration 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import uuid
+from collections import Counter
+
+import httpx
+
+from app.core.security import get_password_hash
+from app.db.session import SessionLocal
+from app.models.user import User
+from benchmarks.db_load import hammer, wait_ready
+
+PROBE = "/api/v1/base/resources"
+
+
+def create_user(password):
+    db = SessionLocal()
+    try:
+        name = f"bench-{uuid.uuid4().hex[:8]}"
+        db.add(User(username=name, email=f"{name}@lunar.test", hashed_password=get_password_hash(password)))
+        db.commit()
+        return name
+    finally:
+        db.close()
+
+
+def delete_user(username):
+    db = SessionLocal()
+    try:
+        db.query(User).filter(User.username == username).delete()
+        db.commit()
+    finally:
+        db.close()
+
+
+async def storm(client, username, password, concurrency, duration):
+    statuses = Counter()
+    deadline = time.monotonic() + duration
+
+    async def worker():
+        while time.monotonic() < deadline:
+            try:
+                response = await client.post(
+                    "/api/v1/auth/login", data={"username": username, "password": password}
+                )
+                statuses[response.status_code] += 1
+            except httpx.HTTPError:
+                statuses["error"] += 1
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return {
+        "logins_per_sec": statuses[200] / duration,
+        "statuses": {str(k): v for k, v in statuses.items()},
+    }
+
+
+async def run(args, username, password):
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port), "--log-level", "warning"],
+        env=dict(os.environ),
+    )
+    try:
+        limits = httpx.Limits(max_connections=args.storm + args.probes)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}", limits=limits, timeout=60) as client:
+            await wait_ready(client)
+            baseline = await hammer(client, PROBE, args.probes, args.duration)
+            logins, during = await asyncio.gather(
+                storm(client, username, password, args.storm, args.duration),
+                hammer(client, PROBE, args.probes, args.duration),
+            )
+            return {"baseline_probe": baseline, "storm_probe": during, "logins": logins}
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--storm", type=int, default=64, help="concurrent login clients")
+    parser.add_argument("--probes", type=int, default=8, help="concurrent clients on the probe endpoint")
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    password = uuid.uuid4().hex
+    username = create_user(password)
+    try:
+        result = asyncio.run(run(args, username, password))
+    finally:
+        delete_user(username)
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
@@ -0,0 +1,138 @@
+"""Nearest-module queries (GiST KNN) vs. fetching every module and sorting in Python.
+
+Seeds N random modules into DATABASE_URL (use a scratch PostGIS database),
+half around an equatorial base and half near the south pole, where planar
+degree distances are most misleading, and times single-point and batch
+nearest queries against loading the whole table. Every answer is checked
+against the brute-force one.
+
+    DATABASE_URL=postgresql://... python -m benchmarks.module_nearest --modules 10000 100000 1000000
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+
+from sqlalchemy import text
+
+from app.crud.module import get_nearest_modules, module_point
+from app.db.init_db import MODULE_LOCATION_INDEX
+from app.db.session import SessionLocal, engine
+from app.models.module import Module
+from app.services.spatial import great_circle_distance
+
+TYPES = ["habitat", "power", "lab", "storage"]
+STATUSES = ["active", "active", "active", "maintenance"]
+# (min_lng, min_lat, max_lng, max_lat)
+REGIONS = [(-30.0, -20.0, 30.0, 20.0), (-180.0, -89.9, 180.0, -80.0)]
+
+
+def random_point(rnd):
+    min_lng, min_lat, max_lng, max_lat = rnd.choice(REGIONS)
+    return rnd.uniform(min_lat, max_lat), rnd.uniform(min_lng, max_lng)
+
+
+def seed(db, count, rnd):
+    Module.__table__.drop(engine, checkfirst=True)
+    Module.__table__.create(engine)
+    db.execute(text(MODULE_LOCATION_INDEX))
+    batch = []
+    for i in range(count):
+        lat, lng = random_point(rnd)
+        batch.append({
+            "name": f"module-{i}",
+            "module_type": rnd.choice(TYPES),
+            "area": 100.0,
+            "status": rnd.choice(STATUSES),
+            "location": module_point(lat, lng),
+            "properties": {},
+        })
+        if len(batch) == 10000:
+            db.execute(Module.__table__.insert(), batch)
+            batch = []
+    if batch:
+        db.execute(Module.__table__.insert(), batch)
+    db.commit()
+    db.execute(text("ANALYZE modules"))
+
+
+def brute_force(db, points, k, module_type=None):
+    # Как раньше: вся таблица в память, сортировка в Python
+    query = db.query(Module.id, Module.lat, Module.lng, Module.module_type).filter(Module.location.isnot(None))
+    rows = [row for row in query if module_type is None or row.module_type == module_type]
+    return [
+        sorted((great_circle_distance(lat, lng, row.lat, row.lng), row.id) for row in rows)[:k]
+        for lat, lng in points
+    ]
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {"median_ms": statistics.median(samples), "max_ms": max(samples)}
+
+
+def same(indexed, expected) -> bool:
+    # Сравниваем расстояния: при равных расстояниях порядок id может отличаться
+    return all(
+        [round(d, 6) for d, _ in got] == [round(d, 6) for d, _ in want]
+        for got, want in zip(indexed, expected)
+    )
+
+
+def run(count, k, batch_size, repeat, rnd):
+    db = SessionLocal()
+    try:
+        seed(db, count, rnd)
+        single = [random_point(rnd)]
+        batch = [random_point(rnd) for _ in range(batch_size)]
+
+        def knn_single():
+            return get_nearest_modules(db, single, k)
+
+        def knn_filtered():
+            return get_nearest_modules(db, single, k, module_type="lab", status="active")
+
+        def knn_batch():
+            return get_nearest_modules(db, batch, k)
+
+        checks = {
+            "single": same(knn_single(), brute_force(db, single, k)),
+            "batch": same(knn_batch(), brute_force(db, batch, k)),
+        }
+        db.expunge_all()
+        return {
+            "modules": count,
+            "k": k,
+            "batch_points": batch_size,
+            "knn_single": timed(knn_single, repeat),
+            "knn_filtered": timed(knn_filtered, repeat),
+            "knn_batch": timed(knn_batch, max(1, repeat // 4)),
+            "fetch_all_single": timed(lambda: brute_force(db, single, k), max(1, repeat // 10)),
+            "fetch_all_batch": timed(lambda: brute_force(db, batch, k), 1),
+            "matches_brute_force": checks,
+        }
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modules", nargs="+", type=int, default=[10000, 100000])
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--batch", type=int, default=100, help="points per batch query")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    rnd = random.Random(args.seed)
+    results = [run(count, args.k, args.batch, args.repeat, rnd) for count in args.modules]
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
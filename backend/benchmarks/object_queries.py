@@ -0,0 +1,107 @@
+"""Viewport (bbox) and radius queries over lunar objects vs. fetching everything.
+
+Seeds N random objects into DATABASE_URL (use a scratch database) and times
+the index-backed queries against loading the whole table and filtering in
+Python, which is what the map view did before.
+
+    DATABASE_URL=postgresql://... python -m benchmarks.object_queries --objects 100000 1000000
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+import uuid
+from datetime import datetime
+
+from sqlalchemy import text
+
+from app.db.init_db import OBJECT_LOCATION_INDEX
+from app.db.session import SessionLocal, engine
+from app.models.object import LunarObject
+from app.services.spatial import filter_bbox, great_circle_distance, radius_bbox
+
+# Район вокруг базы, где разбросаны объекты
+REGION = (-30.0, -20.0, 30.0, 20.0)
+
+
+def seed(db, count, rnd):
+    LunarObject.__table__.drop(engine, checkfirst=True)
+    LunarObject.__table__.create(engine)
+    if engine.dialect.name == "postgresql":
+        db.execute(text(OBJECT_LOCATION_INDEX))
+    now = datetime.utcnow()
+    batch = []
+    for i in range(count):
+        batch.append({
+            "id": str(uuid.uuid4()),
+            "type": "marker",
+            "name": f"object-{i}",
+            "lat": rnd.uniform(REGION[1], REGION[3]),
+            "lng": rnd.uniform(REGION[0], REGION[2]),
+            "created_at": now,
+            "restriction_radius": 50.0,
+        })
+        if len(batch) == 10000:
+            db.execute(LunarObject.__table__.insert(), batch)
+            batch = []
+    if batch:
+        db.execute(LunarObject.__table__.insert(), batch)
+    db.commit()
+    if engine.dialect.name == "postgresql":
+        db.execute(text("ANALYZE lunar_objects"))
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {"median_ms": statistics.median(samples), "max_ms": max(samples)}
+
+
+def run(count, repeat, rnd):
+    db = SessionLocal()
+    try:
+        seed(db, count, rnd)
+        lat, lng = rnd.uniform(-10, 10), rnd.uniform(-10, 10)
+        viewport = (lng - 0.5, lat - 0.5, lng + 0.5, lat + 0.5)
+        radius = 5000.0
+
+        def bbox_indexed():
+            return filter_bbox(db.query(LunarObject), [viewport]).all()
+
+        def radius_indexed():
+            candidates = filter_bbox(db.query(LunarObject), radius_bbox(lat, lng, radius)).all()
+            return [o for o in candidates if great_circle_distance(lat, lng, o.lat, o.lng) <= radius]
+
+        def full_scan():
+            objects = db.query(LunarObject).all()
+            return [o for o in objects if viewport[0] <= o.lng <= viewport[2] and viewport[1] <= o.lat <= viewport[3]]
+
+        return {
+            "objects": count,
+            "dialect": engine.dialect.name,
+            "bbox_indexed": timed(bbox_indexed, repeat),
+            "radius_indexed": timed(radius_indexed, repeat),
+            "full_scan": timed(full_scan, max(1, repeat // 10)),
+        }
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--objects", nargs="+", type=int, default=[100000, 1000000])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    rnd = random.Random(args.seed)
+    results = [run(count, args.repeat, rnd) for count in args.objects]
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,74 @@
+"""Keyset (cursor) pagination vs. OFFSET/LIMIT on the object list.
+
+Seeds N random objects into DATABASE_URL (use a scratch database) and times
+fetching page P both ways, with the same ordering as GET /objects/.
+
+    DATABASE_URL=postgresql://... python -m benchmarks.pagination --objects 1000000 --page 1000
+"""
+import argparse
+import json
+import random
+
+from app.crud.base import encode_cursor, paginate
+from app.db.session import SessionLocal, engine
+from app.models.object import LunarObject
+from benchmarks.object_queries import seed, timed
+
+ORDER = (LunarObject.created_at, LunarObject.id)
+
+
+def run(count, page, page_size, repeat, rnd):
+    db = SessionLocal()
+    try:
+        seed(db, count, rnd)
+        # Курсор, который клиент получил бы вместе со страницей page - 1
+        last = (
+            db.query(*ORDER)
+            .order_by(*[c.desc() for c in ORDER])
+            .offset((page - 1) * page_size - 1)
+            .limit(1)
+            .one()
+        )
+        cursor = encode_cursor(last)
+
+        def offset_page():
+            return (
+                db.query(LunarObject)
+                .order_by(*[c.desc() for c in ORDER])
+                .offset((page - 1) * page_size)
+                .limit(page_size)
+                .all()
+            )
+
+        def keyset_page():
+            return paginate(db.query(LunarObject), ORDER, cursor=cursor, limit=page_size, descending=True)[0]
+
+        assert [o.id for o in offset_page()] == [o.id for o in keyset_page()]
+        return {
+            "objects": count,
+            "page": page,
+            "page_size": page_size,
+            "dialect": engine.dialect.name,
+            "offset": timed(offset_page, repeat),
+            "keyset": timed(keyset_page, repeat),
+        }
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--objects", nargs="+", type=int, default=[1000000])
+    parser.add_argument("--page", type=int, default=1000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    rnd = random.Random(args.seed)
+    results = [run(count, args.page, args.page_size, args.repeat, rnd) for count in args.objects]
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,97 @@
+"""Raster statistics at ingest: time and memory against file size and workers.
+
+Generates a tiled Float32 DEM of --size pixels a side (block by block, so the
+generator itself stays small) unless --input is given, then computes the
+per-band statistics with each worker count. Peak RSS is reported for this
+process and for the pool workers separately; both should stay near one
+window per worker regardless of the raster size.
+
+    python -m benchmarks.raster_stats --size 40000 --workers 1 2 4 8
+"""
+import argparse
+import json
+import os
+import resource
+import tempfile
+import time
+
+import numpy as np
+
+from app.services.raster import _gdal
+from app.services.raster_stats import RasterStatsEngine
+
+BLOCK = 512
+
+
+def generate_dem(path: str, size: int, seed: int):
+    gdal = _gdal()
+    ds = gdal.GetDriverByName("GTiff").Create(
+        path, size, size, 1, gdal.GDT_Float32,
+        options=["TILED=YES", f"BLOCKXSIZE={BLOCK}", f"BLOCKYSIZE={BLOCK}", "COMPRESS=DEFLATE", "BIGTIFF=IF_SAFER"],
+    )
+    band = ds.GetRasterBand(1)
+    band.SetNoDataValue(-9999.0)
+    rnd = np.random.default_rng(seed)
+    for y in range(0, size, BLOCK):
+        for x in range(0, size, BLOCK):
+            h, w = min(BLOCK, size - y), min(BLOCK, size - x)
+            # Плавный рельеф плюс шум, чтобы блоки не сжимались в ноль
+            yy, xx = np.mgrid[y:y + h, x:x + w]
+            block = 2000 * np.sin(xx / 3000) * np.cos(yy / 5000) + rnd.normal(0, 5, (h, w))
+            band.WriteArray(block.astype(np.float32), x, y)
+    band.FlushCache()
+    ds = None
+
+
+def peak_rss_mb(who: int) -> float:
+    return resource.getrusage(who).ru_maxrss / 1024
+
+
+def run(path: str, workers: int, window: int) -> dict:
+    engine = RasterStatsEngine(workers, window, 256, [2, 50, 98])
+    try:
+        started = time.perf_counter()
+        stats = engine.compute(path)
+        elapsed = time.perf_counter() - started
+    finally:
+        engine.shutdown()
+    band = stats["bands"][0]
+    pixels = stats["width"] * stats["height"]
+    return {
+        "workers": workers,
+        "seconds": elapsed,
+        "megapixels_per_s": pixels / 1e6 / elapsed,
+        "min": band["min"],
+        "max": band["max"],
+        "p50": band["percentiles"]["p50"],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--input", help="existing GeoTIFF instead of a generated DEM")
+    parser.add_argument("--size", type=int, default=20000, help="generated DEM side, pixels")
+    parser.add_argument("--workers", nargs="+", type=int, default=[1, 2, 4])
+    parser.add_argument("--window", type=int, default=2048)
+    parser.add_argument("--dir", help="scratch directory (default: a temp dir)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as directory:
+        path = args.input
+        if path is None:
+            path = os.path.join(directory, "dem.tif")
+            generate_dem(path, args.size, args.seed)
+        results = {
+            "file": path,
+            "file_bytes": os.path.getsize(path),
+            "runs": [run(path, workers, args.window) for workers in args.workers],
+            "peak_rss_mb": peak_rss_mb(resource.RUSAGE_SELF),
+            "worker_peak_rss_mb": peak_rss_mb(resource.RUSAGE_CHILDREN),
+        }
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
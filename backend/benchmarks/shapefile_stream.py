@@ -0,0 +1,136 @@
+"""Streaming a multi-GB shapefile to GeoServer: memory stays flat.
+
+Writes a sparse shapefile (valid headers, a .dbf of --dbf-gb gigabytes) to a
+scratch directory, then measures the two paths a shapefile takes through the
+backend: copying the sidecars through the validating writer (--ingest, which
+writes the full size to disk) and generating the stored zip that is PUT to
+GeoServer. Peak RSS is reported against the size of the payload; with
+--verify the archive is also written out and checked with zipfile.
+
+    python -m benchmarks.shapefile_stream --dbf-gb 5
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import struct
+import tempfile
+import time
+import zipfile
+
+from app.services.shapefile import ShapefileSet, iter_zip, zip_length, zip_members
+
+FIELD_LENGTH = 254
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _shp_header(size: int) -> bytes:
+    return (
+        struct.pack(">i", 9994) + b"\0" * 20 + struct.pack(">i", size // 2)
+        + struct.pack("<ii", 1000, 1) + b"\0" * 64
+    )
+
+
+def write_sparse_shapefile(directory: str, dbf_bytes: int) -> str:
+    record_length = FIELD_LENGTH + 1
+    records = max(1, dbf_bytes // record_length)
+    header_length = 32 + 32 + 1
+    path = os.path.join(directory, "source")
+
+    with open(f"{path}.dbf", "wb") as f:
+        f.write(struct.pack("<B3BIHH20x", 0x03, 124, 1, 1, records, header_length, record_length))
+        f.write(b"NAME".ljust(11, b"\0") + b"C" + b"\0" * 4 + bytes([FIELD_LENGTH, 0]) + b"\0" * 14)
+        f.write(b"\x0d")
+        f.truncate(header_length + records * record_length)
+
+    # Null-записи: 8 байт заголовка + 4 байта типа
+    for ext, size in ((".shp", 100 + records * 12), (".shx", 100 + records * 8)):
+        with open(f"{path}{ext}", "wb") as f:
+            f.write(_shp_header(size))
+            f.truncate(size)
+    with open(f"{path}.prj", "w") as f:
+        f.write('GEOGCS["Moon_2000",DATUM["D_Moon_2000",SPHEROID["Moon_2000_IAU_IAG",1737400.0,0.0]],'
+                'PRIMEM["Reference_Meridian",0.0],UNIT["Degree",0.0174532925199433]]')
+    return f"{path}.shp"
+
+
+def ingest(source: str, directory: str, chunk_size: int) -> dict:
+    started = time.perf_counter()
+    parts = ShapefileSet(os.path.join(directory, "ingested.shp"))
+    base = os.path.splitext(source)[0]
+    for ext in (".shp", ".shx", ".dbf", ".prj"):
+        with open(f"{base}{ext}", "rb") as src, parts.open(ext) as dst:
+            while data := src.read(chunk_size):
+                dst.write(data)
+    shp_path = parts.finish()
+    elapsed = time.perf_counter() - started
+    size = sum(w.size for w in parts.members.values())
+    parts.discard()
+    return {"bytes": size, "seconds": elapsed, "mb_per_s": size / 2 ** 20 / elapsed, "shp": shp_path}
+
+
+async def stream_zip(source: str, chunk_size: int, out_path: str = None) -> dict:
+    started = time.perf_counter()
+    members = zip_members(source, "layer")
+    crc_seconds = time.perf_counter() - started
+    expected = zip_length(members)
+
+    total = 0
+    largest_chunk = 0
+    out = open(out_path, "wb") if out_path else None
+    try:
+        async for data in iter_zip(members, chunk_size):
+            total += len(data)
+            largest_chunk = max(largest_chunk, len(data))
+            if out:
+                out.write(data)
+    finally:
+        if out:
+            out.close()
+    elapsed = time.perf_counter() - started
+
+    if total != expected:
+        raise SystemExit(f"zip_length() predicted {expected} bytes, stream produced {total}")
+    result = {
+        "bytes": total,
+        "zip64": any(m.size >= 0xFFFFFFFF for m in members) or total >= 0xFFFFFFFF,
+        "crc_seconds": crc_seconds,
+        "seconds": elapsed,
+        "mb_per_s": total / 2 ** 20 / elapsed,
+        "largest_chunk_bytes": largest_chunk,
+    }
+    if out_path:
+        with zipfile.ZipFile(out_path) as archive:
+            result["verified"] = archive.testzip() is None
+            result["members"] = archive.namelist()
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dbf-gb", type=float, default=5.0)
+    parser.add_argument("--chunk-mb", type=int, default=1)
+    parser.add_argument("--dir", help="scratch directory (default: a temp dir)")
+    parser.add_argument("--ingest", action="store_true", help="also copy through the validating writer")
+    parser.add_argument("--verify", action="store_true", help="write the archive out and test it")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    chunk_size = args.chunk_mb * 1024 * 1024
+    with tempfile.TemporaryDirectory(dir=args.dir) as directory:
+        source = write_sparse_shapefile(directory, int(args.dbf_gb * 2 ** 30))
+        results = {"dbf_bytes": os.path.getsize(source[:-4] + ".dbf"), "baseline_rss_mb": peak_rss_mb()}
+        if args.ingest:
+            results["ingest"] = ingest(source, directory, chunk_size)
+        out_path = os.path.join(directory, "payload.zip") if args.verify else None
+        results["zip_stream"] = asyncio.run(stream_zip(source, chunk_size, out_path))
+        results["peak_rss_mb"] = peak_rss_mb()
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,116 @@
+"""Worker startup: app import time and time to first request.
+
+Imports app.main in --imports fresh interpreters and reports the median, with
+the slowest top-level packages from ``python -X importtime``. Then starts the
+API with uvicorn for each --workers count against DATABASE_URL (migrate it
+first, python -m app.db.migrate) and polls /health/live until every worker
+has answered, collecting each worker's own timings: import, startup hooks
+done, first response. Also reports when /health/ready first returned 200,
+seen from outside.
+
+    DATABASE_URL=postgresql://... python -m benchmarks.startup --workers 1 4
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import app.main; print(time.perf_counter() - t)"
+
+
+def import_times(count: int) -> list:
+    return [
+        float(subprocess.run([sys.executable, "-c", IMPORT_SNIPPET], capture_output=True, text=True, check=True).stdout)
+        for _ in range(count)
+    ]
+
+
+def slowest_imports(top: int) -> list:
+    # -X importtime: "import time: self | cumulative | module", вложенность отступами
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"], capture_output=True, text=True, check=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        depth = (len(name) - len(name.lstrip())) // 2
+        if depth <= 2:
+            rows.append((int(cumulative) / 1e6, name.strip()))
+    return [{"module": name, "seconds": seconds} for seconds, name in sorted(rows, reverse=True)[:top]]
+
+
+def run_workers(workers: int, port: int, timeout: float) -> dict:
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+    )
+    seen, first_live, first_ready = {}, None, None
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=5) as client:
+            deadline = started + timeout
+            while time.perf_counter() < deadline and (len(seen) < workers or first_ready is None):
+                try:
+                    # Новое соединение на каждый запрос, чтобы попадать в разные воркеры
+                    live = client.get("/api/v1/health/live", headers={"Connection": "close"})
+                    if live.status_code == 200:
+                        first_live = first_live or time.perf_counter() - started
+                        body = live.json()
+                        seen[body["pid"]] = body
+                    if first_ready is None and client.get("/api/v1/health/ready").status_code == 200:
+                        first_ready = time.perf_counter() - started
+                except httpx.TransportError:
+                    time.sleep(0.05)
+    finally:
+        server.terminate()
+        server.wait()
+
+    per_worker = list(seen.values())
+
+    def median(field):
+        values = [w[field] for w in per_worker if w[field] is not None]
+        return statistics.median(values) if values else None
+
+    return {
+        "workers": workers,
+        "workers_seen": len(per_worker),
+        "first_live_seconds": first_live,
+        "first_ready_seconds": first_ready,
+        "median_import_seconds": median("import_seconds"),
+        "median_startup_seconds": median("startup_seconds"),
+        "median_first_request_seconds": median("first_request_seconds"),
+        "per_worker": per_worker,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--imports", type=int, default=5, help="fresh interpreters importing app.main")
+    parser.add_argument("--workers", nargs="+", type=int, default=[1, 4])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    times = import_times(args.imports)
+    results = {
+        "cpu_count": os.cpu_count(),
+        "import_seconds": {"median": statistics.median(times), "min": min(times), "max": max(times)},
+        "slowest_imports": slowest_imports(args.top),
+        "runs": [run_workers(workers, args.port, args.timeout) for workers in args.workers],
+    }
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
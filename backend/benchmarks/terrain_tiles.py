@@ -0,0 +1,99 @@
+"""Terrain derivatives: tile throughput against workers, cold and cached.
+
+Generates a tiled Float32 DEM of --size pixels a side (the same generator as
+the raster statistics benchmark) unless --input is given, then renders each
+derivative as a full layer with every worker count (publishing computes
+every tile in the process pool and bypasses the tile cache), then serves
+every tile as a preview twice: cold, and from the disk cache bounded by
+--cache-mb.
+
+    python -m benchmarks.terrain_tiles --size 20000 --workers 1 2 4 8
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import shutil
+import tempfile
+import time
+
+from app.services.terrain import DERIVATIVES, TerrainEngine, TerrainParams
+from benchmarks.raster_stats import generate_dem
+
+
+async def serve_all(engine: TerrainEngine, path: str, derivative: str, grid) -> float:
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        engine.tile("bench", path, derivative, tx, ty, TerrainParams())
+        for ty in range(grid.rows) for tx in range(grid.cols)
+    ))
+    return time.perf_counter() - started
+
+
+async def run(path: str, directory: str, derivative: str, workers: int, tile_size: int, cache_bytes: int) -> dict:
+    cache = os.path.join(directory, "cache")
+    shutil.rmtree(cache, ignore_errors=True)
+    engine = TerrainEngine(cache, workers, tile_size, cache_bytes)
+    out_path = os.path.join(directory, f"{derivative}.tif")
+    try:
+        started = time.perf_counter()
+        await engine.render("bench", path, derivative, TerrainParams(), out_path)
+        render_seconds = time.perf_counter() - started
+        grid = await engine.grid("bench", path)
+        cold_seconds = await serve_all(engine, path, derivative, grid)
+        cached_seconds = await serve_all(engine, path, derivative, grid)
+        cache_stats = engine.snapshot()
+    finally:
+        engine.shutdown()
+    megapixels = grid.width * grid.height / 1e6
+    return {
+        "derivative": derivative,
+        "workers": workers,
+        "tiles": grid.cols * grid.rows,
+        "render_seconds": render_seconds,
+        "render_megapixels_per_s": megapixels / render_seconds,
+        "cold_tiles_seconds": cold_seconds,
+        "cached_tiles_seconds": cached_seconds,
+        "cached_megapixels_per_s": megapixels / cached_seconds,
+        "cache_bytes": cache_stats["disk_bytes"],
+        "cache_evictions": cache_stats["disk_evictions"],
+        "output_bytes": os.path.getsize(out_path),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--input", help="existing GeoTIFF instead of a generated DEM")
+    parser.add_argument("--size", type=int, default=10000, help="generated DEM side, pixels")
+    parser.add_argument("--workers", nargs="+", type=int, default=[1, 2, 4])
+    parser.add_argument("--tile-size", type=int, default=512)
+    parser.add_argument("--cache-mb", type=int, default=5120, help="disk budget of the tile cache")
+    parser.add_argument("--derivatives", nargs="+", choices=DERIVATIVES, default=list(DERIVATIVES))
+    parser.add_argument("--dir", help="scratch directory (default: a temp dir)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as directory:
+        path = args.input
+        if path is None:
+            path = os.path.join(directory, "dem.tif")
+            generate_dem(path, args.size, args.seed)
+        runs = [
+            asyncio.run(run(path, directory, derivative, workers, args.tile_size, args.cache_mb * 2 ** 20))
+            for derivative in args.derivatives
+            for workers in args.workers
+        ]
+        results = {
+            "file": path,
+            "file_bytes": os.path.getsize(path),
+            "runs": runs,
+            "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            "worker_peak_rss_mb": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024,
+        }
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
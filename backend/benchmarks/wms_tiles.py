@@ -0,0 +1,90 @@
+"""WMS tile latency for GeoServer layers, e.g. a raw upload vs. its COG.
+
+    python -m benchmarks.wms_tiles --layers lunar:raw_dem lunar:cog_dem \
+        --bbox -10 -10 10 10 --requests 500 --concurrency 8
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+
+import httpx
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))]
+
+
+def random_tiles(bbox, count, max_zoom, seed):
+    rnd = random.Random(seed)
+    minx, miny, maxx, maxy = bbox
+    tiles = []
+    for _ in range(count):
+        zoom = rnd.randint(0, max_zoom)
+        size_x = (maxx - minx) / 2 ** zoom
+        size_y = (maxy - miny) / 2 ** zoom
+        x = minx + rnd.randrange(2 ** zoom) * size_x
+        y = miny + rnd.randrange(2 ** zoom) * size_y
+        tiles.append((x, y, x + size_x, y + size_y))
+    return tiles
+
+
+async def run_layer(client, url, layer, tiles, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def fetch(tile):
+        params = {
+            "service": "WMS", "version": "1.1.1", "request": "GetMap",
+            "layers": layer, "styles": "", "srs": "EPSG:4326",
+            "bbox": ",".join(map(str, tile)), "width": 256, "height": 256,
+            "format": "image/png",
+        }
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.get(url, params=params)
+            response.raise_for_status()
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(fetch(tile) for tile in tiles))
+    elapsed = time.perf_counter() - start
+    return {
+        "layer": layer,
+        "requests": len(latencies),
+        "throughput_rps": len(latencies) / elapsed,
+        "mean_ms": statistics.mean(latencies),
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+    }
+
+
+async def main(args):
+    tiles = random_tiles(args.bbox, args.requests, args.max_zoom, args.seed)
+    url = f"{args.geoserver_url.rstrip('/')}/wms"
+    async with httpx.AsyncClient(auth=(args.user, args.password), timeout=60) as client:
+        # Same tile set for every layer, so results are directly comparable
+        results = [await run_layer(client, url, layer, tiles, args.concurrency) for layer in args.layers]
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--geoserver-url", default="http://localhost:8080/geoserver")
+    parser.add_argument("--user", default="admin")
+    parser.add_argument("--password", default="geoserver")
+    parser.add_argument("--layers", nargs="+", required=True)
+    parser.add_argument("--bbox", nargs=4, type=float, required=True, metavar=("MINX", "MINY", "MAXX", "MAXY"))
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--max-zoom", type=int, default=6)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output")
+    asyncio.run(main(parser.parse_args()))
@@ -9,35 +9,45 @@ import {
 } from '@ant-design/icons';
 import { CSSTransition } from 'react-transition-group';
 
+import api from '../../api/axios';
+
 import './../../styles/main.css';
 import './AlertsPanel.css';
 
+// Родительный падеж для заголовков уведомлений
+const RESOURCE_NAMES = {
+  energy: 'энергии',
+  water: 'воды',
+  oxygen: 'кислорода',
+  food: 'продовольствия'
+};
+
+const ALERT_TITLES = {
+  critical: (name) => `Критический уровень ${name}`,
+  warning: (name) => `Низкий уровень ${name}`,
+  full: (name) => `Запас ${name} на пределе ёмкости`
+};
+
+// Уведомление из прогноза /resources/forecast
+const toAlert = (alert) => {
+  const name = RESOURCE_NAMES[alert.resource] || alert.resource;
+  let description = `Текущий уровень ${Math.round(alert.level_fraction * 100)}%.`;
+  if (alert.time_to_empty_hours !== null) {
+    description += ` При текущем расходе закончится через ${alert.time_to_empty_hours.toFixed(1)} ч.`;
+  }
+  return {
+    id: `${alert.resource}-${alert.severity}`,
+    type: alert.severity === 'full' ? 'info' : alert.severity,
+    title: ALERT_TITLES[alert.severity](name),
+    description,
+    time: 'сейчас'
+  };
+};
+
 const AlertsPanel = () => {
-  const [isOpen, setIsOpen] = useState(true);
+  const [isOpen, setIsOpen] = useState(false);
   const [isCollapsed, setIsCollapsed] = useState(false);
-  const [alerts, setAlerts] = useState([
-    {
-      id: 1,
-      type: 'warning',
-      title: 'Низкий уровень кислорода',
-      description: 'Критически низкий уровень (30%). Необходимо пополнить запасы.',
-      time: '2 мин назад'
-    },
-    {
-      id: 2,
-      type: 'info',
-      title: 'Запланировано ТО',
-      description: 'Техническое обслуживание запланировано на 15:00 по лунному времени',
-      time: '1 час назад'
-    },
-    {
-      id: 3,
-      type: 'critical',
-      title: 'Сбой системы',
-      description: 'Обнаружена неисправность в модуле жизнеобеспечения. Требуется немедленное вмешательство.',
-      time: '5 мин назад'
-    }
-  ]);
+  const [alerts, setAlerts] = useState([]);
 
   const panelRef = useRef(null);
 
@@ -64,9 +74,13 @@ const AlertsPanel = () => {
   };
 
   useEffect(() => {
-    if (alerts.length === 0) {
-      setIsOpen(false);
-    }
+    api.get('/resources/forecast')
+      .then((response) => setAlerts(response.data.alerts.map(toAlert)))
+      .catch((error) => console.error('Error loading resource forecast:', error));
+  }, []);
+
+  useEffect(() => {
+    setIsOpen(alerts.length > 0);
   }, [alerts]);
 
   return (
@@ -1,24 +1,22 @@
 import React, { useEffect, useRef } from 'react';
 import { useMap } from 'react-leaflet';
+import { useSelector } from 'react-redux';
 import L from 'leaflet';
 
-const GeoTIFFLayer = ({ layerName, opacity = 1 }) => {
+const GeoTIFFLayer = ({ mapId, opacity = 1 }) => {
   const map = useMap();
   const layerRef = useRef(null);
+  const token = useSelector(state => state.auth.token);
 
   useEffect(() => {
-    if (!layerName) return;
+    if (!mapId) return;
 
-    const url = `${process.env.REACT_APP_GEOSERVER_URL}/lunar/wms`;
+    // Тайлы идут через кэширующий прокси бэкенда, а не напрямую в GeoServer
+    const url = `${process.env.REACT_APP_API_URL}/maps/${mapId}/tiles/{z}/{x}/{y}?access_token=${token}`;
     
-    const layer = L.tileLayer.wms(url, {
-      layers: `lunar:${layerName}`,
-      format: 'image/png',
-      transparent: true,
-      version: '1.1.0',
+    const layer = L.tileLayer(url, {
       attribution: 'GeoServer',
       opacity: opacity,
-      srs: 'EPSG:4326', 
       zIndex: 5
     });
 
@@ -30,7 +28,7 @@ const GeoTIFFLayer = ({ layerName, opacity = 1 }) => {
         map.removeLayer(layerRef.current);
       }
     };
-  }, [layerName, map, opacity]);
+  }, [mapId, map, opacity, token]);
 
   return null;
 };
@@ -69,11 +69,12 @@ const MapControls = ({
     try {
       setLoading(true);
       const response = await api.get('/maps');
-      setUserMaps(response.data);
+      const maps = response.data.items;
+      setUserMaps(maps);
       
       setActiveLayers(prev => {
         const newLayers = {...prev};
-        response.data.forEach(map => {
+        maps.forEach(map => {
           if (!prev[map.id]) {
             newLayers[map.id] = {
               id: map.id,
@@ -36,12 +36,12 @@ const MapLayers = ({ simplified, activeLayers, userMaps, reliefOpacity = 0.7 })
           >
             {map.file_type === 'geotiff' ? (
               <GeoTIFFLayer 
-                layerName={map.file_path} 
+                mapId={map.id} 
                 opacity={(activeLayers[map.id]?.opacity || 100) / 100}
               />
             ) : (
               <ShapefileLayer 
-                layerName={map.file_path} 
+                mapId={map.id} 
                 opacity={(activeLayers[map.id]?.opacity || 100) / 100}
               />
             )}
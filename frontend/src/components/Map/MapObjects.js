@@ -16,8 +16,14 @@ const MapObjects = ({
 
   const fetchObjects = useCallback(async () => {
     try {
-      const response = await api.get('/objects/');
-      setObjects(response.data);
+      const loaded = [];
+      let cursor = null;
+      do {
+        const response = await api.get('/objects/', { params: { limit: 1000, cursor } });
+        loaded.push(...response.data.items);
+        cursor = response.data.next_cursor;
+      } while (cursor);
+      setObjects(loaded);
     } catch (error) {
       console.error('Error loading objects:', error);
     }
@@ -31,6 +37,10 @@ const MapObjects = ({
       );
       message.success('Объект обновлен');
     } catch (error) {
+      if (error.response?.status === 409) {
+        message.error('Невозможно переместить объект - пересечение с зоной ограничения');
+        return;
+      }
       console.error('Error updating object:', error);
       message.error('Ошибка при обновлении объекта');
     }
@@ -52,16 +62,6 @@ const MapObjects = ({
   const handleMapClick = useCallback(async (e) => {
     if (placementMode && selectedObjectType && mapRef.current) {
       const newPosition = e.latlng;
-      
-      const isPositionValid = objects.every(obj => {
-        const distance = mapRef.current.distance(newPosition, [obj.lat, obj.lng]);
-        return distance > obj.restriction_radius;
-      });
-      
-      if (!isPositionValid) {
-        message.error('Невозможно разместить объект - пересечение с зоной ограничения');
-        return;
-      }
   
       const newObject = {
         type: selectedObjectType,
@@ -77,11 +77,16 @@ const MapObjects = ({
         setObjects(prev => [...prev, response.data]);
         message.success('Объект размещен');
       } catch (error) {
+        // Пересечение зон ограничения проверяет сервер
+        if (error.response?.status === 409) {
+          message.error('Невозможно разместить объект - пересечение с зоной ограничения');
+          return;
+        }
         console.error('Error creating object:', error);
         message.error('Ошибка при размещении объекта');
       }
     }
-  }, [placementMode, selectedObjectType, objects, mapRef]);
+  }, [placementMode, selectedObjectType, mapRef]);
 
   useEffect(() => {
     fetchObjects();
@@ -7,6 +7,11 @@ import api from '../../api/axios';
 
 const { Option } = Select;
 
+const SHAPEFILE_EXTENSIONS = ['.shp', '.shx', '.dbf', '.prj', '.cpg', '.zip'];
+const GEOTIFF_EXTENSIONS = ['.tif', '.tiff'];
+
+const extensionOf = (name) => name.toLowerCase().slice(name.lastIndexOf('.'));
+
 const MapUpload = ({ onUploadSuccess }) => {
   const [form] = Form.useForm();
   const [visible, setVisible] = useState(false);
@@ -16,12 +21,10 @@ const MapUpload = ({ onUploadSuccess }) => {
   const token = useSelector(state => state.auth.token);
 
   const beforeUpload = (file) => {
-    const isShapefile = file.name.toLowerCase().endsWith('.shp');
-    const isGeoTIFF = file.name.toLowerCase().endsWith('.tif') || 
-                     file.name.toLowerCase().endsWith('.tiff');
+    const ext = extensionOf(file.name);
     
-    if (!isShapefile && !isGeoTIFF) {
-      message.error('Можно загружать только Shapefile (.shp) или GeoTIFF (.tif, .tiff)');
+    if (!SHAPEFILE_EXTENSIONS.includes(ext) && !GEOTIFF_EXTENSIONS.includes(ext)) {
+      message.error('Можно загружать только Shapefile (.shp, .shx, .dbf, .prj или .zip) или GeoTIFF (.tif, .tiff)');
       return Upload.LIST_IGNORE;
     }
     
@@ -45,11 +48,17 @@ const MapUpload = ({ onUploadSuccess }) => {
       setLoading(true);
       setUploadProgress(0);
       
+      // Shapefile отправляется архивом или набором файлов .shp/.shx/.dbf/.prj
+      const isGeoTIFF = fileList.every(f => GEOTIFF_EXTENSIONS.includes(extensionOf(f.name)));
+      if (isGeoTIFF && fileList.length > 1) {
+        message.error('GeoTIFF загружается одним файлом');
+        return;
+      }
+
       const formData = new FormData();
-      formData.append('file', fileList[0].originFileObj);
+      fileList.forEach(f => formData.append('files', f.originFileObj));
       formData.append('name', values.name);
-      formData.append('file_type', 
-        fileList[0].name.toLowerCase().endsWith('.shp') ? 'shapefile' : 'geotiff');
+      formData.append('file_type', isGeoTIFF ? 'geotiff' : 'shapefile');
       formData.append('is_public', values.is_public);
       
       if (values.description) {
@@ -70,7 +79,7 @@ const MapUpload = ({ onUploadSuccess }) => {
           }
         });
   
-        message.success('Файл успешно загружен и опубликован в GeoServer');
+        message.success('Файл загружен, публикация в GeoServer поставлена в очередь');
         setVisible(false);
         form.resetFields();
         setFileList([]);
@@ -153,12 +162,12 @@ const MapUpload = ({ onUploadSuccess }) => {
               beforeUpload={beforeUpload}
               fileList={fileList}
               onChange={({ fileList }) => setFileList(fileList)}
-              accept=".shp,.tif,.tiff"
-              maxCount={1}
+              accept=".shp,.shx,.dbf,.prj,.cpg,.zip,.tif,.tiff"
+              multiple
             >
-              <Button icon={<UploadOutlined />}>Выбрать файл</Button>
+              <Button icon={<UploadOutlined />}>Выбрать файлы</Button>
               <div style={{ marginTop: 8 }}>
-                Поддерживаемые форматы: GeoTIFF (.tif, .tiff) или Shapefile (.shp)
+                Поддерживаемые форматы: GeoTIFF (.tif, .tiff) или Shapefile (.zip либо .shp + .shx + .dbf + .prj)
                 <br />
                 Максимальный размер: 50GB
               </div>